@@ -0,0 +1,396 @@
+import math
+
+from .storage import open_storage
+
+# Formats de tableau ; valeur : libellé affiché
+FORMATS = {
+    "single": "Élimination directe",
+    "double": "Double élimination",
+    "swiss": "Système suisse",
+    "roundrobin": "Toutes rondes",
+}
+
+# Statuts d'un match
+PENDING = "pending"  # en attente d'une ou des deux équipes
+READY = "ready"      # les deux équipes sont connues, ticket de veto à ouvrir
+LIVE = "live"        # ticket de veto ouvert
+DONE = "done"        # résultat enregistré, ou qualification d'office face à un exempt
+
+SLOTS = ("team_a", "team_b")
+# Phases : W tableau principal, L tableau des perdants, GF grande finale, S ronde suisse, R ronde toutes rondes
+ROUND_STAGES = {"swiss": "S", "roundrobin": "R"}
+STAGE_ORDER = {"W": 0, "L": 1, "GF": 2, "S": 3, "R": 4}
+
+
+class BracketError(ValueError):
+    pass
+
+
+def seed_order(size):
+    """Têtes de série de chaque emplacement du premier tour (1 contre `size`, 2 contre `size - 1`...)."""
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [seed for first in order for seed in (first, total - first)]
+    return order
+
+
+def round_label(match_id):
+    """Ronde d'un match à partir de son identifiant : "W2-3" -> "W2", "GF" -> "GF"."""
+    return match_id.split("-", 1)[0]
+
+
+def match_key(match_id):
+    """Clé de tri : tableau principal, perdants, finale, puis numéro de ronde et de match."""
+    label, _, number = match_id.partition("-")
+    stage = label.rstrip("0123456789")
+    return STAGE_ORDER.get(stage, len(STAGE_ORDER)), int(label[len(stage):] or 0), int(number or 0)
+
+
+def circle_pairs(teams, round_index):
+    """Appariements de la ronde `round_index` (à partir de 0) par la méthode du cercle ; None = exempt."""
+    players = list(teams) + ([None] if len(teams) % 2 else [])
+    rest = players[1:]
+    shift = round_index % len(rest)
+    rotated = [players[0]] + rest[-shift:] + rest[:-shift] if shift else players
+    half = len(rotated) // 2
+    return [(rotated[i], rotated[-1 - i]) for i in range(half)]
+
+
+STATUS_LABELS = {PENDING: "en attente", READY: "prêt", LIVE: "veto en cours", DONE: "terminé"}
+
+
+def format_match(match):
+    """Ligne d'affichage d'un match : "`W1-3` Alpha VS Beta — prêt"."""
+    team_a = match["team_a"] or "?"
+    team_b = match["team_b"] or "?"
+    if match["status"] == DONE:
+        if match["loser"] is None:
+            return f"`{match['id']}` **{match['winner'] or '—'}** qualifié d'office"
+        return f"`{match['id']}` **{match['winner']}** bat {match['loser']}"
+    return f"`{match['id']}` {team_a} VS {team_b} — {STATUS_LABELS[match['status']]}"
+
+
+class BracketConfig:
+    """Matchs des tournois : une entrée par match dans la table "matches", indexée par tournoi, statut et ronde.
+
+    Chaque match connaît le match qui reçoit son vainqueur (`win_to`) et celui qui reçoit son
+    perdant (`lose_to`) : un résultat ne met à jour que ces matchs, sans recalculer l'arbre.
+    Les rondes suisses et toutes rondes sont créées une à une, quand la précédente est terminée.
+    Le format et l'avancement du tableau sont rangés dans l'entrée du tournoi.
+    """
+
+    def __init__(self, storage=None, tournament_config=None):
+        self.storage = storage or open_storage()
+        self.tournament_config = tournament_config
+        self.by_tournament = {}
+        self.by_status = {}
+        self.by_round = {}
+        for match in self.storage.load("matches").values():
+            self._index(match)
+
+    @staticmethod
+    def _key(tournament, match_id):
+        return f"{tournament}:{match_id}"
+
+    def _index(self, match):
+        tournament, match_id = match["tournament"], match["id"]
+        self.by_tournament.setdefault(tournament, {})[match_id] = match
+        self.by_status.setdefault((tournament, match["status"]), {})[match_id] = match
+        self.by_round.setdefault((tournament, round_label(match_id)), {})[match_id] = match
+
+    def _set_status(self, match, status):
+        tournament = match["tournament"]
+        self.by_status.get((tournament, match["status"]), {}).pop(match["id"], None)
+        match["status"] = status
+        self.by_status.setdefault((tournament, status), {})[match["id"]] = match
+
+    def _save(self, tournament, changed):
+        if changed:
+            self.storage.apply("matches", upserts={self._key(tournament, match_id): match for match_id, match in changed.items()})
+
+    def info(self, tournament):
+        entry = self.tournament_config.get_tournament(tournament)
+        return entry.get("bracket") if entry else None
+
+    def get_match(self, tournament, match_id):
+        return self.by_tournament.get(tournament, {}).get(match_id)
+
+    def matches(self, tournament, status=None, label=None):
+        """Matchs du tournoi, filtrés par statut et/ou par ronde ("W1", "L2", "S3"...)."""
+        if label is not None:
+            matches = self.by_round.get((tournament, label), {}).values()
+            return [match for match in matches if status is None or match["status"] == status]
+        if status is not None:
+            return list(self.by_status.get((tournament, status), {}).values())
+        return list(self.by_tournament.get(tournament, {}).values())
+
+    # --- Création ---------------------------------------------------------------------
+
+    def _new_match(self, tournament, match_id, changed, waiting=2, win_to=None, lose_to=None):
+        match = {
+            "id": match_id,
+            "tournament": tournament,
+            "team_a": None,
+            "team_b": None,
+            "waiting": waiting,
+            "status": PENDING,
+            "winner": None,
+            "loser": None,
+            "win_to": win_to,
+            "lose_to": lose_to,
+        }
+        self._index(match)
+        changed[match_id] = match
+        return match
+
+    def create_bracket(self, tournament, teams, fmt, rounds=None):
+        """Génère le tableau du tournoi à partir des équipes (dans l'ordre des têtes de série).
+
+        Retourne les matchs prêts à être joués.
+        """
+        if fmt not in FORMATS:
+            raise BracketError(f"Format inconnu '{fmt}' ({', '.join(FORMATS)}).")
+        if self.info(tournament) is not None:
+            raise BracketError(f"Le tournoi **{tournament}** a déjà un tableau.")
+        teams = list(dict.fromkeys(teams))
+        minimum = 3 if fmt == "double" else 2
+        if len(teams) < minimum:
+            raise BracketError(f"Il faut au moins {minimum} équipes pour ce format.")
+
+        info = {"format": fmt, "teams": len(teams)}
+        changed = {}
+        if fmt in ("single", "double"):
+            info["rounds"] = self._create_elimination(tournament, teams, fmt == "double", changed)
+        else:
+            if fmt == "roundrobin":
+                # Avec un nombre impair d'équipes, chacune est exempte une fois
+                max_rounds = len(teams) - 1 + len(teams) % 2
+                default_rounds = max_rounds
+            else:
+                max_rounds = len(teams) - 1
+                default_rounds = math.ceil(math.log2(len(teams)))
+            info.update(seeds=teams, rounds=min(rounds or default_rounds, max_rounds), round=0)
+            self._create_round(tournament, info, changed)
+
+        with self.storage.transaction():
+            self.tournament_config.set_bracket(tournament, info)
+            self._save(tournament, changed)
+        return [match for match in changed.values() if match["status"] == READY]
+
+    def _create_elimination(self, tournament, teams, double, changed):
+        size = 1 << max(1, (len(teams) - 1).bit_length())
+        rounds = size.bit_length() - 1
+
+        # Tableau principal : W<ronde>-<n>, le vainqueur monte vers W<ronde+1>
+        for r in range(1, rounds + 1):
+            for i in range(size >> r):
+                if r < rounds:
+                    win_to = [f"W{r + 1}-{i // 2 + 1}", SLOTS[i % 2]]
+                else:
+                    win_to = ["GF", "team_a"] if double else None
+                if not double:
+                    lose_to = None
+                elif r == 1:
+                    lose_to = [f"L1-{i // 2 + 1}", SLOTS[i % 2]]
+                else:
+                    # Les perdants de W<r> rejoignent la ronde L<2(r-1)>
+                    lose_to = [f"L{2 * (r - 1)}-{i + 1}", "team_b"]
+                self._new_match(tournament, f"W{r}-{i + 1}", changed, waiting=0 if r == 1 else 2, win_to=win_to, lose_to=lose_to)
+
+        if double:
+            # Tableau des perdants : rondes impaires entre rescapés, rondes paires contre les perdants du tableau principal
+            for k in range(1, rounds):
+                for i in range(size >> (k + 1)):
+                    self._new_match(tournament, f"L{2 * k - 1}-{i + 1}", changed, win_to=[f"L{2 * k}-{i + 1}", "team_a"])
+                for i in range(size >> (k + 1)):
+                    if k < rounds - 1:
+                        win_to = [f"L{2 * k + 1}-{i // 2 + 1}", SLOTS[i % 2]]
+                    else:
+                        win_to = ["GF", "team_b"]
+                    self._new_match(tournament, f"L{2 * k}-{i + 1}", changed, win_to=win_to)
+            self._new_match(tournament, "GF", changed)
+
+        # Premier tour : têtes de série, les emplacements au-delà du nombre d'équipes sont exempts
+        order = seed_order(size)
+        first_round = [self.get_match(tournament, f"W1-{i + 1}") for i in range(size // 2)]
+        for i, match in enumerate(first_round):
+            seed_a, seed_b = order[2 * i], order[2 * i + 1]
+            match["team_a"] = teams[seed_a - 1] if seed_a <= len(teams) else None
+            match["team_b"] = teams[seed_b - 1] if seed_b <= len(teams) else None
+        for match in first_round:
+            self._settle(match, changed)
+        return rounds
+
+    def _create_round(self, tournament, info, changed):
+        """Crée la ronde suivante d'un tournoi suisse ou toutes rondes."""
+        info["round"] += 1
+        stage = ROUND_STAGES[info["format"]]
+        if info["format"] == "roundrobin":
+            # Pas de qualification d'office en toutes rondes : l'exempt ne joue pas
+            pairs = [pair for pair in circle_pairs(info["seeds"], info["round"] - 1) if None not in pair]
+        else:
+            pairs = self._swiss_pairs(tournament, info["seeds"])
+        for i, (team_a, team_b) in enumerate(pairs):
+            match = self._new_match(tournament, f"{stage}{info['round']}-{i + 1}", changed, waiting=0)
+            match["team_a"], match["team_b"] = team_a, team_b
+            self._settle(match, changed)
+
+    def _swiss_pairs(self, tournament, seeds):
+        """Appariement suisse : équipes classées par victoires, sans revanche quand c'est possible."""
+        wins, opponents, byes = self._records(tournament)
+        position = {team: index for index, team in enumerate(seeds)}
+        ranked = sorted(seeds, key=lambda team: (-wins.get(team, 0), position[team]))
+
+        bye = None
+        if len(ranked) % 2:
+            # Exempt : l'équipe la moins bien classée qui ne l'a pas encore été (victoire d'office)
+            bye = next((team for team in reversed(ranked) if team not in byes), ranked[-1])
+            ranked.remove(bye)
+        pairs = []
+        while ranked:
+            team = ranked.pop(0)
+            played = opponents.get(team, ())
+            index = next((i for i, other in enumerate(ranked) if other not in played), 0)
+            pairs.append((team, ranked.pop(index)))
+        if bye is not None:
+            pairs.append((bye, None))
+        return pairs
+
+    def _records(self, tournament):
+        wins, opponents, byes = {}, {}, set()
+        for match in self.by_status.get((tournament, DONE), {}).values():
+            if match["winner"] is None:
+                continue
+            wins[match["winner"]] = wins.get(match["winner"], 0) + 1
+            if match["loser"] is None:
+                byes.add(match["winner"])
+            else:
+                opponents.setdefault(match["winner"], set()).add(match["loser"])
+                opponents.setdefault(match["loser"], set()).add(match["winner"])
+        return wins, opponents, byes
+
+    # --- Avancement -------------------------------------------------------------------
+
+    def _feed(self, tournament, target, team, changed):
+        match_id, slot = target
+        match = self.get_match(tournament, match_id)
+        match[slot] = team
+        match["waiting"] -= 1
+        changed[match_id] = match
+        if match["waiting"] == 0:
+            self._settle(match, changed)
+
+    def _settle(self, match, changed):
+        """Les deux emplacements sont connus : match prêt, ou qualification d'office face à un exempt."""
+        changed[match["id"]] = match
+        if match["team_a"] and match["team_b"]:
+            self._set_status(match, READY)
+        else:
+            self._resolve(match, match["team_a"] or match["team_b"], None, changed)
+
+    def _resolve(self, match, winner, loser, changed):
+        tournament = match["tournament"]
+        match["winner"], match["loser"] = winner, loser
+        self._set_status(match, DONE)
+        changed[match["id"]] = match
+        if match["win_to"]:
+            self._feed(tournament, match["win_to"], winner, changed)
+        if match["lose_to"]:
+            self._feed(tournament, match["lose_to"], loser, changed)
+
+    def report_result(self, tournament, match_id, winner):
+        """Enregistre le vainqueur d'un match et fait avancer le tableau ; retourne les matchs devenus prêts."""
+        match = self.get_match(tournament, match_id)
+        if match is None:
+            raise BracketError(f"Aucun match '{match_id}' dans le tournoi **{tournament}**.")
+        if match["status"] not in (READY, LIVE):
+            raise BracketError(f"Le match {match_id} n'est pas en cours (statut : {match['status']}).")
+        if winner not in (match["team_a"], match["team_b"]):
+            raise BracketError(f"**{winner}** ne joue pas le match {match_id} ({match['team_a']} VS {match['team_b']}).")
+
+        changed = {}
+        loser = match["team_b"] if winner == match["team_a"] else match["team_a"]
+        self._resolve(match, winner, loser, changed)
+
+        info = self.info(tournament)
+        label = round_label(match_id)
+        round_over = info["format"] in ROUND_STAGES and all(other["status"] == DONE for other in self.by_round[(tournament, label)].values())
+        with self.storage.transaction():
+            if round_over and info["round"] < info["rounds"]:
+                self._create_round(tournament, info, changed)
+                self.tournament_config.set_bracket(tournament, info)
+            self._save(tournament, changed)
+        return [other for other in changed.values() if other["status"] == READY]
+
+    def mark_live(self, match):
+        """Ticket de veto ouvert pour ce match."""
+        self._set_status(match, LIVE)
+        self._save(match["tournament"], {match["id"]: match})
+
+    # --- Lecture ----------------------------------------------------------------------
+
+    def champion(self, tournament):
+        info = self.info(tournament)
+        if info is None or info["format"] in ROUND_STAGES:
+            return None
+        final = self.get_match(tournament, "GF" if info["format"] == "double" else f"W{info['rounds']}-1")
+        return final["winner"] if final and final["status"] == DONE else None
+
+    def standings(self, tournament):
+        """Classement (équipe, victoires, défaites) des formats à rondes, exempts comptés en victoire."""
+        info = self.info(tournament) or {}
+        wins, _, _ = self._records(tournament)
+        losses = {}
+        for match in self.by_status.get((tournament, DONE), {}).values():
+            if match["loser"] is not None:
+                losses[match["loser"]] = losses.get(match["loser"], 0) + 1
+        teams = info.get("seeds") or list(wins)
+        return sorted(((team, wins.get(team, 0), losses.get(team, 0)) for team in teams), key=lambda row: (-row[1], row[2]))
+
+    # --- Maintenance ------------------------------------------------------------------
+
+    def delete_bracket(self, tournament):
+        matches = self.by_tournament.pop(tournament, {})
+        for key in [key for key in self.by_status if key[0] == tournament]:
+            del self.by_status[key]
+        for key in [key for key in self.by_round if key[0] == tournament]:
+            del self.by_round[key]
+        with self.storage.transaction():
+            if matches:
+                self.storage.apply("matches", deletes=[self._key(tournament, match_id) for match_id in matches])
+            if self.tournament_config.get_tournament(tournament) is not None:
+                self.tournament_config.set_bracket(tournament, None)
+        return len(matches)
+
+    def rename_team(self, tournament, name, new_name):
+        """Reporte le renommage d'une équipe dans les matchs et les têtes de série du tableau."""
+        changed = {}
+        for match in self.by_tournament.get(tournament, {}).values():
+            for field in ("team_a", "team_b", "winner", "loser"):
+                if match[field] == name:
+                    match[field] = new_name
+                    changed[match["id"]] = match
+        info = self.info(tournament)
+        seeds = info.get("seeds") if info else None
+        with self.storage.transaction():
+            if seeds and name in seeds:
+                info["seeds"] = [new_name if seed == name else seed for seed in seeds]
+                self.tournament_config.set_bracket(tournament, info)
+            self._save(tournament, changed)
+
+    def rename_tournament(self, name, new_name):
+        matches = self.by_tournament.get(name)
+        if not matches:
+            return
+        upserts = {}
+        for match in matches.values():
+            match["tournament"] = new_name
+            upserts[self._key(new_name, match["id"])] = match
+        deletes = [self._key(name, match_id) for match_id in matches]
+        for store in (self.by_status, self.by_round):
+            for key in [key for key in store if key[0] == name]:
+                store[(new_name, key[1])] = store.pop(key)
+        self.by_tournament[new_name] = self.by_tournament.pop(name)
+        with self.storage.transaction():
+            self.storage.apply("matches", upserts=upserts, deletes=deletes)
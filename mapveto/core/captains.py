@@ -0,0 +1,84 @@
+import time
+from collections import OrderedDict, namedtuple
+
+import discord # type: ignore
+
+CaptainProfile = namedtuple("CaptainProfile", "id name display_name mention user")
+
+
+class CaptainCache:
+    """Profils des capitaines (nom, mention) indexés par ID Discord, avec TTL et éviction LRU.
+
+    `peek` ne lit que le cache du bot (aucun appel API) ; `get` retombe sur `fetch_user`
+    en cas d'absence. Le cache est préchauffé au démarrage à partir des équipes enregistrées.
+    """
+
+    def __init__(self, ttl=3600, max_size=5000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.profiles = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+
+    def _cached(self, user_id):
+        entry = self.profiles.get(user_id)
+        if entry is None:
+            return None
+        profile, expires_at = entry
+        if expires_at < time.monotonic():
+            del self.profiles[user_id]
+            return None
+        self.profiles.move_to_end(user_id)
+        return profile
+
+    def put(self, user):
+        profile = CaptainProfile(user.id, user.name, user.display_name, user.mention, user)
+        self.profiles[user.id] = (profile, time.monotonic() + self.ttl)
+        self.profiles.move_to_end(user.id)
+        while len(self.profiles) > self.max_size:
+            self.profiles.popitem(last=False)
+        return profile
+
+    def peek(self, bot, user_id):
+        """Profil depuis le cache, sinon depuis le cache du bot ; None sans appel API."""
+        profile = self._cached(user_id)
+        if profile is not None:
+            self.hits += 1
+            return profile
+        self.misses += 1
+        user = bot.get_user(user_id)
+        return self.put(user) if user is not None else None
+
+    async def get(self, bot, user_id):
+        """Profil du capitaine ; appelle `fetch_user` seulement si le bot ne le connaît pas."""
+        profile = self.peek(bot, user_id)
+        if profile is not None:
+            return profile
+        self.fetches += 1
+        try:
+            user = await bot.fetch_user(user_id)
+        except discord.HTTPException:
+            return None
+        return self.put(user)
+
+    def warm(self, bot, captain_ids):
+        """Charge en une passe les capitaines connus du bot (aucun appel API)."""
+        warmed = 0
+        for captain_id in captain_ids:
+            try:
+                user = bot.get_user(int(captain_id))
+            except (TypeError, ValueError):
+                continue
+            if user is not None:
+                self.put(user)
+                warmed += 1
+        return warmed
+
+    def invalidate(self, user_id):
+        self.profiles.pop(user_id, None)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import time
+
+from .metrics import Histogram
+from .storage import BASE_DIR
+
+HISTORY_FILENAME = "history.db"
+
+# Archive en ajout seul : un veto terminé n'est jamais modifié ni supprimé.
+# actions : une ligne par coup joué, dans l'ordre (seq), avec la map concernée (y compris pour un side).
+# veto_teams (équipe -> vetos) et veto_maps (sort de chaque map du pool) sont dénormalisées pour que
+# les recherches par équipe et les statistiques par map et par tournoi ne lisent qu'un index.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vetos (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL UNIQUE,
+    template TEXT NOT NULL,
+    tournament TEXT,
+    team_a TEXT NOT NULL,
+    team_b TEXT NOT NULL,
+    team_a_id INTEGER,
+    team_b_id INTEGER,
+    started_at REAL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_vetos_tournament ON vetos (tournament, finished_at);
+CREATE TABLE IF NOT EXISTS veto_teams (
+    team TEXT NOT NULL,
+    veto_id INTEGER NOT NULL,
+    PRIMARY KEY (team, veto_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS veto_maps (
+    veto_id INTEGER NOT NULL,
+    map TEXT NOT NULL,
+    tournament TEXT,
+    outcome TEXT,
+    team INTEGER,
+    think REAL,
+    PRIMARY KEY (veto_id, map)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_veto_maps_tournament ON veto_maps (tournament, map, outcome, think);
+CREATE INDEX IF NOT EXISTS idx_veto_maps_map ON veto_maps (map, outcome, think);
+CREATE TABLE IF NOT EXISTS actions (
+    veto_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    step INTEGER,
+    action TEXT NOT NULL,
+    map TEXT,
+    side TEXT,
+    team INTEGER,
+    user_id INTEGER,
+    at REAL,
+    think REAL,
+    timed_out INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (veto_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+class VetoHistory:
+    """Archive SQLite des vetos terminés : template, équipes, coups dans l'ordre, horodatages et temps de réflexion.
+
+    Indépendante du backend de stockage (elle ne fait que grossir) ; les recherches par équipe,
+    tournoi ou map passent par des index.
+    """
+
+    def __init__(self, directory=BASE_DIR, filename=HISTORY_FILENAME):
+        # Durée de chaque enregistrement (un veto = une transaction)
+        self.write_timings = Histogram()
+        self.path = os.path.join(directory, filename)
+        self.conn = sqlite3.connect(self.path, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def record(self, veto, tournament=None, finished_at=None):
+        """Archive un veto terminé ; retourne son ID, ou None s'il l'était déjà."""
+        finished_at = finished_at or time.time()
+        with self.write_timings.time():
+            self.conn.execute("BEGIN")
+            try:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO vetos (session_id, template, tournament, team_a, team_b, team_a_id, team_b_id, started_at, finished_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (veto.session_id, veto.name, tournament, veto.team_a_name, veto.team_b_name,
+                     veto.team_a_id, veto.team_b_id, veto.started_at, finished_at),
+                )
+                if not cursor.rowcount:
+                    self.conn.execute("ROLLBACK")
+                    return None
+                veto_id = cursor.lastrowid
+                self.conn.executemany("INSERT OR IGNORE INTO veto_teams (team, veto_id) VALUES (?, ?)",
+                                      [(veto.team_a_name, veto_id), (veto.team_b_name, veto_id)])
+                # Sort de chaque map : bannie, choisie ou DECIDER (None si la map est restée dans le pool)
+                outcomes = {move["map"]: move for move in veto.moves if move["action"] in ("ban", "pick", "decider")}
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO veto_maps (veto_id, map, tournament, outcome, team, think) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(veto_id, name, tournament, outcomes.get(name, {}).get("action"), outcomes.get(name, {}).get("team"),
+                      outcomes.get(name, {}).get("think")) for name in veto.listmaps],
+                )
+                self.conn.executemany(
+                    "INSERT INTO actions (veto_id, seq, step, action, map, side, team, user_id, at, think, timed_out)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(veto_id, seq, move.get("step"), move["action"], move.get("map"), move.get("side"), move.get("team"),
+                      move.get("user_id"), move.get("at"), move.get("think"), int(move.get("timed_out", False)))
+                     for seq, move in enumerate(veto.moves)],
+                )
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+        return veto_id
+
+    def count(self, tournament=None):
+        if tournament is None:
+            return self.conn.execute("SELECT COUNT(*) FROM vetos").fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM vetos WHERE tournament = ?", (tournament,)).fetchone()[0]
+
+    def vetos_for_team(self, team, tournament=None, limit=20):
+        """Derniers vetos joués par l'équipe (plus récents d'abord)."""
+        query = "SELECT v.* FROM veto_teams t JOIN vetos v ON v.id = t.veto_id WHERE t.team = ?"
+        params = [team]
+        if tournament is not None:
+            query += " AND v.tournament = ?"
+            params.append(tournament)
+        query += " ORDER BY v.finished_at DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self.conn.execute(query, params)]
+
+    def actions(self, veto_id):
+        """Coups d'un veto, dans l'ordre."""
+        return [dict(row) for row in self.conn.execute("SELECT * FROM actions WHERE veto_id = ? ORDER BY seq", (veto_id,))]
+
+    def map_stats(self, tournament=None, map_name=None):
+        """Par map : vetos où elle était proposée, bans, picks (hors DECIDER), decider et temps de réflexion moyen."""
+        query = (
+            # TOTAL et non SUM : une map toujours restée dans le pool (outcome NULL) compte 0, pas NULL
+            "SELECT map, COUNT(*) AS offered, CAST(TOTAL(outcome = 'ban') AS INTEGER) AS bans,"
+            " CAST(TOTAL(outcome = 'pick') AS INTEGER) AS picks, CAST(TOTAL(outcome = 'decider') AS INTEGER) AS deciders,"
+            " AVG(think) AS think FROM veto_maps"
+        )
+        where, params = [], []
+        if tournament is not None:
+            where.append("tournament = ?")
+            params.append(tournament)
+        if map_name is not None:
+            where.append("map = ?")
+            params.append(map_name)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " GROUP BY map"
+        stats = []
+        for row in self.conn.execute(query, params):
+            entry = dict(row)
+            offered = entry["offered"] or 1
+            entry["ban_rate"] = entry["bans"] / offered
+            entry["pick_rate"] = (entry["picks"] + entry["deciders"]) / offered
+            stats.append(entry)
+        stats.sort(key=lambda entry: (-entry["ban_rate"], entry["map"]))
+        return stats
+
+    def close(self):
+        self.conn.close()
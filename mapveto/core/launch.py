@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import re
+import time
+from collections import namedtuple
+
+from .metrics import log_event
+from .veto import LaunchError, open_veto_ticket
+
+# Tickets ouverts en même temps : Modmail crée un salon par ticket, et la création de salons
+# est limitée par serveur ; discord.py attend de lui-même en cas de 429
+MAX_CONCURRENT_LAUNCHES = 8
+# Intervalle (en secondes) entre deux mises à jour du message de progression
+PROGRESS_INTERVAL = 2.0
+
+# `label` identifie le match dans les comptes rendus (numéro de ligne, ou ID du match du tableau)
+Pairing = namedtuple("Pairing", "label team_a team_b")
+
+_SEPARATOR = re.compile(r"\s+(?:vs\.?|contre)\s+", re.IGNORECASE)
+
+
+def parse_pairings(text):
+    """Une rencontre par ligne (ou séparées par `;`) : « Equipe A vs Equipe B »."""
+    pairings = []
+    for number, line in enumerate(re.split(r"[\n;]", text), start=1):
+        line = line.strip().strip("`")
+        if not line:
+            continue
+        teams = _SEPARATOR.split(line)
+        if len(teams) != 2 or not all(team.strip() for team in teams):
+            raise LaunchError(f"Rencontre {number} illisible : `{line}` (attendu : `Equipe A vs Equipe B`).")
+        pairings.append(Pairing(str(number), teams[0].strip(), teams[1].strip()))
+    if not pairings:
+        raise LaunchError("Aucune rencontre à lancer.")
+    return pairings
+
+
+def check_pairings(registry, tournament, pairings):
+    """Erreurs bloquantes avant tout lancement : équipes inconnues ou hors tournoi, équipe ou capitaine en double.
+
+    Un capitaine ne peut avoir qu'un ticket ouvert : deux de ses matchs lancés en même temps se disputeraient le même thread.
+    """
+    team_config = registry.team_config
+    errors = []
+    teams = {}
+    captains = {}
+    for pairing in pairings:
+        for name in (pairing.team_a, pairing.team_b):
+            team = team_config.get_team(name)
+            if name in teams:
+                errors.append(f"`{pairing.label}` : **{name}** joue déjà la rencontre `{teams[name]}`.")
+                continue
+            teams[name] = pairing.label
+            if team is None:
+                errors.append(f"`{pairing.label}` : l'équipe **{name}** n'existe pas.")
+            elif team.get("tournament") != tournament:
+                errors.append(f"`{pairing.label}` : l'équipe **{name}** n'est pas inscrite au tournoi **{tournament}**.")
+            else:
+                captain_id = str(team["captain_discord_id"])
+                other = captains.setdefault(captain_id, (pairing.label, name))
+                if other[1] != name:
+                    errors.append(f"`{pairing.label}` : **{name}** a le même capitaine que **{other[1]}** (`{other[0]}`).")
+    return errors
+
+
+class BatchReport:
+    def __init__(self, pairings):
+        self.pairings = pairings
+        self.launched = []
+        self.failed = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def done(self):
+        return len(self.launched) + len(self.failed)
+
+    def progress(self):
+        return f"Ouverture des tickets : {self.done}/{len(self.pairings)} ({len(self.failed)} échec(s))..."
+
+    def summary(self):
+        lines = [f"{len(self.launched)}/{len(self.pairings)} ticket(s) de veto ouvert(s) en {self.elapsed:.1f} s."]
+        lines += [f"`{pairing.label}` {pairing.team_a} VS {pairing.team_b} non lancé : {message}" for pairing, message in self.failed]
+        return lines
+
+
+async def launch_batch(bot, registry, template_name, pairings, context, concurrency=MAX_CONCURRENT_LAUNCHES,
+                       on_launched=None, progress=None, progress_interval=PROGRESS_INTERVAL):
+    """Ouvre les tickets de toutes les rencontres, au plus `concurrency` à la fois.
+
+    L'échec d'une rencontre n'interrompt pas les autres : il est consigné dans le compte rendu.
+    `on_launched(pairing)` est appelé après chaque ticket ouvert ; `progress(report)` (coroutine)
+    toutes les `progress_interval` secondes tant que le lot n'est pas terminé.
+    """
+    report = BatchReport(pairings)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def launch(pairing):
+        async with semaphore:
+            try:
+                await open_veto_ticket(bot, registry, template_name, pairing.team_a, pairing.team_b, context)
+            except LaunchError as error:
+                report.failed.append((pairing, str(error)))
+            except Exception as error:
+                # Erreur imprévue (Discord, Modmail) : consignée, les autres tickets continuent
+                log_event("batch_launch_error", level=logging.ERROR, match=pairing.label, team_a=pairing.team_a, team_b=pairing.team_b, error=repr(error))
+                report.failed.append((pairing, f"erreur inattendue ({type(error).__name__})"))
+            else:
+                report.launched.append(pairing)
+                if on_launched is not None:
+                    on_launched(pairing)
+
+    async def report_progress():
+        while True:
+            await asyncio.sleep(progress_interval)
+            await progress(report)
+
+    progress_task = asyncio.create_task(report_progress()) if progress is not None else None
+    try:
+        await asyncio.gather(*(launch(pairing) for pairing in pairings))
+    finally:
+        if progress_task is not None:
+            progress_task.cancel()
+    report.elapsed = time.perf_counter() - report.started
+
+    log_event("batch_launched", level=logging.INFO if not report.failed else logging.WARNING, template=template_name,
+              matches=len(pairings), launched=len(report.launched), failed=len(report.failed), concurrency=concurrency,
+              elapsed_ms=round(report.elapsed * 1000, 1))
+    return report
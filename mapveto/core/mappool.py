@@ -0,0 +1,66 @@
+class MapPool:
+    """État du pool de maps d'un veto : masques de bits sur la liste des maps du template.
+
+    Le bit i correspond à listmaps[i]. L'historique garde l'ordre des actions sous forme
+    d'entiers (index pour un ban, -index - 1 pour un pick), ce qui suffit à tout reconstruire.
+    """
+
+    def __init__(self, listmaps):
+        self.listmaps = tuple(listmaps)
+        self.index = {name: i for i, name in enumerate(self.listmaps)}
+        self.full_mask = (1 << len(self.listmaps)) - 1
+        self.banned_mask = 0
+        self.picked_mask = 0
+        self.history = []
+
+    @property
+    def available_mask(self):
+        return self.full_mask & ~(self.banned_mask | self.picked_mask)
+
+    def is_available(self, map_name):
+        i = self.index.get(map_name)
+        return i is not None and bool(self.available_mask >> i & 1)
+
+    def ban(self, map_name):
+        if not self.is_available(map_name):
+            return False
+        i = self.index[map_name]
+        self.banned_mask |= 1 << i
+        self.history.append(i)
+        return True
+
+    def pick(self, map_name):
+        if not self.is_available(map_name):
+            return False
+        i = self.index[map_name]
+        self.picked_mask |= 1 << i
+        self.history.append(-i - 1)
+        return True
+
+    def remaining_count(self):
+        return bin(self.available_mask).count("1")
+
+    def remaining(self):
+        mask = self.available_mask
+        return [name for i, name in enumerate(self.listmaps) if mask >> i & 1]
+
+    @property
+    def banned_maps(self):
+        return [self.listmaps[i] for i in self.history if i >= 0]
+
+    @property
+    def picked_maps(self):
+        return [self.listmaps[-i - 1] for i in self.history if i < 0]
+
+    def snapshot(self):
+        return list(self.history)
+
+    @classmethod
+    def restore(cls, listmaps, history):
+        pool = cls(listmaps)
+        for i in history:
+            if i >= 0:
+                pool.ban(pool.listmaps[i])
+            else:
+                pool.pick(pool.listmaps[-i - 1])
+        return pool
@@ -0,0 +1,202 @@
+import asyncio
+import bisect
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from core.models import getLogger # type: ignore
+
+logger = getLogger("mapveto")
+
+# Fichier texte au format Prometheus (à lire par le collecteur « textfile » de node_exporter)
+METRICS_FILE = os.environ.get("MAPVETO_METRICS_FILE", os.path.join(os.path.dirname(__file__), "..", "mapveto.prom"))
+METRICS_INTERVAL = float(os.environ.get("MAPVETO_METRICS_INTERVAL", "60"))
+
+# Bornes des histogrammes de durée (secondes)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    text = str(value)
+    if not text or any(char in text for char in ' "=\n'):
+        text = '"' + text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+    return text
+
+
+def log_event(event, level=logging.INFO, **fields):
+    """Journalise un événement au format clé=valeur (`event=... session_id=...`)."""
+    if not logger.isEnabledFor(level):
+        return
+    parts = [f"event={event}"] + [f"{key}={_format_value(value)}" for key, value in fields.items() if value is not None]
+    logger.log(level, " ".join(parts))
+
+
+class Histogram:
+    """Répartition de durées par tranches cumulées, comme un histogramme Prometheus."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """Borne supérieure de la tranche contenant le quantile `q` (le maximum pour la dernière)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+def format_histogram(label, histogram):
+    """Résumé d'un histogramme sur une ligne (durées en millisecondes)."""
+    if not histogram.count:
+        return f"{label} : aucune mesure"
+    return (
+        f"{label} : {histogram.count} mesure(s), moyenne {histogram.mean * 1000:.1f} ms, "
+        f"p95 ≤ {histogram.quantile(0.95) * 1000:.1f} ms, max {histogram.max * 1000:.1f} ms"
+    )
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _render_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+class Metrics:
+    """Compteurs, histogrammes et jauges du plugin, exportés au format Prometheus.
+
+    Les durées et compteurs d'opérations sont poussés par le code (`inc`, `observe`) ;
+    les valeurs déjà tenues par les composants (sessions, file d'envoi, caches, minuteur)
+    sont lues à l'export par les fonctions enregistrées avec `register`.
+    """
+
+    def __init__(self):
+        self.counters = Counter()
+        self.histograms = {}
+        self.collectors = {}
+        self.help = {}
+        self._task = None
+
+    def inc(self, name, amount=1, **labels):
+        self.counters[(name, _labels(labels))] += amount
+
+    def histogram(self, name, **labels):
+        key = (name, _labels(labels))
+        if key not in self.histograms:
+            self.histograms[key] = Histogram()
+        return self.histograms[key]
+
+    def add_histogram(self, name, histogram, **labels):
+        """Expose un histogramme tenu par un composant (par exemple le stockage)."""
+        self.histograms[(name, _labels(labels))] = histogram
+
+    def observe(self, name, value, **labels):
+        self.histogram(name, **labels).observe(value)
+
+    def register(self, name, kind, collect, help=""):
+        """`collect()` retourne une valeur, ou un dict {(("label", "valeur"), ...): valeur}."""
+        self.collectors[name] = (kind, collect)
+        if help:
+            self.help[name] = help
+
+    def describe(self, name, help):
+        self.help[name] = help
+
+    def counter_total(self, name):
+        return sum(value for (counter, _), value in self.counters.items() if counter == name)
+
+    def histograms_named(self, name):
+        return [(labels, histogram) for (histogram_name, labels), histogram in self.histograms.items() if histogram_name == name]
+
+    def _header(self, lines, name, kind):
+        if name in self.help:
+            lines.append(f"# HELP {name} {self.help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def render(self):
+        """Texte au format d'exposition Prometheus."""
+        lines = []
+        for name in sorted({name for name, _ in self.counters}):
+            self._header(lines, name, "counter")
+            for (counter, labels), value in sorted(self.counters.items()):
+                if counter == name:
+                    lines.append(f"{name}{_render_labels(labels)} {value}")
+
+        for name, (kind, collect) in sorted(self.collectors.items()):
+            values = collect()
+            self._header(lines, name, kind)
+            if not isinstance(values, dict):
+                values = {(): values}
+            for labels, value in values.items():
+                lines.append(f"{name}{_render_labels(labels)} {value}")
+
+        for name in sorted({name for name, _ in self.histograms}):
+            self._header(lines, name, "histogram")
+            for labels, histogram in self.histograms_named(name):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_render_labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_bucket{_render_labels(labels, [('le', '+Inf')])} {histogram.count}")
+                lines.append(f"{name}_sum{_render_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_render_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=METRICS_FILE):
+        # Écriture atomique : le collecteur ne lit jamais un fichier à moitié écrit
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as file:
+            file.write(self.render())
+        os.replace(tmp_path, path)
+
+    def start_export(self, path=METRICS_FILE, interval=METRICS_INTERVAL):
+        """Réécrit le fichier Prometheus toutes les `interval` secondes (0 pour désactiver)."""
+        if self._task is not None or interval <= 0:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._export_loop(path, interval))
+
+    async def _export_loop(self, path, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.write(path)
+            except OSError as error:
+                log_event("metrics_write_failed", level=logging.WARNING, path=path, error=error)
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
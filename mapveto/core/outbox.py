@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from collections import deque
+
+from .metrics import log_event
+
+
+def _format_key(key):
+    # ("dm", 1234) -> dm:1234 ; un ID de salon reste tel quel
+    return ":".join(map(str, key)) if isinstance(key, tuple) else str(key)
+
+
+def _retrieve_exception(future):
+    # Les envois « fire-and-forget » ne lisent jamais leur future : l'échec est déjà journalisé
+    # par le worker, on évite « Future exception was never retrieved » à la collecte.
+    if not future.cancelled():
+        future.exception()
+
+
+class MessageQueue:
+    """File d'envoi des messages Discord (réponses de thread, DMs, éditions).
+
+    Les envois d'une même clé (un salon, un DM) partent dans l'ordre de soumission ;
+    les clés différentes partent en parallèle, avec au plus `concurrency` requêtes en vol.
+    Une réponse 429 suspend tous les envois pendant le délai indiqué puis l'envoi est retenté.
+    La file ne dépend que d'objets exposant `status` / `retry_after`, ce qui permet de la
+    tester avec un faux client.
+    """
+
+    def __init__(self, concurrency=5, max_retries=3, base_delay=1.0):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self._semaphore = None
+        self._queues = {}
+        self._workers = {}
+        self._resume_at = 0.0
+        self.sent = 0
+        self.retries = 0
+        self.failures = 0
+
+    def submit(self, key, send):
+        """Ajoute un envoi à la file. `send` est une fonction sans argument retournant un awaitable.
+
+        Retourne un future résolu avec le résultat de l'envoi. L'appelant peut l'ignorer :
+        un échec est journalisé par la file et l'exception du future est récupérée.
+        """
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        future = loop.create_future()
+        future.add_done_callback(_retrieve_exception)
+        self._queues.setdefault(key, deque()).append((send, future))
+        if key not in self._workers:
+            self._workers[key] = loop.create_task(self._worker(key))
+        return future
+
+    @property
+    def pending(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def _worker(self, key):
+        queue = self._queues[key]
+        try:
+            while queue:
+                send, future = queue.popleft()
+                try:
+                    result = await self._send(send)
+                except Exception as error:
+                    self.failures += 1
+                    log_event("outbox_send_failed", level=logging.WARNING, key=_format_key(key),
+                              status=getattr(error, "status", None), error=repr(error))
+                    if not future.done():
+                        future.set_exception(error)
+                else:
+                    self.sent += 1
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            del self._workers[key]
+            if not queue:
+                self._queues.pop(key, None)
+
+    async def _send(self, send):
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                delay = self._resume_at - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    return await send()
+                except Exception as error:
+                    if getattr(error, "status", None) != 429 or attempt >= self.max_retries:
+                        raise
+                    retry_after = getattr(error, "retry_after", None) or self.base_delay * 2 ** attempt
+                    # Rate limit : tous les envois attendent avant de repartir
+                    self._resume_at = max(self._resume_at, loop.time() + retry_after)
+                    attempt += 1
+                    self.retries += 1
+
+    async def drain(self, timeout=None, key=None):
+        """Attend la fin de tous les envois en attente, ou seulement de ceux de `key`."""
+        if key is not None:
+            workers = [self._workers[key]] if key in self._workers else []
+        else:
+            workers = list(self._workers.values())
+        if workers:
+            await asyncio.wait(workers, timeout=timeout)
+
+    def close(self):
+        for task in self._workers.values():
+            task.cancel()
@@ -0,0 +1,191 @@
+import abc
+import bisect
+
+import discord # type: ignore
+from discord.ui import Button, Modal, Select, TextInput, View # type: ignore
+
+# Une liste déroulante Discord contient au plus 25 options
+PAGE_SIZE = 25
+
+
+class SortedNames:
+    """Noms triés sans tenir compte de la casse, pour paginer et chercher par préfixe.
+
+    Les configurations tiennent cet index à jour à chaque création, suppression ou
+    renommage ; une page se lit alors par tranche sans reconstruire la liste complète.
+    """
+
+    def __init__(self, names=()):
+        self.keys = sorted((name.casefold(), name) for name in names)
+
+    def add(self, name):
+        key = (name.casefold(), name)
+        i = bisect.bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            self.keys.insert(i, key)
+
+    def discard(self, name):
+        key = (name.casefold(), name)
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return (name for _, name in self.keys)
+
+    def __contains__(self, name):
+        key = (name.casefold(), name)
+        i = bisect.bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def slice(self, start, stop):
+        return [name for _, name in self.keys[start:stop]]
+
+    def prefix_range(self, prefix):
+        """Bornes [début, fin) des noms commençant par `prefix`."""
+        prefix = prefix.casefold()
+        start = bisect.bisect_left(self.keys, (prefix,))
+        stop = bisect.bisect_left(self.keys, (prefix + "\U0010ffff",))
+        return start, stop
+
+
+class PagedSelect(View, metaclass=abc.ABCMeta):
+    """Liste déroulante paginée avec boutons précédent / suivant et recherche par préfixe.
+
+    Classe abstraite : les sous-classes définissent `on_select(interaction, values)`, appelée une fois la
+    sélection complète sans avoir répondu à l'interaction. Avec `max_values > 1`, les choix
+    s'accumulent d'une page à l'autre jusqu'à atteindre `max_values`.
+
+    `names` est un SortedNames, ou une fonction qui le retourne : elle est relue à chaque
+    affichage, ce qui suit les index reconstruits par la configuration pendant que la vue est ouverte.
+    """
+
+    def __init__(self, names, placeholder, prompt="", max_values=1, page_size=PAGE_SIZE, timeout=180):
+        super().__init__(timeout=timeout)
+        self._names = names
+        self.placeholder = placeholder
+        self.prompt = prompt
+        self.max_values = max_values
+        self.page_size = page_size
+        self.page = 0
+        self.prefix = None
+        self.chosen = []
+        self.render()
+
+    @property
+    def names(self):
+        return self._names() if callable(self._names) else self._names
+
+    def describe(self, name):
+        """Description affichée sous une option ; aucune par défaut."""
+        return None
+
+    @abc.abstractmethod
+    async def on_select(self, interaction: discord.Interaction, values):
+        """Sélection terminée : `values` contient les `max_values` noms choisis."""
+
+    def bounds(self):
+        if self.prefix:
+            return self.names.prefix_range(self.prefix)
+        return 0, len(self.names)
+
+    @property
+    def page_count(self):
+        start, stop = self.bounds()
+        return max(1, -(-(stop - start) // self.page_size))
+
+    def render(self):
+        self.clear_items()
+        start, stop = self.bounds()
+        self.page = min(self.page, self.page_count - 1)
+        first = start + self.page * self.page_size
+        page_names = [name for name in self.names.slice(first, min(first + self.page_size, stop)) if name not in self.chosen]
+
+        if page_names:
+            options = [discord.SelectOption(label=name, value=name, description=self.describe(name)) for name in page_names]
+            needed = self.max_values - len(self.chosen)
+            self.add_item(_PageSelect(self.placeholder, options, min(needed, len(options))))
+        if self.page_count > 1:
+            self.add_item(_PageButton("◀", self.previous_page, disabled=self.page == 0))
+            self.add_item(_PageButton("▶", self.next_page, disabled=self.page >= self.page_count - 1))
+        self.add_item(_PageButton("Rechercher", self.open_search))
+        if self.prefix or self.chosen:
+            self.add_item(_PageButton("Réinitialiser", self.reset, style=discord.ButtonStyle.secondary))
+
+    @property
+    def content(self):
+        lines = [self.prompt] if self.prompt else []
+        if self.chosen:
+            lines.append(f"Sélection : {', '.join(self.chosen)} ({len(self.chosen)}/{self.max_values})")
+        if self.prefix:
+            start, stop = self.bounds()
+            lines.append(f"Recherche « {self.prefix} » : {stop - start} résultat(s)")
+        lines.append(f"*Page {self.page + 1}/{self.page_count}*")
+        return "\n".join(lines)
+
+    async def send(self, interaction: discord.Interaction):
+        await interaction.response.send_message(self.content, view=self, ephemeral=True)
+
+    async def refresh(self, interaction: discord.Interaction):
+        self.render()
+        await interaction.response.edit_message(content=self.content, view=self)
+
+    async def previous_page(self, interaction: discord.Interaction):
+        self.page = max(0, self.page - 1)
+        await self.refresh(interaction)
+
+    async def next_page(self, interaction: discord.Interaction):
+        self.page += 1
+        await self.refresh(interaction)
+
+    async def open_search(self, interaction: discord.Interaction):
+        await interaction.response.send_modal(PrefixSearchModal(self))
+
+    async def search(self, interaction: discord.Interaction, prefix):
+        self.prefix = prefix or None
+        self.page = 0
+        await self.refresh(interaction)
+
+    async def reset(self, interaction: discord.Interaction):
+        self.prefix = None
+        self.chosen = []
+        self.page = 0
+        await self.refresh(interaction)
+
+    async def select(self, interaction: discord.Interaction, values):
+        self.chosen.extend(value for value in values if value not in self.chosen)
+        if len(self.chosen) >= self.max_values:
+            await self.on_select(interaction, list(self.chosen))
+            return
+        await self.refresh(interaction)
+
+
+class _PageSelect(Select):
+    def __init__(self, placeholder, options, max_values):
+        super().__init__(placeholder=placeholder, min_values=1, max_values=max_values, options=options)
+
+    async def callback(self, interaction: discord.Interaction):
+        await self.view.select(interaction, self.values)
+
+
+class _PageButton(Button):
+    def __init__(self, label, action, disabled=False, style=discord.ButtonStyle.primary):
+        super().__init__(label=label, style=style, disabled=disabled)
+        self.action = action
+
+    async def callback(self, interaction: discord.Interaction):
+        await self.action(interaction)
+
+
+class PrefixSearchModal(Modal):
+    def __init__(self, paged_select):
+        super().__init__(title="Rechercher")
+        self.paged_select = paged_select
+        self.prefix = TextInput(label="Début du nom", placeholder="Laisser vide pour tout afficher", required=False, default=paged_select.prefix)
+        self.add_item(self.prefix)
+
+    async def on_submit(self, interaction: discord.Interaction):
+        await self.paged_select.search(interaction, self.prefix.value.strip())
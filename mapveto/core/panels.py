@@ -0,0 +1,80 @@
+import json
+import os
+
+from .storage import BASE_DIR
+
+# Panneaux gérés par le plugin
+SETUP_PANEL = "setup"
+TEMPLATES_PANEL = "templates"
+TOURNAMENTS_PANEL = "tournaments"
+TEAMS_PANEL = "teams"
+VETO_PANEL = "veto"
+
+LEGACY_FILE = os.path.join(BASE_DIR, "message_id.json")
+# Entrées importées de l'ancien fichier, sans serveur connu : rattachées au premier serveur qui les utilise
+LEGACY_GUILD_ID = 0
+
+
+class PanelRegistry:
+    """Messages des panneaux du plugin, par serveur et par panneau.
+
+    Les identifiants sont chargés une fois depuis le stockage (table "panels") et servis
+    depuis la mémoire ; seules les modifications sont écrites, de façon atomique par le stockage.
+    """
+
+    def __init__(self, storage, legacy_file=LEGACY_FILE):
+        self.storage = storage
+        self.panels = {}
+        for entry in storage.load("panels").values():
+            self.panels[(entry["guild_id"], entry["panel"])] = entry
+        if not self.panels and legacy_file and os.path.exists(legacy_file):
+            self.migrate_legacy(legacy_file)
+
+    @staticmethod
+    def _key(guild_id, panel):
+        return f"{guild_id}:{panel}"
+
+    def migrate_legacy(self, legacy_file):
+        """Importe les clés de l'ancien message_id.json puis le renomme pour ne pas le relire."""
+        with open(legacy_file, "r") as f:
+            data = json.load(f)
+
+        # L'ancien fichier partageait "setup_message_id" entre les trois panneaux de configuration :
+        # il est rattaché aux templates, les autres panneaux seront renvoyés au prochain clic.
+        legacy = (
+            (SETUP_PANEL, data.get("setup_button_channel_id"), data.get("setup_button_message_id")),
+            (TEMPLATES_PANEL, None, data.get("setup_message_id")),
+            (VETO_PANEL, None, data.get("setup_veto_message_id")),
+        )
+        with self.storage.transaction():
+            for panel, channel_id, message_id in legacy:
+                if message_id:
+                    self.set(LEGACY_GUILD_ID, panel, channel_id, message_id)
+        os.replace(legacy_file, legacy_file + ".migrated")
+
+    def get(self, guild_id, panel):
+        entry = self.panels.get((guild_id, panel))
+        if entry is None:
+            legacy = self.panels.get((LEGACY_GUILD_ID, panel))
+            if legacy is not None and guild_id != LEGACY_GUILD_ID:
+                self.remove(LEGACY_GUILD_ID, panel)
+                entry = self.set(guild_id, panel, legacy["channel_id"], legacy["message_id"])
+        return entry
+
+    def message_id(self, guild_id, panel):
+        entry = self.get(guild_id, panel)
+        return entry["message_id"] if entry else None
+
+    def set(self, guild_id, panel, channel_id, message_id):
+        entry = {"guild_id": guild_id, "panel": panel, "channel_id": channel_id, "message_id": message_id}
+        self.panels[(guild_id, panel)] = entry
+        self.storage.upsert("panels", self._key(guild_id, panel), entry)
+        return entry
+
+    def remove(self, guild_id, panel):
+        if self.panels.pop((guild_id, panel), None) is not None:
+            self.storage.delete("panels", self._key(guild_id, panel))
+
+    def entries(self, panel):
+        """Panneaux d'un type donné, tous serveurs confondus."""
+        return [entry for (_, name), entry in self.panels.items() if name == panel]
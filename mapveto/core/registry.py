@@ -0,0 +1,92 @@
+from .brackets import BracketConfig
+from .captains import CaptainCache
+from .history import VetoHistory
+from .metrics import Metrics
+from .outbox import MessageQueue
+from .panels import LEGACY_FILE, PanelRegistry
+from .sessions import VetoSessionManager
+from .storage import close_storage, open_storage
+from .threads import ThreadCache
+from .templateveto import MapVetoConfig
+from .tournament import TournamentConfig
+from .teams import TeamConfig
+
+
+class MapVetoRegistry:
+    """Configurations partagées par le cog et tous les composants d'interface.
+
+    Une seule instance est créée par MapVetoCog ; les vues, boutons et modales
+    la reçoivent à leur construction au lieu de relire les fichiers eux-mêmes.
+    """
+
+    def __init__(self, storage=None, legacy_panels=LEGACY_FILE, history=None):
+        self.storage = storage or open_storage()
+        self.veto_config = MapVetoConfig(self.storage)
+        self.tournament_config = TournamentConfig(self.storage)
+        self.team_config = TeamConfig(self.storage)
+        self.brackets = BracketConfig(self.storage, self.tournament_config)
+        self.sessions = VetoSessionManager(self.storage)
+        # Messages des panneaux par serveur (remplace message_id.json, sauf si legacy_panels est None)
+        self.panels = PanelRegistry(self.storage, legacy_panels)
+        # File d'envoi des réponses de thread et des DMs
+        self.outbox = MessageQueue()
+        self.threads = ThreadCache()
+        self.captains = CaptainCache()
+        # Archive des vetos terminés (SQLite, quel que soit le backend de stockage)
+        self.history = history or VetoHistory()
+        self.metrics = Metrics()
+        self.register_metrics()
+
+    def register_metrics(self):
+        """Expose l'état des composants partagés ; lu à chaque export des métriques."""
+        metrics = self.metrics
+        sessions, outbox = self.sessions, self.outbox
+        metrics.register("mapveto_active_sessions", "gauge", lambda: {
+            (("state", "running"),): sum(1 for veto in sessions if not veto.paused),
+            (("state", "paused"),): sum(1 for veto in sessions if veto.paused),
+        }, "Vetos en cours")
+        metrics.register("mapveto_turn_timers", "gauge", lambda: len(sessions.timers), "Délais de tour armés")
+        metrics.register("mapveto_turn_timeouts_total", "counter", lambda: sessions.timers.expired, "Délais de tour expirés")
+        metrics.register("mapveto_outbox_pending", "gauge", lambda: outbox.pending, "Envois en attente dans la file")
+        metrics.register("mapveto_discord_requests_total", "counter", lambda: {
+            (("kind", "sent"),): outbox.sent,
+            (("kind", "rate_limited"),): outbox.retries,
+            (("kind", "failed"),): outbox.failures,
+            (("kind", "fetch_user"),): self.captains.fetches,
+        }, "Requêtes Discord passées par la file d'envoi et le cache des capitaines")
+        metrics.register("mapveto_modmail_lookups_total", "counter", lambda: self.threads.misses, "Recherches de thread transmises à Modmail")
+        metrics.register("mapveto_cache_hits_total", "counter", lambda: {
+            (("cache", "threads"),): self.threads.hits,
+            (("cache", "captains"),): self.captains.hits,
+        })
+        metrics.register("mapveto_cache_misses_total", "counter", lambda: {
+            (("cache", "threads"),): self.threads.misses,
+            (("cache", "captains"),): self.captains.misses,
+        })
+
+        backend = getattr(self.storage, "backend", self.storage)
+        metrics.add_histogram("mapveto_storage_write_seconds", backend.write_timings, backend=backend.name)
+        if hasattr(self.storage, "flush_timings"):
+            metrics.add_histogram("mapveto_storage_flush_seconds", self.storage.flush_timings)
+        metrics.add_histogram("mapveto_history_write_seconds", self.history.write_timings)
+        metrics.register("mapveto_history_vetos", "gauge", self.history.count, "Vetos archivés")
+        metrics.describe("mapveto_history_write_seconds", "Durée de l'archivage d'un veto terminé")
+        metrics.describe("mapveto_storage_write_seconds", "Durée des écritures du backend (fichier JSON ou COMMIT SQLite)")
+        metrics.describe("mapveto_storage_flush_seconds", "Durée des flushs des écritures en tampon")
+        metrics.describe("mapveto_turn_seconds", "Durée de traitement d'un tour (clic ou délai expiré)")
+        metrics.describe("mapveto_launch_seconds", "Durée d'ouverture d'un ticket de veto")
+        metrics.describe("mapveto_launch_stage_seconds", "Durée de chaque étape de l'ouverture d'un ticket")
+
+    def warm_captains(self, bot):
+        """Précharge les profils de tous les capitaines enregistrés ; retourne le nombre chargé."""
+        return self.captains.warm(bot, self.team_config.teams_by_captain)
+
+    def flush(self):
+        self.storage.flush()
+
+    def close(self):
+        self.metrics.close()
+        self.sessions.timers.close()
+        self.outbox.close()
+        self.history.close()
+        close_storage(self.storage)
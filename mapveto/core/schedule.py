@@ -0,0 +1,88 @@
+from collections import namedtuple
+
+ACTIONS = {"Ban", "Pick", "Side"}
+CONTINUE = "Continue"
+# Une vue Discord contient au plus 25 boutons
+MAX_MAPS = 25
+
+# Actions possibles à l'expiration du délai d'un tour
+TIMEOUT_ACTIONS = ("random", "pause")
+DEFAULT_TIMEOUT_ACTION = "random"
+
+# team vaut 0 pour l'équipe qui commence le veto, 1 pour l'autre
+Step = namedtuple("Step", "index action team")
+
+
+class InvalidTemplateError(ValueError):
+    pass
+
+
+def compile_schedule(maps, rules):
+    """Compile les règles d'un template en une suite figée d'étapes (index, action, équipe).
+
+    Après chaque action la main passe à l'autre équipe, sauf si l'action est suivie
+    d'un ou plusieurs "Continue" : la même équipe rejoue alors l'étape suivante.
+    """
+    if not maps:
+        raise InvalidTemplateError("Le template doit contenir au moins une map.")
+    if len(maps) > MAX_MAPS:
+        raise InvalidTemplateError(f"Le template ne peut pas contenir plus de {MAX_MAPS} maps.")
+    if len(set(maps)) != len(maps):
+        raise InvalidTemplateError("Le template contient plusieurs fois la même map.")
+    if not rules:
+        raise InvalidTemplateError("Le template doit contenir au moins une règle.")
+
+    unknown = [rule for rule in rules if rule not in ACTIONS and rule != CONTINUE]
+    if unknown:
+        raise InvalidTemplateError(
+            f"Règle(s) inconnue(s) : {', '.join(unknown)}. Utilisez Ban, Pick, Side ou Continue (Respectez les majuscules)."
+        )
+    if rules[0] == CONTINUE:
+        raise InvalidTemplateError("Le template ne peut pas commencer par 'Continue'.")
+
+    steps = []
+    team = 0
+    removed = 0
+    picked = False
+    for position, rule in enumerate(rules):
+        if rule == CONTINUE:
+            continue
+        if rule == "Side":
+            # Le side se choisit sur la dernière map choisie ou sur la map restante (DECIDER) ; le DECIDER
+            # n'est désigné qu'après le Ban/Pick qui ne laisse qu'une map, jamais avant le premier tour
+            if not picked and (removed == 0 or removed < len(maps) - 1):
+                raise InvalidTemplateError(f"La règle Side n°{position + 1} n'a aucune map sur laquelle s'appliquer.")
+        else:
+            removed += 1
+            if removed > len(maps) - 1:
+                raise InvalidTemplateError(
+                    f"Trop de Ban/Pick pour {len(maps)} maps : la dernière map restante est choisie automatiquement (DECIDER)."
+                )
+            picked = picked or rule == "Pick"
+        steps.append(Step(len(steps), rule, team))
+        next_is_continue = position + 1 < len(rules) and rules[position + 1] == CONTINUE
+        if not next_is_continue:
+            team = 1 - team
+
+    return tuple(steps)
+
+
+def parse_turn_timer(turn_timeout, timeout_action):
+    """Valide les champs de délai d'un template saisis dans une modale.
+
+    Retourne (délai en secondes ou None, action ou None) ; un délai vide désactive le minuteur.
+    """
+    turn_timeout = (turn_timeout or "").strip()
+    timeout_action = (timeout_action or "").strip().lower()
+    if not turn_timeout:
+        return None, None
+    try:
+        seconds = int(turn_timeout)
+    except ValueError:
+        raise InvalidTemplateError("Le délai par tour doit être un nombre entier de secondes.")
+    if seconds <= 0:
+        raise InvalidTemplateError("Le délai par tour doit être positif.")
+    timeout_action = timeout_action or DEFAULT_TIMEOUT_ACTION
+    if timeout_action not in TIMEOUT_ACTIONS:
+        raise InvalidTemplateError(f"Action au délai inconnue : {timeout_action}. Utilisez {' ou '.join(TIMEOUT_ACTIONS)}.")
+    return seconds, timeout_action
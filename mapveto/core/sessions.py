@@ -0,0 +1,98 @@
+import re
+import time
+
+from .timers import TurnTimerWheel
+
+
+class VetoSessionManager:
+    """Vetos en cours, indexés par identifiant de session, par salon de ticket et par capitaine.
+
+    Le gestionnaire porte aussi les délais de tour de tous les vetos (un seul planificateur).
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.sessions = {}
+        self.by_channel = {}
+        self.by_captain = {}
+        self.timers = TurnTimerWheel(self._turn_expired)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __iter__(self):
+        return iter(self.sessions.values())
+
+    def add(self, veto):
+        self.sessions[veto.session_id] = veto
+        if veto.channel is not None:
+            self.by_channel[veto.channel.id] = veto.session_id
+        for captain_id in veto.participants:
+            self.by_captain[captain_id] = veto.session_id
+        if veto.turn_deadline is not None and not veto.paused:
+            # Veto restauré : le tour reprend avec le temps qu'il lui restait
+            self.timers.schedule(veto.session_id, veto.turn_deadline - time.time(), veto.current_action)
+        self.journal(veto)
+        return veto.session_id
+
+    def remove(self, veto):
+        if self.sessions.pop(veto.session_id, None) is None:
+            return
+        self.timers.cancel(veto.session_id)
+        if veto.channel is not None and self.by_channel.get(veto.channel.id) == veto.session_id:
+            del self.by_channel[veto.channel.id]
+        for captain_id in veto.participants:
+            if self.by_captain.get(captain_id) == veto.session_id:
+                del self.by_captain[captain_id]
+        self.storage.delete("vetos", veto.session_id)
+
+    def get(self, session_id):
+        return self.sessions.get(session_id)
+
+    def get_by_channel(self, channel_id):
+        return self.sessions.get(self.by_channel.get(channel_id))
+
+    def get_by_captain(self, captain_id):
+        return self.sessions.get(self.by_captain.get(captain_id))
+
+    def resolve(self, target=None, channel=None):
+        """Retrouve un veto à partir d'un ID de session, d'une mention/ID de salon ou du salon courant."""
+        if target:
+            if target in self.sessions:
+                return self.sessions[target]
+            match = re.fullmatch(r"<#(\d+)>|(\d+)", target)
+            if match:
+                return self.get_by_channel(int(match.group(1) or match.group(2)))
+            return None
+        if channel is not None:
+            return self.get_by_channel(channel.id)
+        return None
+
+    def arm(self, veto):
+        """Démarre le délai du tour en cours si le template en définit un."""
+        if not veto.turn_timeout or veto.paused or veto.stopped or veto.current_action_type() is None:
+            self.disarm(veto)
+            return
+        veto.turn_deadline = time.time() + veto.turn_timeout
+        self.timers.schedule(veto.session_id, veto.turn_timeout, veto.current_action)
+
+    def disarm(self, veto):
+        veto.turn_deadline = None
+        self.timers.cancel(veto.session_id)
+
+    async def _turn_expired(self, session_id, step):
+        veto = self.sessions.get(session_id)
+        # Le tour a pu être joué entre-temps : seule l'échéance du tour en cours compte
+        if veto is not None and veto.current_action == step:
+            await veto.turn_timed_out()
+
+    def journal(self, veto):
+        """Enregistre l'état du veto pour pouvoir le reprendre après un redémarrage."""
+        if veto.stopped:
+            self.remove(veto)
+        elif veto.session_id in self.sessions:
+            self.storage.upsert("vetos", veto.session_id, veto.to_dict())
+
+    def saved_sessions(self):
+        """Vetos en cours enregistrés lors de la dernière exécution."""
+        return self.storage.load("vetos")
@@ -0,0 +1,387 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+
+from .metrics import Histogram, log_event
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), '..')
+
+# Tables gérées par le stockage et colonnes indexées côté SQLite
+TABLES = {
+    "templates": (),
+    "tournaments": (),
+    "teams": ("tournament", "captain_discord_id"),
+    "vetos": ("template", "channel_id"),
+    "panels": ("guild_id",),
+    "matches": ("tournament", "status"),
+}
+
+# Fichiers utilisés par le backend JSON (noms historiques conservés)
+JSON_FILES = {
+    "templates": "vetos.json",
+    "tournaments": "tourney.json",
+    "teams": "teams.json",
+    "vetos": "running_vetos.json",
+    "panels": "panels.json",
+    "matches": "matches.json",
+}
+
+DEFAULT_BACKEND = os.environ.get("MAPVETO_STORAGE", "sqlite")
+# Intervalle (en secondes) du write-behind ; 0 pour écrire immédiatement
+DEFAULT_FLUSH_INTERVAL = float(os.environ.get("MAPVETO_FLUSH_INTERVAL", "1.0"))
+SQLITE_FILENAME = "mapveto.db"
+
+
+def _index_value(data, column):
+    value = data.get(column) if isinstance(data, dict) else None
+    return None if value is None else str(value)
+
+
+class JSONStorage:
+    """Backend de compatibilité : une table = un fichier JSON."""
+
+    name = "json"
+
+    def __init__(self, directory=BASE_DIR):
+        self.directory = directory
+        # Durée de chaque réécriture de fichier
+        self.write_timings = Histogram()
+        self._tables = {}
+        self._pending = set()
+        self._depth = 0
+
+    def _path(self, table):
+        return os.path.join(self.directory, JSON_FILES[table])
+
+    def _table(self, table):
+        if table not in self._tables:
+            path = self._path(table)
+            if os.path.exists(path):
+                with open(path, "r") as file:
+                    self._tables[table] = json.load(file)
+            else:
+                self._tables[table] = {}
+        return self._tables[table]
+
+    def _write(self, table):
+        # Écriture atomique : fichier temporaire, fsync puis rename
+        path = self._path(table)
+        tmp_path = path + ".tmp"
+        with self.write_timings.time():
+            with open(tmp_path, "w") as file:
+                json.dump(self._tables[table], file, indent=4)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, path)
+
+    def load(self, table):
+        return dict(self._table(table))
+
+    def query(self, table, **filters):
+        return {
+            key: data for key, data in self._table(table).items()
+            if all(_index_value(data, column) == str(value) for column, value in filters.items())
+        }
+
+    def apply(self, table, upserts=None, deletes=()):
+        rows = self._table(table)
+        for key in deletes:
+            rows.pop(key, None)
+        if upserts:
+            rows.update(upserts)
+        if self._depth:
+            self._pending.add(table)
+        else:
+            self._write(table)
+
+    def upsert(self, table, key, data):
+        self.apply(table, upserts={key: data})
+
+    def delete(self, table, key):
+        self.apply(table, deletes=(key,))
+
+    def replace(self, table, rows):
+        self._tables[table] = dict(rows)
+        self.apply(table)
+
+    @contextmanager
+    def transaction(self):
+        """Regroupe les écritures : chaque fichier touché n'est réécrit qu'une fois."""
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                pending, self._pending = self._pending, set()
+                for table in pending:
+                    self._write(table)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteStorage:
+    """Backend SQLite embarqué, une ligne par entrée et des index sur les colonnes de recherche."""
+
+    name = "sqlite"
+
+    def __init__(self, directory=BASE_DIR, filename=SQLITE_FILENAME):
+        # Durée de chaque COMMIT
+        self.write_timings = Histogram()
+        self.path = os.path.join(directory, filename)
+        self.conn = sqlite3.connect(self.path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._depth = 0
+        self._create_schema()
+
+    def _create_schema(self):
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        for table, columns in TABLES.items():
+            extra = "".join(f", {column} TEXT" for column in columns)
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, data TEXT NOT NULL{extra})")
+            for column in columns:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})")
+
+    def load(self, table):
+        rows = self.conn.execute(f"SELECT key, data FROM {table}")
+        return {key: json.loads(data) for key, data in rows}
+
+    def query(self, table, **filters):
+        columns = TABLES[table]
+        for column in filters:
+            if column not in columns:
+                raise ValueError(f"Colonne non indexée '{column}' pour la table '{table}'.")
+        where = " AND ".join(f"{column} = ?" for column in filters) or "1"
+        rows = self.conn.execute(f"SELECT key, data FROM {table} WHERE {where}", [str(value) for value in filters.values()])
+        return {key: json.loads(data) for key, data in rows}
+
+    def apply(self, table, upserts=None, deletes=()):
+        columns = TABLES[table]
+        names = ", ".join(("key", "data") + columns)
+        marks = ", ".join("?" * (len(columns) + 2))
+        with self.transaction():
+            if deletes:
+                self.conn.executemany(f"DELETE FROM {table} WHERE key = ?", [(key,) for key in deletes])
+            if upserts:
+                self.conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} ({names}) VALUES ({marks})",
+                    [
+                        (key, json.dumps(data), *(_index_value(data, column) for column in columns))
+                        for key, data in upserts.items()
+                    ],
+                )
+
+    def upsert(self, table, key, data):
+        self.apply(table, upserts={key: data})
+
+    def delete(self, table, key):
+        self.apply(table, deletes=(key,))
+
+    def replace(self, table, rows):
+        with self.transaction():
+            self.conn.execute(f"DELETE FROM {table}")
+            self.apply(table, upserts=rows)
+
+    @contextmanager
+    def transaction(self):
+        """Transaction SQLite ; les transactions imbriquées rejoignent la transaction englobante."""
+        if self._depth == 0:
+            self.conn.execute("BEGIN")
+        self._depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._depth -= 1
+            if self._depth == 0:
+                self.conn.execute("ROLLBACK")
+            raise
+        else:
+            self._depth -= 1
+            if self._depth == 0:
+                with self.write_timings.time():
+                    self.conn.execute("COMMIT")
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.conn.close()
+
+
+class WriteBehindStorage:
+    """Met les écritures en tampon et les regroupe en un seul flush par intervalle.
+
+    Les mutations marquent la table comme modifiée ; une tâche asyncio en arrière-plan
+    applique toutes les modifications en attente dans une seule transaction du backend.
+    """
+
+    def __init__(self, backend, interval=DEFAULT_FLUSH_INTERVAL):
+        self.backend = backend
+        self.interval = interval
+        self._upserts = {}
+        self._deletes = {}
+        self._dirty = None
+        self._task = None
+        self.flush_timings = Histogram()
+
+    def load(self, table):
+        rows = self.backend.load(table)
+        for key in self._deletes.get(table, ()):
+            rows.pop(key, None)
+        rows.update(self._upserts.get(table, {}))
+        return rows
+
+    def query(self, table, **filters):
+        rows = self.backend.query(table, **filters)
+        upserts = self._upserts.get(table, {})
+        for key in self._deletes.get(table, set()) | upserts.keys():
+            rows.pop(key, None)
+        for key, data in upserts.items():
+            if all(_index_value(data, column) == str(value) for column, value in filters.items()):
+                rows[key] = data
+        return rows
+
+    def apply(self, table, upserts=None, deletes=()):
+        table_upserts = self._upserts.setdefault(table, {})
+        table_deletes = self._deletes.setdefault(table, set())
+        for key in deletes:
+            table_upserts.pop(key, None)
+            table_deletes.add(key)
+        for key, data in (upserts or {}).items():
+            table_deletes.discard(key)
+            table_upserts[key] = data
+        self._mark_dirty()
+
+    def upsert(self, table, key, data):
+        self.apply(table, upserts={key: data})
+
+    def delete(self, table, key):
+        self.apply(table, deletes=(key,))
+
+    def replace(self, table, rows):
+        self.flush()
+        self.backend.replace(table, rows)
+
+    @contextmanager
+    def transaction(self):
+        # Les écritures sont déjà regroupées jusqu'au prochain flush
+        yield self
+
+    def _mark_dirty(self):
+        if self._task is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # Pas de boucle asyncio (import, scripts) : écriture immédiate
+                self.flush()
+                return
+            self._dirty = asyncio.Event()
+            self._task = loop.create_task(self._flush_loop())
+        self._dirty.set()
+
+    async def _flush_loop(self):
+        while True:
+            await self._dirty.wait()
+            await asyncio.sleep(self.interval)
+            self._dirty.clear()
+            try:
+                self.flush()
+            except Exception as error:
+                # Les écritures ont été remises en attente : nouvel essai à l'intervalle suivant
+                log_event("storage_flush_failed", level=logging.ERROR, backend=self.backend.name, error=repr(error))
+                self._dirty.set()
+
+    def flush(self):
+        """Écrit immédiatement toutes les modifications en attente."""
+        if not self._upserts and not self._deletes:
+            return
+        upserts, self._upserts = self._upserts, {}
+        deletes, self._deletes = self._deletes, {}
+        try:
+            with self.flush_timings.time(), self.backend.transaction():
+                for table in upserts.keys() | deletes.keys():
+                    self.backend.apply(table, upserts=upserts.get(table), deletes=deletes.get(table, ()))
+        except BaseException:
+            self._requeue(upserts, deletes)
+            raise
+
+    def _requeue(self, upserts, deletes):
+        """Remet en attente un lot non écrit ; les écritures arrivées entre-temps restent prioritaires."""
+        for table in upserts.keys() | deletes.keys():
+            table_upserts = self._upserts.setdefault(table, {})
+            table_deletes = self._deletes.setdefault(table, set())
+            for key, data in upserts.get(table, {}).items():
+                if key not in table_upserts and key not in table_deletes:
+                    table_upserts[key] = data
+            for key in deletes.get(table, ()):
+                if key not in table_upserts:
+                    table_deletes.add(key)
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        try:
+            self.flush()
+        finally:
+            self.backend.close()
+
+
+def migrate_json_to_sqlite(storage, directory=BASE_DIR):
+    """Importe une seule fois les fichiers vetos.json / tourney.json / teams.json existants."""
+    if storage.get_meta("json_migrated"):
+        return False
+
+    legacy = JSONStorage(directory)
+    with storage.transaction():
+        for table in TABLES:
+            if os.path.exists(legacy._path(table)):
+                rows = legacy.load(table)
+                if rows:
+                    storage.apply(table, upserts=rows)
+        storage.set_meta("json_migrated", "1")
+    return True
+
+
+_storages = {}
+
+
+def open_storage(backend=None, directory=BASE_DIR, flush_interval=DEFAULT_FLUSH_INTERVAL):
+    """Retourne le stockage partagé pour ce backend ('sqlite' ou 'json')."""
+    backend = backend or DEFAULT_BACKEND
+    key = (backend, os.path.abspath(directory))
+    if key not in _storages:
+        if backend == "sqlite":
+            storage = SQLiteStorage(directory)
+            migrate_json_to_sqlite(storage, directory)
+        elif backend == "json":
+            storage = JSONStorage(directory)
+        else:
+            raise ValueError(f"Backend de stockage inconnu : '{backend}'.")
+        if flush_interval > 0:
+            storage = WriteBehindStorage(storage, flush_interval)
+        _storages[key] = storage
+    return _storages[key]
+
+
+def close_storage(storage):
+    """Ferme le stockage et le retire du cache partagé (rechargement du cog)."""
+    for key, value in list(_storages.items()):
+        if value is storage:
+            del _storages[key]
+    storage.close()
@@ -0,0 +1,205 @@
+import asyncio
+import csv
+import io
+import json
+import logging
+from collections import namedtuple
+
+from .metrics import log_event
+from .timing import StageTimer
+
+# Colonnes des fichiers d'import / export (identiques pour pouvoir réimporter un export)
+COLUMNS = ("name", "tournament", "captain_discord_id")
+FORMATS = ("csv", "json")
+# Requêtes fetch_user simultanées pour les capitaines inconnus du bot
+MAX_CONCURRENT_LOOKUPS = 10
+# Erreurs détaillées dans le compte rendu (les suivantes sont seulement comptées)
+MAX_REPORTED_ERRORS = 15
+
+TeamRow = namedtuple("TeamRow", "line name tournament captain_id")
+
+
+class TeamImportError(ValueError):
+    """Fichier illisible : format inconnu, JSON invalide ou colonnes manquantes."""
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = []
+        self.errors = []
+        self.timings = StageTimer()
+
+    def error(self, line, message):
+        self.errors.append((line, message))
+
+    def summary(self):
+        if self.errors:
+            lines = [f"Import annulé : {len(self.errors)} erreur(s), aucune équipe créée."]
+            lines += [f"- ligne {line} : {message}" for line, message in self.errors[:MAX_REPORTED_ERRORS]]
+            if len(self.errors) > MAX_REPORTED_ERRORS:
+                lines.append(f"- ... et {len(self.errors) - MAX_REPORTED_ERRORS} autre(s)")
+            return "\n".join(lines)
+        return f"{len(self.created)} équipe(s) importée(s) en {self.timings.total * 1000:.0f} ms."
+
+
+def detect_format(filename):
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if extension not in FORMATS:
+        raise TeamImportError("Le fichier doit être un .csv ou un .json.")
+    return extension
+
+
+def _csv_rows(text):
+    # Excel en français exporte avec des points-virgules : le séparateur est deviné sur l'en-tête
+    header = text.split("\n", 1)[0]
+    try:
+        dialect = csv.Sniffer().sniff(header, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+    fields = {(field or "").strip().lower() for field in reader.fieldnames or ()}
+    missing = [column for column in ("name", "captain_discord_id") if column not in fields]
+    if missing:
+        raise TeamImportError(f"Colonne(s) manquante(s) : {', '.join(missing)} (attendu : {', '.join(COLUMNS)}).")
+    for row in reader:
+        # reader.line_num compte l'en-tête : c'est le numéro de ligne du fichier
+        yield reader.line_num, {(key or "").strip().lower(): (value or "").strip() for key, value in row.items()}
+
+
+def _json_rows(text):
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as error:
+        raise TeamImportError(f"JSON invalide : {error}")
+    # Liste d'objets, ou dictionnaire nom -> équipe comme la table des équipes (et l'export JSON)
+    if isinstance(data, dict):
+        data = [{"name": name, **team} for name, team in data.items() if isinstance(team, dict)]
+    if not isinstance(data, list):
+        raise TeamImportError("Le JSON doit être une liste d'équipes ou un dictionnaire nom -> équipe.")
+    for index, row in enumerate(data, start=1):
+        if isinstance(row, dict):
+            yield index, {key: str(value).strip() for key, value in row.items() if value is not None}
+        else:
+            yield index, {}
+
+
+def parse_rows(filename, data):
+    """Lignes du fichier sous forme de (numéro, dict), lues au fur et à mesure pour le CSV."""
+    fmt = detect_format(filename)
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise TeamImportError("Le fichier doit être encodé en UTF-8.")
+    return _csv_rows(text) if fmt == "csv" else _json_rows(text)
+
+
+def validate_rows(rows, registry, report, default_tournament=None):
+    """Vérifie nom, tournoi, doublons et forme de l'ID du capitaine ; retourne les lignes valides."""
+    teams = registry.team_config.teams
+    tournaments = registry.tournament_config.tournaments
+    seen = {}
+    valid = []
+    for line, row in rows:
+        report.rows += 1
+        name = row.get("name", "")
+        tournament = row.get("tournament") or default_tournament
+        captain_id = row.get("captain_discord_id", "")
+        if not name:
+            report.error(line, "nom d'équipe manquant")
+        elif name in seen:
+            report.error(line, f"**{name}** apparaît aussi ligne {seen[name]}")
+        elif name in teams:
+            report.error(line, f"l'équipe **{name}** existe déjà")
+        elif not tournament:
+            report.error(line, "tournoi manquant")
+        elif tournament not in tournaments:
+            report.error(line, f"le tournoi **{tournament}** n'existe pas")
+        elif not (captain_id.isdigit() and 15 <= len(captain_id) <= 20):
+            report.error(line, f"ID Discord du capitaine invalide : `{captain_id}`")
+        else:
+            valid.append(TeamRow(line, name, tournament, int(captain_id)))
+        if name and name not in seen:
+            seen[name] = line
+    return valid
+
+
+async def resolve_captains(bot, registry, rows, concurrency=MAX_CONCURRENT_LOOKUPS):
+    """Résout chaque capitaine une seule fois ; seuls les inconnus du bot passent par l'API, en parallèle bornée."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve(captain_id):
+        async with semaphore:
+            return captain_id, await registry.captains.get(bot, captain_id)
+
+    captain_ids = {row.captain_id for row in rows}
+    results = await asyncio.gather(*(resolve(captain_id) for captain_id in captain_ids))
+    return {captain_id for captain_id, profile in results if profile is None}
+
+
+async def import_teams_file(bot, registry, filename, data, default_tournament=None):
+    """Valide le fichier en entier puis crée toutes les équipes en une transaction, ou aucune."""
+    report = ImportReport()
+    valid = validate_rows(parse_rows(filename, data), registry, report, default_tournament)
+    report.timings.mark("validate")
+
+    unknown = await resolve_captains(bot, registry, valid)
+    for row in valid:
+        if row.captain_id in unknown:
+            report.error(row.line, f"capitaine `{row.captain_id}` introuvable sur Discord")
+    report.timings.mark("captains")
+
+    if not report.errors:
+        registry.team_config.create_teams({
+            row.name: {"tournament": row.tournament, "captain_discord_id": str(row.captain_id)}
+            for row in valid
+        })
+        report.created = [row.name for row in valid]
+    report.timings.mark("commit")
+
+    log_event(
+        "teams_imported" if not report.errors else "teams_import_rejected",
+        level=logging.INFO if not report.errors else logging.WARNING,
+        filename=filename, rows=report.rows, created=len(report.created), errors=len(report.errors),
+        **{f"{stage}_ms": round(duration * 1000, 1) for stage, duration in report.timings.stages.items()},
+    )
+    return report
+
+
+def iter_export(team_config, fmt, tournament=None):
+    """Morceaux de texte du fichier d'export, produits équipe par équipe."""
+    if tournament is None:
+        teams = team_config.teams.items()
+    else:
+        teams = team_config.get_teams_by_tournament(tournament).items()
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(COLUMNS)
+        for name, team in teams:
+            writer.writerow((name, team.get("tournament", ""), team.get("captain_discord_id", "")))
+            if buffer.tell() > 65536:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        # Même forme que la table des équipes : réimportable tel quel
+        yield "{\n"
+        first = True
+        for name, team in teams:
+            yield ("" if first else ",\n") + f"    {json.dumps(name, ensure_ascii=False)}: {json.dumps(team, ensure_ascii=False)}"
+            first = False
+        yield "\n}\n"
+
+
+def export_teams_file(team_config, fmt="csv", tournament=None):
+    """Fichier d'export en mémoire (octets UTF-8), prêt à être joint à un message."""
+    if fmt not in FORMATS:
+        raise TeamImportError(f"Format inconnu '{fmt}' (csv ou json).")
+    output = io.BytesIO()
+    for chunk in iter_export(team_config, fmt, tournament):
+        output.write(chunk.encode("utf-8"))
+    output.seek(0)
+    return output
@@ -1,25 +1,52 @@
-import json
-import os
 import discord # type: ignore
-from discord.ui import Modal, TextInput, Button, Select, View # type: ignore
+from discord.ui import Modal, TextInput, Button, View # type: ignore
 from discord.ext import commands # type: ignore
 
-from .tournament import TournamentConfig
+from .paginator import PagedSelect, SortedNames
+from .panels import TEAMS_PANEL
+from .storage import open_storage
 
 class TeamConfig:
-    def __init__(self, filename="teams.json"):
-        self.filename = os.path.join(os.path.dirname(__file__), '..', filename)
+    def __init__(self, storage=None):
+        self.storage = storage or open_storage()
         self.teams = self.load_teams()
+        self.rebuild_indexes()
 
     def load_teams(self):
-        if os.path.exists(self.filename):
-            with open(self.filename, "r") as file:
-                return json.load(file)
-        return {}
+        return self.storage.load("teams")
 
     def save_teams(self):
-        with open(self.filename, "w") as file:
-            json.dump(self.teams, file, indent=4)
+        self.storage.replace("teams", self.teams)
+
+    def rebuild_indexes(self):
+        """Reconstruit les index tournoi -> équipes (noms triés) et capitaine -> équipes."""
+        # Tournoi -> SortedNames (ordre alphabétique, pour la pagination) ; capitaine -> dict servant d'ensemble ordonné
+        self.teams_by_tournament = {}
+        self.teams_by_captain = {}
+        for name, data in self.teams.items():
+            self._index_team(name, data)
+
+    def _index_team(self, name, data):
+        self.teams_by_tournament.setdefault(data.get("tournament"), SortedNames()).add(name)
+        self.teams_by_captain.setdefault(str(data.get("captain_discord_id")), {})[name] = None
+
+    def _unindex_team(self, name, data):
+        tournament = data.get("tournament")
+        names = self.teams_by_tournament.get(tournament)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self.teams_by_tournament[tournament]
+        captain = str(data.get("captain_discord_id"))
+        names = self.teams_by_captain.get(captain)
+        if names is not None:
+            names.pop(name, None)
+            if not names:
+                del self.teams_by_captain[captain]
+
+    def team_names(self, tournament_name):
+        """Index trié des noms d'équipes du tournoi (vide si le tournoi n'a pas d'équipe)."""
+        return self.teams_by_tournament.get(tournament_name) or SortedNames()
 
     def create_team(self, name, tournament_name, captain_discord_id):
         if name not in self.teams:
@@ -27,14 +54,24 @@ class TeamConfig:
                 "tournament": tournament_name,
                 "captain_discord_id": captain_discord_id
             }
-            self.save_teams()
+            self._index_team(name, self.teams[name])
+            self.storage.upsert("teams", name, self.teams[name])
             return True
         return False
 
+    def create_teams(self, teams):
+        """Crée plusieurs équipes (nom -> données) en une seule écriture du stockage.
+
+        Les noms doivent être nouveaux ; les index sont reconstruits une fois à la fin.
+        """
+        self.teams.update(teams)
+        self.rebuild_indexes()
+        self.storage.apply("teams", upserts=teams)
+
     def delete_team(self, name):
         if name in self.teams:
-            del self.teams[name]
-            self.save_teams()
+            self._unindex_team(name, self.teams.pop(name))
+            self.storage.delete("teams", name)
             return True
         return False
 
@@ -43,30 +80,50 @@ class TeamConfig:
 
     def update_team(self, name, tournament_name, captain_discord_id):
         if name in self.teams:
+            self._unindex_team(name, self.teams[name])
             self.teams[name]["tournament"] = tournament_name
             self.teams[name]["captain_discord_id"] = captain_discord_id
-            self.save_teams()
+            self._index_team(name, self.teams[name])
+            self.storage.upsert("teams", name, self.teams[name])
+            return True
+        return False
+
+    def rename_team(self, name, new_name):
+        if name in self.teams and new_name not in self.teams:
+            self._unindex_team(name, self.teams[name])
+            self.teams[new_name] = self.teams.pop(name)
+            self._index_team(new_name, self.teams[new_name])
+            with self.storage.transaction():
+                self.storage.delete("teams", name)
+                self.storage.upsert("teams", new_name, self.teams[new_name])
             return True
         return False
         
     def get_teams_by_tournament(self, tournament_name):
-        teams = {}
-        for name, data in self.teams.items():
-            if "tournament" in data and data["tournament"] == tournament_name:
-                teams[name] = data
-        return teams
+        names = self.teams_by_tournament.get(tournament_name, ())
+        return {name: self.teams[name] for name in names}
+
+    def get_teams_by_captain(self, captain_discord_id):
+        names = self.teams_by_captain.get(str(captain_discord_id), ())
+        return {name: self.teams[name] for name in names}
+
+    def get_team_by_captain(self, captain_discord_id, tournament_name=None):
+        """Retourne le nom de l'équipe du capitaine (dans le tournoi donné si précisé)."""
+        for name in self.teams_by_captain.get(str(captain_discord_id), ()):
+            if tournament_name is None or self.teams[name].get("tournament") == tournament_name:
+                return name
+        return None
 
     def refresh_teams(self):
-        """Refresh the teams data from the file."""
+        """Refresh the teams data from the storage."""
         self.teams = self.load_teams()
-
-team_config = TeamConfig()
-tournament_config = TournamentConfig()
+        self.rebuild_indexes()
 
 class TeamCreateModal(Modal):
-    def __init__(self, bot, tournament_name):
+    def __init__(self, bot, registry, tournament_name):
         super().__init__(title="Créer une Équipe")
         self.bot = bot
+        self.registry = registry
         self.tournament_name = tournament_name
         self.name = TextInput(label="Nom de l'Équipe", placeholder="Entrez le nom de l'équipe")
         self.captain_discord_id = TextInput(label="Discord ID du Capitaine", placeholder="Entrez le Discord ID du capitaine")
@@ -78,24 +135,26 @@ class TeamCreateModal(Modal):
         captain_discord_id = self.captain_discord_id.value
 
         try:
-            # Fetch user object using the bot
-            captain = await self.bot.fetch_user(int(captain_discord_id))
-            if team_config.create_team(team_name, self.tournament_name, captain_discord_id):
+            # Profil depuis le cache des capitaines, l'API n'est appelée qu'en cas d'absence
+            captain = await self.registry.captains.get(self.bot, int(captain_discord_id))
+            if captain is None:
+                await interaction.response.send_message("Le Discord ID du capitaine est invalide.", ephemeral=True)
+                return
+            if self.registry.team_config.create_team(team_name, self.tournament_name, captain_discord_id):
                 await interaction.response.send_message(
                     f"L'équipe **{team_name}** a été créée avec succès.\nTournoi: **{self.tournament_name}**\nCapitaine: **{captain.display_name}**",
                     ephemeral=True
                 )
             else:
                 await interaction.response.send_message(f"Une équipe avec le nom **{team_name}** existe déjà.", ephemeral=True)
-        except discord.NotFound:
-            await interaction.response.send_message("Le Discord ID du capitaine est invalide.", ephemeral=True)
         except ValueError:
             await interaction.response.send_message("Veuillez entrer un ID Discord valide pour le capitaine.", ephemeral=True)
 
 class TeamEditModal(Modal):
-    def __init__(self, bot, team_name, team):
+    def __init__(self, bot, registry, team_name, team):
         super().__init__(title=f"Modifier l'Équipe '{team_name}'")
         self.bot = bot  # Stocker le bot
+        self.registry = registry
         self.team_name = team_name
         self.team = team
         self.name = TextInput(
@@ -119,15 +178,21 @@ class TeamEditModal(Modal):
             await interaction.response.send_message("Le nom ne peut pas être vide.", ephemeral=True)
             return
 
+        team_config = self.registry.team_config
         try:
-            # Fetch user object using the bot
-            captain = await self.bot.fetch_user(int(captain_discord_id))
+            # Profil depuis le cache des capitaines, l'API n'est appelée qu'en cas d'absence
+            captain = await self.registry.captains.get(self.bot, int(captain_discord_id))
+            if captain is None:
+                await interaction.response.send_message("Le Discord ID du capitaine est invalide.", ephemeral=True)
+                return
             if new_name != self.team_name:
                 if team_config.get_team(new_name):
                     await interaction.response.send_message(f"Une équipe avec le nom **{new_name}** existe déjà.", ephemeral=True)
                     return
                 else:
-                    team_config.teams[new_name] = team_config.teams.pop(self.team_name)
+                    team_config.rename_team(self.team_name, new_name)
+                    # Les matchs du tableau désignent les équipes par leur nom
+                    self.registry.brackets.rename_team(self.team["tournament"], self.team_name, new_name)
                     self.team_name = new_name
 
             # Mise à jour des informations de l'équipe
@@ -136,56 +201,31 @@ class TeamEditModal(Modal):
                 f"Équipe **{self.team_name}** mise à jour avec succès.\nTournoi: **{self.team['tournament']}**\nCapitaine: **{captain.display_name}**",
                 ephemeral=True
             )
-        except discord.NotFound:
-            await interaction.response.send_message("Le Discord ID du capitaine est invalide.", ephemeral=True)
         except ValueError:
             await interaction.response.send_message("Veuillez entrer un ID Discord valide pour le capitaine.", ephemeral=True)
 
 class TeamManager:
-    def __init__(self, bot, filename="message_id.json"):
-        self.filename = os.path.join(os.path.dirname(__file__), '..', filename)
+    def __init__(self, bot, registry):
         self.bot = bot
-        self.setup_message_id = None
-        self.load_setup_message_id()
-
-    def save_setup_message_id(self, message_id):
-        data = {}
-        # Load existing data
-        if os.path.exists(self.filename):
-            with open(self.filename, 'r') as f:
-                data = json.load(f)
-        
-        # Update setup_message_id while preserving existing keys
-        data['setup_message_id'] = message_id
-        
-        with open(self.filename, 'w') as f:
-            json.dump(data, f, indent=4)
-
-    def load_setup_message_id(self):
-        if os.path.exists(self.filename):
-            with open(self.filename, 'r') as f:
-                data = json.load(f)
-                self.setup_message_id = data.get('setup_message_id')
-
-    def refresh_setup_message_id(self):
-        """Refresh the message id from the file."""
-        self.message_id = self.load_setup_message_id()
+        self.registry = registry
+        # Embed et vue du panneau construits une fois, réutilisés à chaque clic
+        self.setup_embed = self.create_setup_embed()
+        self.setup_view = self.create_setup_view()
 
     async def update_setup_message(self, channel):
-        self.refresh_setup_message_id()
-        if self.setup_message_id:
+        message_id = self.registry.panels.message_id(channel.guild.id, TEAMS_PANEL)
+        if message_id:
             try:
-                message = await channel.fetch_message(self.setup_message_id)
-                await message.edit(embed=self.create_setup_embed(), view=self.create_setup_view())
+                # Édition directe du message connu : pas de fetch ni de lecture sur disque
+                await channel.get_partial_message(message_id).edit(embed=self.setup_embed, view=self.setup_view)
             except discord.NotFound:
                 await self.send_setup_message(channel)
         else:
             await self.send_setup_message(channel)
 
     async def send_setup_message(self, channel):
-        message = await channel.send(embed=self.create_setup_embed(), view=self.create_setup_view())
-        self.setup_message_id = message.id
-        self.save_setup_message_id(message.id)
+        message = await channel.send(embed=self.setup_embed, view=self.setup_view)
+        self.registry.panels.set(channel.guild.id, TEAMS_PANEL, channel.id, message.id)
 
     def create_setup_embed(self):
         embed = discord.Embed(
@@ -217,29 +257,27 @@ class TeamManager:
 
     def create_setup_view(self):
         view = discord.ui.View(timeout=None)
-        view.add_item(ListTeamsButton())
-        view.add_item(CreateTeamButton(self.bot))  # Passez le bot ici
-        view.add_item(EditTeamButton(self.bot))
-        view.add_item(DeleteTeamButton())
+        view.add_item(ListTeamsButton(self.registry))
+        view.add_item(CreateTeamButton(self.bot, self.registry))  # Passez le bot ici
+        view.add_item(EditTeamButton(self.bot, self.registry))
+        view.add_item(DeleteTeamButton(self.registry))
         return view
 
 class ListTeamsButton(Button):
-    def __init__(self):
+    def __init__(self, registry):
         super().__init__(label="Liste des Équipes", style=discord.ButtonStyle.secondary, custom_id="list_teams")
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
-        tournament_config.refresh_tournaments()
-        tournament_names = list(tournament_config.tournaments.keys())  # Liste des tournois
+        team_config = self.registry.team_config
+        tournament_names = self.registry.tournament_config.names  # Index trié des tournois
         if not tournament_names:
             await interaction.response.send_message("Aucun tournoi trouvé.", ephemeral=True)
             return
 
-        class TournamentSelect(Select):
-            def __init__(self, options):
-                super().__init__(placeholder="Choisissez un tournoi...", options=options)
-
-            async def callback(self, interaction: discord.Interaction):
-                selected_tournament = self.values[0]
+        class TournamentSelect(PagedSelect):
+            async def on_select(self, interaction: discord.Interaction, values):
+                selected_tournament = values[0]
                 teams = team_config.get_teams_by_tournament(selected_tournament)
                 if not teams:
                     await interaction.response.send_message(f"Aucune équipe trouvée pour le tournoi '{selected_tournament}'.", ephemeral=True)
@@ -247,74 +285,74 @@ class ListTeamsButton(Button):
 
                 embed = discord.Embed(
                     title=f"Équipes pour le Tournoi '{selected_tournament}'",
-                    description="\n".join(f"- {name}" for name in teams.keys()),
+                    description="\n".join(f"- {name}" for name in team_config.team_names(selected_tournament)),
                     color=discord.Color.green()
                 )
                 await interaction.response.send_message(embed=embed, ephemeral=True)
 
-        select = TournamentSelect([discord.SelectOption(label=name, value=name) for name in tournament_names])
-        view = discord.ui.View()
-        view.add_item(select)
-        await interaction.response.send_message("Veuillez choisir un tournoi pour afficher les équipes :", view=view, ephemeral=True)
+        view = TournamentSelect(lambda: self.registry.tournament_config.names, placeholder="Choisissez un tournoi...", prompt="Veuillez choisir un tournoi pour afficher les équipes :")
+        await view.send(interaction)
 
 class CreateTeamButton(Button):
-    def __init__(self, bot):
+    def __init__(self, bot, registry):
         super().__init__(label="Créer une nouvelle équipe", style=discord.ButtonStyle.primary, custom_id="create_team")
         self.bot = bot
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
-        tournament_config.refresh_tournaments()
-        tournament_names = list(tournament_config.tournaments.keys())
+        registry = self.registry
+        tournament_names = registry.tournament_config.names
         if not tournament_names:
             await interaction.response.send_message("Aucun tournoi disponible.", ephemeral=True)
             return
 
-        class TournamentSelect(Select):
-            def __init__(self, bot, options):
+        class TournamentSelect(PagedSelect):
+            def __init__(self, bot, names, **kwargs):
                 self.bot = bot
-                super().__init__(placeholder="Choisissez un tournoi...", options=options)
+                super().__init__(names, **kwargs)
 
-            async def callback(self, interaction: discord.Interaction):
-                selected_tournament = self.values[0]
-                modal = TeamCreateModal(self.bot, selected_tournament)  # Passer le bot ici
+            async def on_select(self, interaction: discord.Interaction, values):
+                selected_tournament = values[0]
+                modal = TeamCreateModal(self.bot, registry, selected_tournament)  # Passer le bot ici
                 await interaction.response.send_modal(modal)
 
-        select = TournamentSelect(self.bot, [discord.SelectOption(label=name, value=name) for name in tournament_names])
-        view = View()
-        view.add_item(select)
-        await interaction.response.send_message("Sélectionnez un tournoi pour créer une équipe :", view=view, ephemeral=True)
+        view = TournamentSelect(self.bot, lambda: registry.tournament_config.names, placeholder="Choisissez un tournoi...", prompt="Sélectionnez un tournoi pour créer une équipe :")
+        await view.send(interaction)
 
 class EditTeamButton(Button):
-    def __init__(self, bot):
+    def __init__(self, bot, registry):
         super().__init__(label="Éditer une équipe", style=discord.ButtonStyle.primary, custom_id="edit_team")
         self.bot = bot
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
-        tournament_names = list(tournament_config.tournaments.keys())
+        registry = self.registry
+        team_config = registry.team_config
+        tournament_names = registry.tournament_config.names
         if not tournament_names:
             await interaction.response.send_message("Aucun tournoi disponible pour la modification.", ephemeral=True)
             return
 
-        class TournamentSelect(Select):
-            def __init__(self, bot, options):
-                super().__init__(placeholder="Choisissez un tournoi...", options=options)
+        class TournamentSelect(PagedSelect):
+            def __init__(self, bot, names, **kwargs):
                 self.bot = bot
+                super().__init__(names, **kwargs)
 
-            async def callback(self, interaction: discord.Interaction):
-                selected_tournament = self.values[0]
-                teams = team_config.get_teams_by_tournament(selected_tournament)
+            async def on_select(self, interaction: discord.Interaction, values):
+                selected_tournament = values[0]
+                team_names = team_config.team_names(selected_tournament)
                 
-                if not teams:
+                if not team_names:
                     await interaction.response.send_message(f"Aucune équipe trouvée pour le tournoi '{selected_tournament}'.", ephemeral=True)
                     return
 
-                class TeamSelect(Select):
-                    def __init__(self, bot, options):
-                        super().__init__(placeholder="Choisissez une équipe...", options=options)
+                class TeamSelect(PagedSelect):
+                    def __init__(self, bot, names, **kwargs):
                         self.bot = bot
+                        super().__init__(names, **kwargs)
 
-                    async def callback(self, interaction: discord.Interaction):
-                        selected_team = self.values[0]
+                    async def on_select(self, interaction: discord.Interaction, values):
+                        selected_team = values[0]
                         team = team_config.get_team(selected_team)
                         
                         if not team:
@@ -323,8 +361,8 @@ class EditTeamButton(Button):
                         
                         # Demander si le tournoi doit être modifié
                         view = View()
-                        view.add_item(ChangeTournamentButton(self.bot, selected_team))
-                        view.add_item(NoChangeTournamentButton(self.bot, selected_team))
+                        view.add_item(ChangeTournamentButton(self.bot, registry, selected_team))
+                        view.add_item(NoChangeTournamentButton(self.bot, registry, selected_team))
 
                         await interaction.response.send_message(
                             "Souhaitez-vous également changer le tournoi associé ?",
@@ -332,92 +370,87 @@ class EditTeamButton(Button):
                             ephemeral=True
                         )
 
-                # Pass the options correctly here
-                select = TeamSelect(self.bot, [discord.SelectOption(label=name, value=name) for name in teams.keys()])
-                view = View()
-                view.add_item(select)
-                await interaction.response.send_message("Sélectionnez une équipe à éditer :", view=view, ephemeral=True)
+                view = TeamSelect(self.bot, lambda: team_config.team_names(selected_tournament), placeholder="Choisissez une équipe...", prompt="Sélectionnez une équipe à éditer :")
+                await view.send(interaction)
 
-        select = TournamentSelect(self.bot, [discord.SelectOption(label=name, value=name) for name in tournament_names])
-        view = View()
-        view.add_item(select)
-        await interaction.response.send_message("Choisissez un tournoi pour filtrer les équipes :", view=view, ephemeral=True)
+        view = TournamentSelect(self.bot, lambda: registry.tournament_config.names, placeholder="Choisissez un tournoi...", prompt="Choisissez un tournoi pour filtrer les équipes :")
+        await view.send(interaction)
 
 class ChangeTournamentButton(Button):
-    def __init__(self, bot, team_name):
+    def __init__(self, bot, registry, team_name):
         super().__init__(label="Changer le tournoi", style=discord.ButtonStyle.primary, custom_id=f"change_tournament_{team_name}")
         self.team_name = team_name
         self.bot = bot
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
-        tournament_names = list(tournament_config.tournaments.keys())
+        registry = self.registry
+        team_config = registry.team_config
+        tournament_names = registry.tournament_config.names
         if not tournament_names:
             await interaction.response.send_message("Aucun tournoi disponible pour la modification.", ephemeral=True)
             return
 
-        class TournamentSelect(Select):
-            def __init__(self, bot, team_name, options):
-                super().__init__(placeholder="Choisissez un tournoi...", options=options)
+        class TournamentSelect(PagedSelect):
+            def __init__(self, bot, team_name, names, **kwargs):
                 self.team_name = team_name
                 self.bot = bot
+                super().__init__(names, **kwargs)
 
-            async def callback(self, interaction: discord.Interaction):
-                selected_tournament = self.values[0]
+            async def on_select(self, interaction: discord.Interaction, values):
+                selected_tournament = values[0]
                 team = team_config.get_team(self.team_name)
                 # Créer la fenêtre modale sans le champ "Tournoi"
-                modal = TeamEditModal(self.bot, self.team_name, team)
+                modal = TeamEditModal(self.bot, registry, self.team_name, team)
                 team_config.update_team(self.team_name, selected_tournament, team["captain_discord_id"])  # Mise à jour du tournoi ici
                 await interaction.response.send_modal(modal)
 
-        select = TournamentSelect(self.bot, self.team_name, [discord.SelectOption(label=name, value=name) for name in tournament_names])
-        view = View()
-        view.add_item(select)
-        await interaction.response.send_message("Choisissez un nouveau tournoi pour l'équipe :", view=view, ephemeral=True)
+        view = TournamentSelect(self.bot, self.team_name, lambda: registry.tournament_config.names, placeholder="Choisissez un tournoi...", prompt="Choisissez un nouveau tournoi pour l'équipe :")
+        await view.send(interaction)
 
 class NoChangeTournamentButton(Button):
-    def __init__(self, bot, team_name):
+    def __init__(self, bot, registry, team_name):
         super().__init__(label="Ne pas changer le tournoi", style=discord.ButtonStyle.secondary, custom_id=f"no_change_tournament_{team_name}")
         self.team_name = team_name
         self.bot = bot
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
+        team_config = self.registry.team_config
         team = team_config.get_team(self.team_name)
         # Créer la fenêtre modale sans le champ "Tournoi"
-        modal = TeamEditModal(self.bot, self.team_name, team)
+        modal = TeamEditModal(self.bot, self.registry, self.team_name, team)
         # Passer le tournoi actuel à la méthode update_team
         team_config.update_team(self.team_name, team["tournament"], team["captain_discord_id"])  
         await interaction.response.send_modal(modal)
 
 class DeleteTeamButton(Button):
-    def __init__(self):
+    def __init__(self, registry):
         super().__init__(label="Supprimer une équipe", style=discord.ButtonStyle.danger, custom_id="delete_team")
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
-        tournament_names = list(tournament_config.tournaments.keys())
+        registry = self.registry
+        team_config = registry.team_config
+        tournament_names = registry.tournament_config.names
         if not tournament_names:
             await interaction.response.send_message("Aucun tournoi disponible pour la suppression.", ephemeral=True)
             return
 
-        class TournamentSelect(Select):
-            def __init__(self, options):
-                super().__init__(placeholder="Choisissez un tournoi...", options=options)
-
-            async def callback(self, interaction: discord.Interaction):
-                selected_tournament = self.values[0]
-                teams = team_config.get_teams_by_tournament(selected_tournament)
+        class TournamentSelect(PagedSelect):
+            async def on_select(self, interaction: discord.Interaction, values):
+                selected_tournament = values[0]
+                team_names = team_config.team_names(selected_tournament)
                 
-                if not teams:
+                if not team_names:
                     await interaction.response.send_message(f"Aucune équipe trouvée pour le tournoi '{selected_tournament}'.", ephemeral=True)
                     return
 
-                class TeamSelect(Select):
-                    def __init__(self, options):
-                        super().__init__(placeholder="Choisissez une équipe à supprimer...", options=options)
-
-                    async def callback(self, interaction: discord.Interaction):
-                        selected_team = self.values[0]
+                class TeamSelect(PagedSelect):
+                    async def on_select(self, interaction: discord.Interaction, values):
+                        selected_team = values[0]
                         confirm_view = View()
-                        confirm_view.add_item(ConfirmTeamDeleteButton(selected_team))
+                        confirm_view.add_item(ConfirmTeamDeleteButton(registry, selected_team))
 
                         await interaction.response.send_message(
                             f"Êtes-vous sûr de vouloir supprimer l'équipe '{selected_team}' ?",
@@ -425,23 +458,20 @@ class DeleteTeamButton(Button):
                             ephemeral=True
                         )
 
-                select = TeamSelect([discord.SelectOption(label=name, value=name) for name in teams.keys()])
-                view = View()
-                view.add_item(select)
-                await interaction.response.send_message("Sélectionnez une équipe à supprimer :", view=view, ephemeral=True)
+                view = TeamSelect(lambda: team_config.team_names(selected_tournament), placeholder="Choisissez une équipe à supprimer...", prompt="Sélectionnez une équipe à supprimer :")
+                await view.send(interaction)
 
-        select = TournamentSelect([discord.SelectOption(label=name, value=name) for name in tournament_names])
-        view = View()
-        view.add_item(select)
-        await interaction.response.send_message("Choisissez un tournoi pour filtrer les équipes :", view=view, ephemeral=True)
+        view = TournamentSelect(lambda: registry.tournament_config.names, placeholder="Choisissez un tournoi...", prompt="Choisissez un tournoi pour filtrer les équipes :")
+        await view.send(interaction)
 
 class ConfirmTeamDeleteButton(Button):
-    def __init__(self, team_name):
+    def __init__(self, registry, team_name):
         super().__init__(label=f"Confirmer la suppression de {team_name}", style=discord.ButtonStyle.danger, custom_id=f"confirm_delete_team_{team_name}")
+        self.registry = registry
         self.team_name = team_name
 
     async def callback(self, interaction: discord.Interaction):
-        if team_config.delete_team(self.team_name):
+        if self.registry.team_config.delete_team(self.team_name):
             await interaction.response.send_message(f"L'équipe '{self.team_name}' a été supprimée avec succès.", ephemeral=True)
         else:
             await interaction.response.send_message(f"Erreur lors de la suppression de l'équipe '{self.team_name}'.", ephemeral=True)
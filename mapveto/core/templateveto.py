@@ -1,63 +1,102 @@
-import json
-import os
+import logging
 import discord # type: ignore
-from discord.ui import Modal, TextInput, View, Button, Select # type: ignore
+from discord.ui import Modal, TextInput, View, Button # type: ignore
 from discord.ext import commands # type: ignore
 
+from .paginator import PagedSelect, SortedNames
+from .schedule import InvalidTemplateError, compile_schedule, parse_turn_timer
+from .metrics import log_event
+from .panels import TEMPLATES_PANEL
+from .storage import open_storage
+
 class MapVetoConfig:
-    def __init__(self, filename="vetos.json"):
-        self.filename = os.path.join(os.path.dirname(__file__), '..', filename)
+    def __init__(self, storage=None):
+        self.storage = storage or open_storage()
         self.vetos = self.load_vetos()
+        self.names = SortedNames(self.vetos)
+        self.compile_schedules()
 
     def load_vetos(self):
-        if os.path.exists(self.filename):
-            with open(self.filename, "r") as file:
-                return json.load(file)
-        return {}
+        return self.storage.load("templates")
+
+    def compile_schedules(self):
+        """Compile une fois les règles de chaque template ; les templates invalides n'ont pas de schedule."""
+        self.schedules = {}
+        for name, veto in self.vetos.items():
+            try:
+                self.schedules[name] = compile_schedule(veto["maps"], veto["rules"])
+            except InvalidTemplateError as error:
+                log_event("template_invalid", level=logging.WARNING, template=name, error=error)
+
+    def get_schedule(self, name):
+        return self.schedules.get(name)
 
     def save_vetos(self):
-        with open(self.filename, "w") as file:
-            json.dump(self.vetos, file, indent=4)
+        self.storage.replace("templates", self.vetos)
 
-    def create_veto(self, name, maps, rules):
+    def create_veto(self, name, maps, rules, turn_timeout=None, timeout_action=None):
         if name not in self.vetos:
+            self.schedules[name] = compile_schedule(maps, rules)
             self.vetos[name] = {
                 "maps": maps,
                 "rules": rules,
+                "turn_timeout": turn_timeout,
+                "timeout_action": timeout_action,
             }
-            self.save_vetos()
+            self.names.add(name)
+            self.storage.upsert("templates", name, self.vetos[name])
             return True
         return False
 
     def delete_veto(self, name):
         if name in self.vetos:
             del self.vetos[name]
-            self.save_vetos()
+            self.names.discard(name)
+            self.schedules.pop(name, None)
+            self.storage.delete("templates", name)
             return True
         return False
 
     def get_veto(self, name):
         return self.vetos.get(name, None)
 
-    def update_veto(self, name, maps, rules):
+    def update_veto(self, name, maps, rules, turn_timeout=None, timeout_action=None):
         if name in self.vetos:
+            self.schedules[name] = compile_schedule(maps, rules)
             self.vetos[name] = {
                 "maps": maps,
                 "rules": rules,
+                "turn_timeout": turn_timeout,
+                "timeout_action": timeout_action,
             }
-            self.save_vetos()
+            self.storage.upsert("templates", name, self.vetos[name])
+            return True
+        return False
+
+    def rename_veto(self, name, new_name):
+        if name in self.vetos and new_name not in self.vetos:
+            self.vetos[new_name] = self.vetos.pop(name)
+            self.names.discard(name)
+            self.names.add(new_name)
+            schedule = self.schedules.pop(name, None)
+            if schedule is not None:
+                self.schedules[new_name] = schedule
+            with self.storage.transaction():
+                self.storage.delete("templates", name)
+                self.storage.upsert("templates", new_name, self.vetos[new_name])
             return True
         return False
 
     def refresh_templates(self):
-        """Refresh the veto template data from the file."""
+        """Refresh the veto template data from the storage."""
         self.vetos = self.load_vetos()
-    
-veto_config = MapVetoConfig()
+        self.names = SortedNames(self.vetos)
+        self.compile_schedules()
 
 class VetoCreateModal(Modal):
-    def __init__(self):
+    def __init__(self, registry):
         super().__init__(title="Créer un template de veto")
+        self.registry = registry
 
         self.name = TextInput(label="Nom du Template", placeholder="Entrez le nom du template")
         self.maps = TextInput(label="Noms des Maps (séparés par des espaces)", placeholder="Entrez les noms des maps séparés par des espaces")
@@ -65,24 +104,36 @@ class VetoCreateModal(Modal):
             label="Règles (séparées par des espaces)",
             placeholder="Ban, Pick, Side, Continue (Respectez les majuscules)"
         )
+        self.turn_timeout = TextInput(label="Délai par tour (secondes)", placeholder="Laisser vide pour aucun délai", required=False)
+        self.timeout_action = TextInput(label="Action au délai (random ou pause)", placeholder="random : choix aléatoire, pause : veto mis en pause", required=False)
 
         self.add_item(self.name)
         self.add_item(self.maps)
         self.add_item(self.rules)
+        self.add_item(self.turn_timeout)
+        self.add_item(self.timeout_action)
 
     async def on_submit(self, interaction: discord.Interaction):
         name = self.name.value
         maps = self.maps.value.split()
         rules = self.rules.value.split()
 
-        if veto_config.create_veto(name, maps, rules):
+        try:
+            turn_timeout, timeout_action = parse_turn_timer(self.turn_timeout.value, self.timeout_action.value)
+            created = self.registry.veto_config.create_veto(name, maps, rules, turn_timeout, timeout_action)
+        except InvalidTemplateError as error:
+            await interaction.response.send_message(f"Template invalide : {error}", ephemeral=True)
+            return
+
+        if created:
             await interaction.response.send_message(f"Template de veto '{name}' créé avec succès.", ephemeral=True)
         else:
             await interaction.response.send_message(f"Un template de veto avec le nom '{name}' existe déjà.", ephemeral=True)
 
 class VetoEditModal(Modal):
-    def __init__(self, template_name, veto):
+    def __init__(self, registry, template_name, veto):
         super().__init__(title=f"Modifier le template '{template_name}'")
+        self.registry = registry
         self.template_name = template_name
         self.veto = veto
 
@@ -102,10 +153,24 @@ class VetoEditModal(Modal):
             default=" ".join(veto["rules"]),
             placeholder="Ban, Pick, Side, Continue (Respectez les majuscules, séparées par des espaces)"
         )
+        self.turn_timeout = TextInput(
+            label="Délai par tour (secondes)",
+            default=str(veto["turn_timeout"]) if veto.get("turn_timeout") else None,
+            placeholder="Laisser vide pour aucun délai",
+            required=False
+        )
+        self.timeout_action = TextInput(
+            label="Action au délai (random ou pause)",
+            default=veto.get("timeout_action"),
+            placeholder="random : choix aléatoire, pause : veto mis en pause",
+            required=False
+        )
 
         self.add_item(self.name)
         self.add_item(self.maps)
         self.add_item(self.rules)
+        self.add_item(self.turn_timeout)
+        self.add_item(self.timeout_action)
 
     async def on_submit(self, interaction: discord.Interaction):
         new_name = self.name.value.strip()
@@ -116,61 +181,46 @@ class VetoEditModal(Modal):
             await interaction.response.send_message("Le nom ne peut pas être vide.", ephemeral=True)
             return
 
+        try:
+            compile_schedule(maps, rules)
+            turn_timeout, timeout_action = parse_turn_timer(self.turn_timeout.value, self.timeout_action.value)
+        except InvalidTemplateError as error:
+            await interaction.response.send_message(f"Template invalide : {error}", ephemeral=True)
+            return
+
+        veto_config = self.registry.veto_config
         if new_name != self.template_name:
             if veto_config.get_veto(new_name):
                 await interaction.response.send_message(f"Un template avec le nom '{new_name}' existe déjà.", ephemeral=True)
                 return
             else:
-                veto_config.vetos[new_name] = veto_config.vetos.pop(self.template_name)
+                veto_config.rename_veto(self.template_name, new_name)
                 self.template_name = new_name
 
-        veto_config.update_veto(self.template_name, maps, rules)
+        veto_config.update_veto(self.template_name, maps, rules, turn_timeout, timeout_action)
         await interaction.response.send_message(f"Template de veto '{self.template_name}' mis à jour avec succès.", ephemeral=True)
 
 class TemplateManager:
-    def __init__(self, filename="message_id.json"):
-        self.filename = os.path.join(os.path.dirname(__file__), '..', filename)
-        self.setup_message_id = None
-        self.load_setup_message_id()
-
-    def save_setup_message_id(self, message_id):
-        data = {}
-        # Load existing data
-        if os.path.exists(self.filename):
-            with open(self.filename, 'r') as f:
-                data = json.load(f)
-        
-        # Update setup_message_id while preserving existing keys
-        data['setup_message_id'] = message_id
-        
-        with open(self.filename, 'w') as f:
-            json.dump(data, f, indent=4)
-
-    def load_setup_message_id(self):
-        if os.path.exists(self.filename):
-            with open(self.filename, 'r') as f:
-                data = json.load(f)
-                self.setup_message_id = data.get('setup_message_id')
-
-    def refresh_setup_message_id(self):
-        """Refresh the message id from the file."""
-        self.message_id = self.load_setup_message_id()
+    def __init__(self, registry):
+        self.registry = registry
+        # Embed et vue du panneau construits une fois, réutilisés à chaque clic
+        self.setup_embed = self.create_setup_embed()
+        self.setup_view = self.create_setup_view()
 
     async def update_setup_message(self, channel):
-        self.refresh_setup_message_id()
-        if self.setup_message_id:
+        message_id = self.registry.panels.message_id(channel.guild.id, TEMPLATES_PANEL)
+        if message_id:
             try:
-                message = await channel.fetch_message(self.setup_message_id)
-                await message.edit(embed=self.create_setup_embed(), view=self.create_setup_view())
+                # Édition directe du message connu : pas de fetch ni de lecture sur disque
+                await channel.get_partial_message(message_id).edit(embed=self.setup_embed, view=self.setup_view)
             except discord.NotFound:
                 await self.send_setup_message(channel)
         else:
             await self.send_setup_message(channel)
 
     async def send_setup_message(self, channel):
-        message = await channel.send(embed=self.create_setup_embed(), view=self.create_setup_view())
-        self.setup_message_id = message.id
-        self.save_setup_message_id(message.id)
+        message = await channel.send(embed=self.setup_embed, view=self.setup_view)
+        self.registry.panels.set(channel.guild.id, TEMPLATES_PANEL, channel.id, message.id)
 
     def create_setup_embed(self):
         embed = discord.Embed(
@@ -202,17 +252,19 @@ class TemplateManager:
 
     def create_setup_view(self):
         view = discord.ui.View(timeout=None)
-        view.add_item(ListButton())
-        view.add_item(CreateButton())
-        view.add_item(EditButton())
-        view.add_item(DeleteButton())
+        view.add_item(ListButton(self.registry))
+        view.add_item(CreateButton(self.registry))
+        view.add_item(EditButton(self.registry))
+        view.add_item(DeleteButton(self.registry))
         return view
 
 class ListButton(Button):
-    def __init__(self):
+    def __init__(self, registry):
         super().__init__(label="Liste des Templates", style=discord.ButtonStyle.secondary, custom_id="list_templates")
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
+        veto_config = self.registry.veto_config
         veto_names = list(veto_config.vetos.keys())
         if not veto_names:
             await interaction.response.send_message("Aucun template de veto enregistré.", ephemeral=True)
@@ -227,70 +279,71 @@ class ListButton(Button):
         
         for name in veto_names:
             veto = veto_config.get_veto(name)
+            value = f"Maps: {veto['maps']}\nRules: {veto['rules']}"
+            if veto.get("turn_timeout"):
+                value += f"\nDélai par tour: {veto['turn_timeout']}s ({veto['timeout_action']})"
             embed.add_field(
                 name=name,
-                value=f"Maps: {veto['maps']}\nRules: {veto['rules']}",
+                value=value,
                 inline=False
             )
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
 class CreateButton(Button):
-    def __init__(self):
+    def __init__(self, registry):
         super().__init__(label="Créer un template", style=discord.ButtonStyle.primary, custom_id="create_template")
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
-        modal = VetoCreateModal()
+        modal = VetoCreateModal(self.registry)
         await interaction.response.send_modal(modal)
 
 class EditButton(Button):
-    def __init__(self):
+    def __init__(self, registry):
         super().__init__(label="Éditer un template", style=discord.ButtonStyle.primary, custom_id="edit_template")
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
-        veto_names = list(veto_config.vetos.keys())
+        registry = self.registry
+        veto_config = registry.veto_config
+        veto_names = veto_config.names
         if not veto_names:
             await interaction.response.send_message("Aucun template de veto disponible pour modification.", ephemeral=True)
             return
 
-        class VetoEditSelect(Select):
-            def __init__(self, options):
-                super().__init__(placeholder="Choisissez un template à éditer...", options=options)
-        
-            async def callback(self, interaction: discord.Interaction):
-                selected_template = self.values[0]
+        class VetoEditSelect(PagedSelect):
+            async def on_select(self, interaction: discord.Interaction, values):
+                selected_template = values[0]
                 veto = veto_config.get_veto(selected_template)
                 
                 if not veto:
                     await interaction.response.send_message("Template de veto introuvable.", ephemeral=True)
                     return
                 
-                edit_modal = VetoEditModal(selected_template, veto)
+                edit_modal = VetoEditModal(registry, selected_template, veto)
                 await interaction.response.send_modal(edit_modal)
 
-        select = VetoEditSelect([discord.SelectOption(label=name, value=name) for name in veto_names])
-        view = View()
-        view.add_item(select)
-        await interaction.response.send_message("Sélectionnez un template à éditer :", view=view, ephemeral=True)
+        view = VetoEditSelect(lambda: veto_config.names, placeholder="Choisissez un template à éditer...", prompt="Sélectionnez un template à éditer :")
+        await view.send(interaction)
 
 class DeleteButton(Button):
-    def __init__(self):
+    def __init__(self, registry):
         super().__init__(label="Supprimer un template", style=discord.ButtonStyle.danger, custom_id="delete_template")
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
-        veto_names = list(veto_config.vetos.keys())
+        registry = self.registry
+        veto_names = registry.veto_config.names
         if not veto_names:
             await interaction.response.send_message("Aucun template de veto disponible pour suppression.", ephemeral=True)
             return
 
-        class VetoDeleteSelect(Select):
-            def __init__(self, options):
-                super().__init__(placeholder="Choisissez un template à supprimer...", options=options)
-            
-            async def callback(self, interaction: discord.Interaction):
-                selected_template = self.values[0]
+        class VetoDeleteSelect(PagedSelect):
+            async def on_select(self, interaction: discord.Interaction, values):
+                selected_template = values[0]
                 confirm_view = View()
-                confirm_view.add_item(ConfirmDeleteButton(selected_template))
+                confirm_view.add_item(ConfirmDeleteButton(registry, selected_template))
                 
                 await interaction.response.send_message(
                     f"Êtes-vous sûr de vouloir supprimer le template '{selected_template}' ?",
@@ -298,18 +351,17 @@ class DeleteButton(Button):
                     ephemeral=True
                 )
 
-        select = VetoDeleteSelect([discord.SelectOption(label=name, value=name) for name in veto_names])
-        view = View()
-        view.add_item(select)
-        await interaction.response.send_message("Sélectionnez un template à supprimer :", view=view, ephemeral=True)
+        view = VetoDeleteSelect(lambda: registry.veto_config.names, placeholder="Choisissez un template à supprimer...", prompt="Sélectionnez un template à supprimer :")
+        await view.send(interaction)
 
 class ConfirmDeleteButton(Button):
-    def __init__(self, template_name):
+    def __init__(self, registry, template_name):
         super().__init__(label=f"Confirmer la suppression de {template_name}", style=discord.ButtonStyle.danger, custom_id=f"confirm_delete_{template_name}")
+        self.registry = registry
         self.template_name = template_name
 
     async def callback(self, interaction: discord.Interaction):
-        if veto_config.delete_veto(self.template_name):
+        if self.registry.veto_config.delete_veto(self.template_name):
             await interaction.response.send_message(f"Le template '{self.template_name}' a été supprimé avec succès.", ephemeral=True)
         else:
             await interaction.response.send_message(f"Erreur lors de la suppression du template '{self.template_name}'.", ephemeral=True)
@@ -0,0 +1,99 @@
+import asyncio
+
+# Délai maximal d'attente du thread après la création d'un ticket (secondes)
+THREAD_READY_TIMEOUT = 15.0
+
+
+class ThreadCache:
+    """Associe les capitaines d'un veto au thread Modmail de leur ticket.
+
+    Le thread est lié une fois au lancement du veto puis servi depuis le cache ;
+    l'entrée est invalidée à la fermeture du thread (événement `thread_close` de Modmail).
+    Le lancement attend aussi la création du thread via l'événement `thread_ready`.
+    """
+
+    def __init__(self, ready_timeout=THREAD_READY_TIMEOUT, poll_delay=0.25, max_poll_delay=2.0):
+        self.threads = {}
+        self.hits = 0
+        self.misses = 0
+        self.ready_timeout = ready_timeout
+        self.poll_delay = poll_delay
+        self.max_poll_delay = max_poll_delay
+        self._waiters = {}
+
+    def bind(self, thread, *user_ids):
+        for user_id in user_ids:
+            self.threads[user_id] = thread
+
+    def get(self, user_id):
+        return self.threads.get(user_id)
+
+    async def find(self, bot, user_id):
+        thread = self.threads.get(user_id)
+        if thread is not None:
+            self.hits += 1
+            return thread
+        self.misses += 1
+        thread = await bot.threads.find(recipient_id=user_id)
+        if thread:
+            self.threads[user_id] = thread
+        return thread
+
+    def invalidate(self, thread):
+        for user_id in [user_id for user_id, cached in self.threads.items() if cached is thread]:
+            del self.threads[user_id]
+
+    def expect(self, user_id):
+        """À appeler avant de créer le ticket : le thread prêt sera signalé pour ce destinataire."""
+        future = self._waiters.get(user_id)
+        if future is None or future.done():
+            future = asyncio.get_running_loop().create_future()
+            self._waiters[user_id] = future
+        return future
+
+    def discard(self, user_id, future):
+        """Abandonne l'attente enregistrée par `expect` (ticket non créé, ou thread déjà reçu)."""
+        if self._waiters.get(user_id) is future:
+            del self._waiters[user_id]
+
+    def mark_ready(self, thread):
+        """Appelé par l'écouteur `thread_ready` : lie le thread et réveille les lancements en attente."""
+        recipients = getattr(thread, "recipients", None) or [thread.recipient]
+        for recipient in recipients:
+            self.threads[recipient.id] = thread
+            future = self._waiters.get(recipient.id)
+            if future is not None and not future.done():
+                future.set_result(thread)
+
+    async def wait_ready(self, bot, user_id, timeout=None):
+        """Attend que le thread du destinataire soit prêt.
+
+        Le signal `thread_ready` est prioritaire ; en attendant, la recherche Modmail est
+        retentée avec un délai exponentiel au cas où l'événement serait manqué.
+        Retourne None si le thread n'est pas prêt avant le délai.
+        """
+        loop = asyncio.get_running_loop()
+        future = self._waiters.get(user_id) or self.expect(user_id)
+        deadline = loop.time() + (timeout or self.ready_timeout)
+        delay = self.poll_delay
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return None
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), min(delay, remaining))
+                except asyncio.TimeoutError:
+                    pass
+                thread = await bot.threads.find(recipient_id=user_id)
+                if thread and thread.channel:
+                    self.threads[user_id] = thread
+                    return thread
+                delay = min(delay * 2, self.max_poll_delay)
+        finally:
+            self.discard(user_id, future)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
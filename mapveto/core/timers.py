@@ -0,0 +1,103 @@
+import asyncio
+import heapq
+import itertools
+import logging
+
+from .metrics import log_event
+
+
+class TurnTimerWheel:
+    """Échéances de tour de tous les vetos actifs, servies par une seule tâche.
+
+    Les échéances sont rangées dans un tas ; la tâche dort jusqu'à la plus proche et n'est
+    réveillée plus tôt que si une échéance antérieure est ajoutée. Une échéance remplacée
+    ou annulée reste dans le tas et est ignorée à sa sortie. Chaque expiration tourne dans sa
+    propre tâche : un `on_expire` lent (requêtes Discord) ne retarde pas les autres vetos.
+    """
+
+    def __init__(self, on_expire):
+        # on_expire(session_id, step) : coroutine appelée à l'expiration du tour `step`
+        self.on_expire = on_expire
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+        self._task = None
+        self._wakeup = None
+        # Expirations en cours ; la référence évite qu'une tâche soit collectée avant sa fin
+        self._running = set()
+        self.expired = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def schedule(self, session_id, delay, step):
+        loop = asyncio.get_running_loop()
+        entry = (loop.time() + max(0.0, delay), next(self._counter), session_id, step)
+        self._entries[session_id] = entry
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry or self._task is None:
+            self._wake(loop)
+        self._compact()
+
+    def cancel(self, session_id):
+        self._entries.pop(session_id, None)
+
+    def deadline(self, session_id):
+        """Échéance (horloge de la boucle asyncio) du tour en cours, ou None."""
+        entry = self._entries.get(session_id)
+        return entry[0] if entry else None
+
+    def _compact(self):
+        # Évite que les échéances remplacées ne fassent grossir le tas indéfiniment
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = list(self._entries.values())
+            heapq.heapify(self._heap)
+
+    def _wake(self, loop):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        else:
+            self._wakeup.set()
+
+    def _pop_expired(self, now):
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._entries.get(entry[2]) is entry:
+                del self._entries[entry[2]]
+                expired.append(entry)
+        return expired
+
+    async def _expire(self, session_id, step):
+        try:
+            await self.on_expire(session_id, step)
+        except Exception as error:
+            log_event("turn_expiry_failed", level=logging.ERROR, session_id=session_id, step=step, error=error)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            for _, _, session_id, step in self._pop_expired(loop.time()):
+                self.expired += 1
+                task = loop.create_task(self._expire(session_id, step))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+            while self._heap and self._entries.get(self._heap[0][2]) is not self._heap[0]:
+                heapq.heappop(self._heap)
+            timeout = self._heap[0][0] - loop.time() if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in self._running:
+            task.cancel()
+        self._entries.clear()
+        self._heap.clear()
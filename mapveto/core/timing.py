@@ -0,0 +1,24 @@
+import time
+
+
+class StageTimer:
+    """Mesure la durée de chaque étape d'une opération (lancement de veto, import...)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.stages = {}
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = now - self._last
+        self._last = now
+
+    @property
+    def total(self):
+        return self._last - self.started
+
+    def __str__(self):
+        parts = [f"{stage}={duration * 1000:.0f}ms" for stage, duration in self.stages.items()]
+        parts.append(f"total={self.total * 1000:.0f}ms")
+        return ", ".join(parts)
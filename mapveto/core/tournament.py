@@ -1,57 +1,71 @@
-import json
-import os
 import discord # type: ignore
-from discord.ui import Modal, TextInput, Button, Select, View # type: ignore
+from discord.ui import Modal, TextInput, Button, View # type: ignore
 from discord.ext import commands # type: ignore
 
+from .paginator import PagedSelect, SortedNames
+from .panels import TOURNAMENTS_PANEL
+from .storage import open_storage
+
 class TournamentConfig:
-    def __init__(self, filename="tourney.json"):
-        self.filename = os.path.join(os.path.dirname(__file__), '..', filename)
+    def __init__(self, storage=None):
+        self.storage = storage or open_storage()
         self.tournaments = self.load_tournaments()
+        self.names = SortedNames(self.tournaments)
 
     def load_tournaments(self):
-        if os.path.exists(self.filename):
-            with open(self.filename, "r") as file:
-                return json.load(file)
-        return {}
+        return self.storage.load("tournaments")
 
     def save_tournaments(self):
-        with open(self.filename, "w") as file:
-            json.dump(self.tournaments, file, indent=4)
+        self.storage.replace("tournaments", self.tournaments)
 
     def create_tournament(self, name):
         if name not in self.tournaments:
             self.tournaments[name] = {}
-            self.save_tournaments()
+            self.names.add(name)
+            self.storage.upsert("tournaments", name, self.tournaments[name])
             return True
         return False
 
     def delete_tournament(self, name):
         if name in self.tournaments:
             del self.tournaments[name]
-            self.save_tournaments()
+            self.names.discard(name)
+            self.storage.delete("tournaments", name)
             return True
         return False
 
     def get_tournament(self, name):
         return self.tournaments.get(name, None)
 
+    def set_bracket(self, name, bracket):
+        """Format et avancement du tableau du tournoi (None pour le retirer)."""
+        tournament = self.tournaments[name]
+        if bracket is None:
+            tournament.pop("bracket", None)
+        else:
+            tournament["bracket"] = bracket
+        self.storage.upsert("tournaments", name, tournament)
+
     def update_tournament(self, name, new_name):
         if name in self.tournaments:
             self.tournaments[new_name] = self.tournaments.pop(name)
-            self.save_tournaments()
+            self.names.discard(name)
+            self.names.add(new_name)
+            with self.storage.transaction():
+                self.storage.delete("tournaments", name)
+                self.storage.upsert("tournaments", new_name, self.tournaments[new_name])
             return True
         return False
 
     def refresh_tournaments(self):
-        """Refresh the tournament data from the file."""
+        """Refresh the tournament data from the storage."""
         self.tournaments = self.load_tournaments()
-
-tournament_config = TournamentConfig()
+        self.names = SortedNames(self.tournaments)
 
 class TournamentCreateModal(Modal):
-    def __init__(self):
+    def __init__(self, registry):
         super().__init__(title="Créer un Tournoi")
+        self.registry = registry
         self.name = TextInput(
             label="Nom du Tournoi", placeholder="Entrez le nom du tournoi"
         )
@@ -60,7 +74,7 @@ class TournamentCreateModal(Modal):
     async def on_submit(self, interaction: discord.Interaction):
         tournament_name = self.name.value.strip()
 
-        if tournament_config.create_tournament(tournament_name):
+        if self.registry.tournament_config.create_tournament(tournament_name):
             await interaction.response.send_message(
                 f"Tournoi '{tournament_name}' créé avec succès.", ephemeral=True
             )
@@ -71,8 +85,9 @@ class TournamentCreateModal(Modal):
             )
 
 class TournamentEditModal(Modal):
-    def __init__(self, tournament_name):
+    def __init__(self, registry, tournament_name):
         super().__init__(title=f"Modifier le Tournoi '{tournament_name}'")
+        self.registry = registry
         self.tournament_name = tournament_name
         self.name = TextInput(
             label="Nom du Tournoi",
@@ -90,6 +105,7 @@ class TournamentEditModal(Modal):
             )
             return
 
+        tournament_config = self.registry.tournament_config
         if new_name != self.tournament_name:
             if tournament_config.get_tournament(new_name):
                 await interaction.response.send_message(
@@ -101,6 +117,7 @@ class TournamentEditModal(Modal):
                 tournament_config.update_tournament(
                     self.tournament_name, new_name
                 )
+                self.registry.brackets.rename_tournament(self.tournament_name, new_name)
                 self.tournament_name = new_name
 
         await interaction.response.send_message(
@@ -108,16 +125,18 @@ class TournamentEditModal(Modal):
         )
 
 class TournamentDeleteButton(Button):
-    def __init__(self, tournament_name):
+    def __init__(self, registry, tournament_name):
         super().__init__(
             label=f"Supprimer {tournament_name}",
             style=discord.ButtonStyle.danger,
             custom_id=f"delete_{tournament_name}",
         )
+        self.registry = registry
         self.tournament_name = tournament_name
 
     async def callback(self, interaction: discord.Interaction):
-        if tournament_config.delete_tournament(self.tournament_name):
+        self.registry.brackets.delete_bracket(self.tournament_name)
+        if self.registry.tournament_config.delete_tournament(self.tournament_name):
             await interaction.response.send_message(
                 f"Le tournoi '{self.tournament_name}' a été supprimé avec succès.",
                 ephemeral=True,
@@ -129,54 +148,26 @@ class TournamentDeleteButton(Button):
             )
 
 class TournamentManager:
-    def __init__(self, filename="message_id.json"):
-        self.filename = os.path.join(os.path.dirname(__file__), '..', filename)
-        self.setup_message_id = None
-        self.load_setup_message_id()
-
-    def save_setup_message_id(self, message_id):
-        data = {}
-        # Load existing data
-        if os.path.exists(self.filename):
-            with open(self.filename, 'r') as f:
-                data = json.load(f)
-        
-        # Update setup_message_id while preserving existing keys
-        data['setup_message_id'] = message_id
-        
-        with open(self.filename, 'w') as f:
-            json.dump(data, f, indent=4)
-
-    def load_setup_message_id(self):
-        if os.path.exists(self.filename):
-            with open(self.filename, 'r') as f:
-                data = json.load(f)
-                self.setup_message_id = data.get('setup_message_id')
-
-    def refresh_setup_message_id(self):
-        """Refresh the message id from the file."""
-        self.message_id = self.load_setup_message_id()
+    def __init__(self, registry):
+        self.registry = registry
+        # Embed et vue du panneau construits une fois, réutilisés à chaque clic
+        self.setup_embed = self.create_setup_embed()
+        self.setup_view = self.create_setup_view()
 
     async def update_setup_message(self, channel):
-        self.refresh_setup_message_id()
-        if self.setup_message_id:
+        message_id = self.registry.panels.message_id(channel.guild.id, TOURNAMENTS_PANEL)
+        if message_id:
             try:
-                message = await channel.fetch_message(self.setup_message_id)
-                await message.edit(
-                    embed=self.create_setup_embed(),
-                    view=self.create_setup_view(),
-                )
+                # Édition directe du message connu : pas de fetch ni de lecture sur disque
+                await channel.get_partial_message(message_id).edit(embed=self.setup_embed, view=self.setup_view)
             except discord.NotFound:
                 await self.send_setup_message(channel)
         else:
             await self.send_setup_message(channel)
 
     async def send_setup_message(self, channel):
-        message = await channel.send(
-            embed=self.create_setup_embed(), view=self.create_setup_view()
-        )
-        self.setup_message_id = message.id
-        self.save_setup_message_id(message.id)
+        message = await channel.send(embed=self.setup_embed, view=self.setup_view)
+        self.registry.panels.set(channel.guild.id, TOURNAMENTS_PANEL, channel.id, message.id)
 
     def create_setup_embed(self):
         embed = discord.Embed(
@@ -208,18 +199,19 @@ class TournamentManager:
 
     def create_setup_view(self):
         view = discord.ui.View(timeout=None)
-        view.add_item(ListTournamentsButton())
-        view.add_item(CreateTournamentButton())
-        view.add_item(EditTournamentButton())
-        view.add_item(DeleteTournamentButton())
+        view.add_item(ListTournamentsButton(self.registry))
+        view.add_item(CreateTournamentButton(self.registry))
+        view.add_item(EditTournamentButton(self.registry))
+        view.add_item(DeleteTournamentButton(self.registry))
         return view
 
 class ListTournamentsButton(Button):
-    def __init__(self):
+    def __init__(self, registry):
         super().__init__(label="Liste des Tournois", style=discord.ButtonStyle.secondary, custom_id="list_tournaments")
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
-        tournaments = tournament_config.tournaments
+        tournaments = self.registry.tournament_config.tournaments
         if not tournaments:
             await interaction.response.send_message("Aucun tournoi trouvé.", ephemeral=True)
             return
@@ -232,67 +224,60 @@ class ListTournamentsButton(Button):
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
 class CreateTournamentButton(Button):
-    def __init__(self):
+    def __init__(self, registry):
         super().__init__(label="Créer un tournoi", style=discord.ButtonStyle.primary, custom_id="create_tournament")
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
-        modal = TournamentCreateModal()
+        modal = TournamentCreateModal(self.registry)
         await interaction.response.send_modal(modal)
 
 class EditTournamentButton(Button):
-    def __init__(self):
+    def __init__(self, registry):
         super().__init__(label="Éditer un tournoi", style=discord.ButtonStyle.primary, custom_id="edit_tournament")
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
-
-        tournament_names = list(tournament_config.tournaments.keys())
+        registry = self.registry
+        tournament_config = registry.tournament_config
+        tournament_names = tournament_config.names
         if not tournament_names:
             await interaction.response.send_message("Aucun tournoi disponible pour modification.", ephemeral=True)
             return
 
-        class TournamentEditSelect(Select):
-            def __init__(self, options):
-                super().__init__(placeholder="Choisissez un tournoi à éditer...", options=options)
-
-            async def callback(self, interaction: discord.Interaction):
-                selected_tournament = self.values[0]
+        class TournamentEditSelect(PagedSelect):
+            async def on_select(self, interaction: discord.Interaction, values):
+                selected_tournament = values[0]
                 tournament = tournament_config.get_tournament(selected_tournament)
 
                 if not tournament:
                     await interaction.response.send_message("Tournoi introuvable.", ephemeral=True)
                     return
 
-                modal = TournamentEditModal(selected_tournament)
+                modal = TournamentEditModal(registry, selected_tournament)
                 await interaction.response.send_modal(modal)
 
-        select = TournamentEditSelect(
-            [discord.SelectOption(label=name, value=name) for name in tournament_names]
-        )
-        view = View()
-        view.add_item(select)
-        await interaction.response.send_message("Sélectionnez un tournoi à éditer :", view=view, ephemeral=True)
+        view = TournamentEditSelect(lambda: tournament_config.names, placeholder="Choisissez un tournoi à éditer...", prompt="Sélectionnez un tournoi à éditer :")
+        await view.send(interaction)
 
 class DeleteTournamentButton(Button):
-    def __init__(self):
+    def __init__(self, registry):
         super().__init__(label="Supprimer un tournoi", style=discord.ButtonStyle.danger, custom_id="delete_tournament")
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
-        tournament_names = list(tournament_config.tournaments.keys())
+        registry = self.registry
+        tournament_names = registry.tournament_config.names
         if not tournament_names:
             await interaction.response.send_message("Aucun tournoi disponible pour suppression.", ephemeral=True)
             return
 
-        class TournamentDeleteSelect(Select):
-            def __init__(self, options):
-                super().__init__(placeholder="Choisissez un tournoi à supprimer...", options=options)
-
-            async def callback(self, interaction: discord.Interaction):
-                from .teams import TeamConfig
-                selected_tournament = self.values[0]
+        class TournamentDeleteSelect(PagedSelect):
+            async def on_select(self, interaction: discord.Interaction, values):
+                selected_tournament = values[0]
                 confirm_view = View()
-                confirm_view.add_item(ConfirmTournamentDeleteButton(selected_tournament))
-                team_config = TeamConfig()
-                teams = team_config.get_teams_by_tournament(selected_tournament)
+                confirm_view.add_item(ConfirmTournamentDeleteButton(registry, selected_tournament))
+                teams = registry.team_config.get_teams_by_tournament(selected_tournament)
 
                 if teams:
                     # Si des équipes sont rattachées, afficher un message d'erreur
@@ -307,18 +292,18 @@ class DeleteTournamentButton(Button):
                     ephemeral=True
                 )
 
-        select = TournamentDeleteSelect([discord.SelectOption(label=name, value=name) for name in tournament_names])
-        view = View()
-        view.add_item(select)
-        await interaction.response.send_message("Sélectionnez un tournoi à supprimer :", view=view, ephemeral=True)
+        view = TournamentDeleteSelect(lambda: registry.tournament_config.names, placeholder="Choisissez un tournoi à supprimer...", prompt="Sélectionnez un tournoi à supprimer :")
+        await view.send(interaction)
 
 class ConfirmTournamentDeleteButton(Button):
-    def __init__(self, tournament_name):
+    def __init__(self, registry, tournament_name):
         super().__init__(label=f"Confirmer la suppression de {tournament_name}", style=discord.ButtonStyle.danger, custom_id=f"confirm_delete_tournament_{tournament_name}")
+        self.registry = registry
         self.tournament_name = tournament_name
 
     async def callback(self, interaction: discord.Interaction):
-        if tournament_config.delete_tournament(self.tournament_name):
+        self.registry.brackets.delete_bracket(self.tournament_name)
+        if self.registry.tournament_config.delete_tournament(self.tournament_name):
             await interaction.response.send_message(f"Le tournoi '{self.tournament_name}' a été supprimé avec succès.", ephemeral=True)
         else:
             await interaction.response.send_message(f"Erreur lors de la suppression du tournoi '{self.tournament_name}'.", ephemeral=True)
@@ -1,87 +1,334 @@
-import json
+import logging
 import os
 import asyncio
 import random
+import sqlite3
+import time
+import uuid
 import discord # type: ignore
 from discord.ui import Button, Select, View # type: ignore
 from discord.ext.commands import Context
 
-from .templateveto import MapVetoConfig, veto_config
-from .tournament import TournamentConfig, tournament_config
-from .teams import TeamConfig, team_config
+from .captains import CaptainProfile
+from .mappool import MapPool
+from .metrics import log_event
+from .paginator import PagedSelect
+from .panels import VETO_PANEL
+from .schedule import InvalidTemplateError, compile_schedule
+from .timing import StageTimer
 from core.models import DummyMessage, PermissionLevel # type: ignore
 
 from cogs import modmail # type: ignore
 
-# Charger les configurations
-veto_config = MapVetoConfig()
-vetos = veto_config.load_vetos()
-tournament_config = TournamentConfig()
-tournaments = tournament_config.load_tournaments()
-team_config = TeamConfig()
-teams = team_config.load_teams()
+SIDES = ("Attaque", "Défense")
+
+# Un seul DM « tableau du veto » par capitaine, édité à chaque tour ; 0 pour envoyer un DM par tour
+LIVE_BOARD = os.environ.get("MAPVETO_LIVE_BOARD", "1") != "0"
+
+# custom_id des boutons de tour, relu par MapButton.from_custom_id
+MAP_BUTTON_TEMPLATE = r"mapveto:(?P<session_id>[^:]+):(?P<step>\d+):(?P<index>\d+)"
+
+def create_reply_message(bot, source, content):
+    """Crée un message fictif pour répondre dans un thread Modmail à partir d'un message existant."""
+    dummy_message = DummyMessage(source)
+    dummy_message.author = bot.modmail_guild.me
+    dummy_message.content = content
+
+    # Clear residual attributes
+    dummy_message.attachments = []
+    dummy_message.components = []
+    dummy_message.embeds = []
+    dummy_message.stickers = []
+    return dummy_message
+
+def queue_thread_reply(registry, bot, thread, source, content, **kwargs):
+    """Met en file une réponse dans le thread ; retourne un future résolu une fois le message envoyé."""
+    message = create_reply_message(bot, source, content)
+    return registry.outbox.submit(thread.channel.id, lambda: thread.reply(message, **kwargs))
 
 class MapVeto:
-    def __init__(self, name, maps, team_a_id, team_a_name, team_b_id, team_b_name, rules, channel, bot):
+    def __init__(self, name, maps, team_a_id, team_a_name, team_b_id, team_b_name, rules, channel, bot, registry=None, session_id=None, schedule=None, turn_timeout=None, timeout_action=None):
+        self.session_id = session_id or uuid.uuid4().hex[:12]
         self.name = name
-        self.maps = maps[:]
         self.listmaps = maps[:]
+        self.pool = MapPool(maps)
         self.team_a_id = team_a_id
         self.team_a_name = team_a_name
         self.team_b_id = team_b_id
         self.team_b_name = team_b_name
         self.rules = rules
+        # Suite d'étapes compilée depuis les règles ; current_action est l'index de l'étape en cours
+        self.schedule = schedule or compile_schedule(maps, rules)
         self.current_turn = team_a_id
         self.current_action = 0
         self.picked_maps = []
-        self.picked_maps_only = []
-        self.banned_maps = []
         self.paused = False
         self.stopped = False
         self.channel = channel
         self.participants = [team_a_id, team_b_id]
         self.bot = bot
         self.channel = channel
+        self.registry = registry
+        # Dernier message DM contenant les boutons du tour en cours
+        self.message_id = None
+        # Délai par tour (secondes) et action à l'expiration, repris du template
+        self.turn_timeout = turn_timeout
+        self.timeout_action = timeout_action
+        # Échéance du tour en cours (horodatage Unix), conservée pour la reprise après redémarrage
+        self.turn_deadline = None
+        # Message du ticket servant de base aux réponses dans le thread hors interaction
+        self.anchor = None
+        self.anchor_id = None
+        # Mode tableau : message DM de chaque capitaine et dernier contenu envoyé
+        self.live_board = LIVE_BOARD
+        self.boards = {}
+        self._board_signatures = {}
+        # Coups joués (pour l'archive) et début du tour en cours, pour le temps de réflexion
+        self.started_at = time.time()
+        self.turn_started = None
+        self.moves = []
+
+    @property
+    def maps(self):
+        """Maps encore disponibles, dans l'ordre du template."""
+        return self.pool.remaining()
+
+    @property
+    def banned_maps(self):
+        return self.pool.banned_maps
+
+    @property
+    def picked_maps_only(self):
+        return self.pool.picked_maps
+
+    def to_dict(self):
+        return {
+            "template": self.name,
+            "listmaps": self.listmaps,
+            "pool": self.pool.snapshot(),
+            "team_a_id": self.team_a_id,
+            "team_a_name": self.team_a_name,
+            "team_b_id": self.team_b_id,
+            "team_b_name": self.team_b_name,
+            "rules": self.rules,
+            "current_turn": self.current_turn,
+            "current_action": self.current_action,
+            "picked_maps": self.picked_maps,
+            "paused": self.paused,
+            "channel_id": self.channel.id if self.channel else None,
+            "message_id": self.message_id,
+            "turn_timeout": self.turn_timeout,
+            "timeout_action": self.timeout_action,
+            "turn_deadline": self.turn_deadline,
+            "anchor_id": self.anchor_id,
+            "live_board": self.live_board,
+            "boards": {str(captain_id): message_id for captain_id, message_id in self.boards.items()},
+            "started_at": self.started_at,
+            "turn_started": self.turn_started,
+            "moves": self.moves,
+        }
+
+    @classmethod
+    def from_dict(cls, session_id, data, bot, registry=None):
+        channel = bot.get_channel(data["channel_id"]) if data.get("channel_id") else None
+        veto = cls(
+            data["template"], data["listmaps"], data["team_a_id"], data["team_a_name"],
+            data["team_b_id"], data["team_b_name"], data["rules"], channel, bot,
+            registry=registry, session_id=session_id,
+            turn_timeout=data.get("turn_timeout"), timeout_action=data.get("timeout_action"),
+        )
+        veto.pool = MapPool.restore(data["listmaps"], data["pool"])
+        veto.current_turn = data["current_turn"]
+        veto.current_action = data["current_action"]
+        veto.picked_maps = data["picked_maps"]
+        veto.paused = data["paused"]
+        veto.message_id = data.get("message_id")
+        veto.turn_deadline = data.get("turn_deadline")
+        veto.anchor_id = data.get("anchor_id")
+        veto.live_board = data.get("live_board", False)
+        veto.boards = {int(captain_id): message_id for captain_id, message_id in data.get("boards", {}).items()}
+        veto.started_at = data.get("started_at")
+        veto.turn_started = data.get("turn_started")
+        veto.moves = data.get("moves", [])
+        return veto
+
+    def journal(self):
+        """Enregistre l'état du veto pour pouvoir le reprendre après un redémarrage."""
+        if self.registry is not None:
+            self.registry.sessions.journal(self)
+
+    def set_anchor(self, message):
+        self.anchor = message
+        self.anchor_id = message.id
+
+    async def get_anchor(self):
+        """Message du ticket, récupéré une fois après un redémarrage."""
+        if self.anchor is None and self.anchor_id and self.channel is not None:
+            try:
+                self.anchor = await self.channel.fetch_message(self.anchor_id)
+            except discord.HTTPException:
+                return None
+        return self.anchor
+
+    def create_turn_view(self):
+        """Boutons du tour en cours ; ils ne portent que l'ID de session, l'étape et l'index du choix."""
+        action = self.current_action_type()
+        if action is None:
+            return None
+
+        view = discord.ui.View(timeout=None)
+        if action == "Side":
+            for index, side in enumerate(SIDES):
+                view.add_item(MapButton(self.session_id, self.current_action, index, label=side))
+        else:
+            for index, map_name in enumerate(self.listmaps):
+                view.add_item(MapButton(self.session_id, self.current_action, index, label=map_name, disabled=not self.pool.is_available(map_name)))
+        return view
 
     async def send_ticket_message(self, channel):
         action = self.current_action_type()
         if action is None:
             return
 
-        current_user = self.bot.get_user(self.get_current_turn())
-        if not current_user:
+        captain = await self.registry.captains.get(self.bot, self.get_current_turn())
+        if not captain:
             return
+        current_user = captain.user
 
-        components = []
-        if action == "Side":
-            components.append(MapButton(self.bot, label="Attaque", veto_name=self.name, action_type="side", channel=channel, veto=self))
-            components.append(MapButton(self.bot, label="Défense", veto_name=self.name, action_type="side", channel=channel, veto=self))
-        else:
-            for map_name in self.listmaps:
-                button = MapButton(self.bot, label=map_name, veto_name=self.name, action_type=action.lower(), channel=channel, veto=self)
-                if map_name in self.banned_maps or map_name in self.picked_maps_only:
-                    button.disabled = True
-                components.append(button)
+        # Le délai du tour démarre à l'envoi des boutons
+        self.registry.sessions.arm(self)
+        self.journal()
 
-        view = discord.ui.View(timeout=None)
-        for component in components:
-            view.add_item(component)
+        view = self.create_turn_view()
+        message = self.turn_message(current_user.mention, action)
 
+        async def send():
+            try:
+                sent = await current_user.send(message, view=view)
+            except discord.Forbidden:
+                log_event("dm_forbidden", level=logging.WARNING, session_id=self.session_id, user_id=current_user.id)
+                return None
+            # Les clics passent par l'élément dynamique : la vue n'a pas à rester en mémoire
+            view.stop()
+            self.message_id = sent.id
+            self.journal()
+            return sent
+
+        return self.registry.outbox.submit(("dm", current_user.id), send)
+
+    def turn_message(self, mention, action):
         if action == "Side":
-            if len(self.maps) == 1:
+            if self.pool.remaining_count() == 1:
                 last_picked_map = self.maps[0]
-                message = f"{current_user.mention}, vous devez choisir votre Side sur **{last_picked_map}**."
             else:
                 # Include the last picked map in the message
                 last_picked_map = self.picked_maps[-1]["map"] if self.picked_maps else "Unknown"
-                message = f"{current_user.mention}, vous devez choisir votre Side sur **{last_picked_map}**."
+            return f"{mention}, vous devez choisir votre Side sur **{last_picked_map}**."
+        return f"{mention}, c'est votre tour de {action} une map."
+
+    async def announce_turn(self, channel, interaction=None):
+        """Annonce le tour en cours : tableau des capitaines édité sur place, ou nouveau DM."""
+        self.turn_started = time.time()
+        if not self.live_board:
+            await self.send_ticket_message(channel)
+            return
+        # Le délai du tour démarre à la mise à jour du tableau
+        self.registry.sessions.arm(self)
+        self.journal()
+        await self.update_boards(interaction)
+
+    def render_board(self, captain_id, mention):
+        """Contenu et vue du tableau d'un capitaine ; seuls les boutons du capitaine dont c'est le tour sont affichés."""
+        lines = [
+            f"__**MapVeto {self.team_a_name} VS {self.team_b_name}**__",
+            f"Maps bannies : {', '.join(self.banned_maps) or 'Aucune'}",
+            f"Maps choisies : {', '.join(self.picked_maps_only) or 'Aucune'}",
+            "",
+        ]
+        action = self.current_action_type()
+        view = None
+        if self.stopped or action is None:
+            lines.append("**Veto terminé.**")
+        elif self.paused:
+            lines.append("*Veto en pause.*")
+        elif captain_id == self.current_turn:
+            lines.append(self.turn_message(mention, action))
+            view = self.create_turn_view()
         else:
-            message = f"{current_user.mention}, c'est votre tour de {action} une map."
-
+            waiting = self.team_a_name if self.current_turn == self.team_a_id else self.team_b_name
+            lines.append(f"En attente de l'équipe **{waiting}** ({action}).")
+        return "\n".join(lines), view
+
+    async def update_boards(self, interaction=None):
+        """Met à jour le tableau de chaque capitaine dont le contenu a changé depuis le dernier envoi.
+
+        Le tableau du capitaine qui vient de cliquer est édité par la réponse à l'interaction,
+        sans requête supplémentaire.
+        """
+        for captain_id in dict.fromkeys(self.participants):
+            captain = await self.registry.captains.get(self.bot, captain_id)
+            if not captain:
+                continue
+            content, view = self.render_board(captain_id, captain.mention)
+            signature = (content, self.current_action if view else None)
+            if self._board_signatures.get(captain_id) == signature:
+                continue
+
+            if interaction is not None and interaction.user.id == captain_id and not interaction.response.is_done():
+                self.boards[captain_id] = interaction.message.id
+                await interaction.response.edit_message(content=content, view=view)
+                self._board_signatures[captain_id] = signature
+                if view is not None:
+                    view.stop()
+            else:
+                # Noté dès la mise en file pour ne pas envoyer deux fois le même tableau ; oublié si l'envoi échoue
+                self._board_signatures[captain_id] = signature
+                self.registry.outbox.submit(
+                    ("dm", captain_id),
+                    lambda captain=captain, content=content, view=view, signature=signature: self._push_board(captain, content, view, signature),
+                )
+        self.message_id = self.boards.get(self.current_turn)
+        self.journal()
+
+    def _forget_board(self, captain_id, signature):
+        # Le tableau n'a pas été reçu : la prochaine mise à jour le renverra
+        if self._board_signatures.get(captain_id) == signature:
+            del self._board_signatures[captain_id]
+
+    async def _push_board(self, captain, content, view, signature):
+        message_id = self.boards.get(captain.id)
         try:
-            await current_user.send(message, view=view)
+            sent = None
+            if message_id:
+                channel = captain.user.dm_channel or await captain.user.create_dm()
+                try:
+                    sent = await channel.get_partial_message(message_id).edit(content=content, view=view)
+                except discord.NotFound:
+                    pass  # Tableau supprimé par le capitaine : on en renvoie un
+            if sent is None:
+                sent = await captain.user.send(content, view=view)
         except discord.Forbidden:
-            print(f"Cannot DM user {current_user.id}")
+            self._forget_board(captain.id, signature)
+            log_event("dm_forbidden", level=logging.WARNING, session_id=self.session_id, user_id=captain.id)
+            return None
+        except Exception:
+            self._forget_board(captain.id, signature)
+            raise
+        finally:
+            if view is not None:
+                view.stop()
+        if sent.id == message_id:
+            return sent
+        self.boards[captain.id] = sent.id
+        if captain.id == self.current_turn:
+            self.message_id = sent.id
+        self.journal()
+        return sent
+
+    async def refresh_boards(self):
+        """Reflète une pause, une reprise ou un arrêt dans les tableaux."""
+        if self.live_board:
+            await self.update_boards()
 
     def create_summary_message(self):
         # Initialize the message with a title
@@ -112,7 +359,7 @@ class MapVeto:
             picked_maps_str.append(f"**{last_map}** choisi par {last_chooser}")
 
         # Ajouter la dernière carte par défaut si elle reste non choisie
-        if len(self.maps) == 1:
+        if self.pool.remaining_count() == 1:
             last_map = self.maps[0]
             picked_maps_str.append(f"**{last_map}** choisi par DECIDER / Side Attaque choisi par {last_side_chooser}")
 
@@ -129,138 +376,343 @@ class MapVeto:
         return message
 
     def current_action_type(self):
-        if self.current_action < len(self.rules):
-            return self.rules[self.current_action]
+        if self.current_action < len(self.schedule):
+            return self.schedule[self.current_action].action
         return None
 
     def get_current_turn(self):
         return self.current_turn
 
-    async def next_turn(self, interaction: discord.Interaction):
+    async def next_turn(self, source):
         if self.stopped or self.paused:
             return
 
-        if self.current_action < len(self.rules):
-            current_rule = self.rules[self.current_action]
-            print(f"Processing rule: {current_rule}")
-
-            if current_rule == "Continue":
-                # Allow the same team to play again
-                return
-            else:
-                if current_rule in {"Ban", "Pick", "Side"}:
-                    self.current_turn = self.team_a_id if self.current_turn == self.team_b_id else self.team_b_id
-                    self.current_action += 1
-
-                # Handle consecutive "Continue" rules
-                while self.current_action < len(self.rules) and self.rules[self.current_action] == "Continue":
-                    self.current_action += 1
-                    if self.current_action < len(self.rules) and self.rules[self.current_action] != "Continue":
-                        # Switch turn after exiting consecutive "Continue"
-                        self.current_turn = self.team_a_id if self.current_turn == self.team_b_id else self.team_b_id
-
-                # If there are no more actions, stop the veto
-                if self.current_action >= len(self.rules):
-                    print("No more rules, stopping the veto")
-                    await self.end_veto(interaction)  # Call the method to end the veto
-                    return
-
+        self.current_action += 1
+        if self.current_action < len(self.schedule):
+            step = self.schedule[self.current_action]
+            self.current_turn = self.team_a_id if step.team == 0 else self.team_b_id
+            self.journal()
         else:
-            # No more actions, end the veto
-            print("No more actions, stopping the veto")
-            await self.end_veto()  # Call the method to end the veto
-            return
-        pass
+            # Plus aucun tour : current_turn à None distingue la fin du veto pour play_turn
+            self.current_turn = None
+            await self.end_veto(source)
+
+    def record_move(self, step, action, choice, user_id=None, timed_out=False):
+        """Ajoute un coup à l'archive du veto ; le temps de réflexion court depuis l'annonce du tour."""
+        now = time.time()
+        move = {"step": step, "action": action, "at": now}
+        if action == "side":
+            # Le side porte sur la dernière map choisie (y compris le DECIDER)
+            move["map"] = next((entry["map"] for entry in reversed(self.picked_maps) if "map" in entry), None)
+            move["side"] = choice
+        else:
+            move["map"] = choice
+        if user_id is not None:
+            move["user_id"] = user_id
+            move["team"] = 0 if user_id == self.team_a_id else 1
+            if self.turn_started:
+                move["think"] = round(now - self.turn_started, 3)
+        if timed_out:
+            move["timed_out"] = True
+        self.moves.append(move)
 
     def ban_map(self, map_name):
-        if map_name in self.maps:
-            self.maps.remove(map_name)
-            self.banned_maps.append(map_name)
+        if self.pool.ban(map_name):
+            self.journal()
 
     def pick_map(self, map_name, chooser):
-        if map_name in self.maps:
-            self.maps.remove(map_name)
-            self.picked_maps_only.append(map_name)
+        if self.pool.pick(map_name):
             self.picked_maps.append({"map": map_name, "chooser": chooser})
+            self.journal()
 
     def pick_side(self, side, chooser):
         self.picked_maps.append({"side": side, "chooser": chooser})
+        self.journal()
 
     def pause(self):
         self.paused = True
+        self.registry.sessions.disarm(self)
+        self.journal()
+        log_event("veto_paused", session_id=self.session_id, step=self.current_action)
 
     def resume(self):
         self.paused = False
+        self.registry.sessions.arm(self)
+        self.journal()
+        log_event("veto_resumed", session_id=self.session_id, step=self.current_action)
 
     def stop(self):
         self.stopped = True
         self.paused = False
+        self.registry.sessions.disarm(self)
+        self.journal()
+        log_event("veto_stopped", session_id=self.session_id, step=self.current_action)
     
-    async def end_veto(self, interaction: discord.Interaction):
-        if not self.stopped:
-            self.stopped = True
-            self.paused = False
-    
-            # Créer l'embed de résumé
-            message = self.create_summary_message()
-
-            team_a_user = self.bot.get_user(self.team_a_id)
-            thread = await self.bot.threads.find(recipient=team_a_user)
-
-        if thread:
-            # Préparer le contenu du message
-            msg_content = message
-
-            # Créer un message fictif pour la réponse en utilisant l'objet message existant
-            dummy_message = DummyMessage(interaction.message)  # Utilisez l'objet message d'interaction existant
-            dummy_message.author = self.bot.modmail_guild.me  # Assurez-vous que l'auteur est défini
-            dummy_message.content = msg_content
+    async def play_turn(self, step, action_type, choice, user, source, reason="", interaction=None):
+        """Applique le choix du capitaine pour l'étape `step` puis passe au tour suivant.
+
+        Partagé par les boutons des DMs et par l'expiration du délai de tour ; `user` expose
+        `id`, `display_name` et `mention`, `source` sert de base aux réponses dans le thread.
+        En mode tableau, `interaction` permet d'éditer le tableau du capitaine par la réponse.
+        Retourne False si l'étape a déjà été jouée entre-temps ou si la map n'est plus dans le pool.
+        """
+        registry = self.registry
+        thread = await registry.threads.find(self.bot, self.team_a_id)
+        if step != self.current_action or self.paused or self.stopped:
+            return False
+        if action_type in ("ban", "pick") and not self.pool.is_available(choice):
+            return False
+
+        team_name = self.team_a_name if user.id == self.team_a_id else self.team_b_name
+        if action_type == "ban":
+            self.ban_map(choice)
+            message = f"Map {choice} bannie par {user.display_name}({team_name}){reason}."
+        elif action_type == "pick":
+            self.pick_map(choice, f"*{user.display_name}* ({team_name})")
+            message = f"**Map {choice} choisie par {user.display_name}({team_name}){reason}.**"
+        elif action_type == "side":
+            self.pick_side(choice, f"*{user.display_name}* ({team_name})")
+            message = f"*Side {choice} choisi par {user.display_name}({team_name}){reason}.*"
+        self.record_move(step, action_type, choice, user.id, timed_out=bool(reason))
+
+        if thread and source:
+            queue_thread_reply(registry, self.bot, thread, source, message, anonymous=True, plain=True)
+        log_event("turn_played", session_id=self.session_id, step=step, action=action_type, choice=choice, user_id=user.id, timed_out=bool(reason) or None)
+
+        # DECIDER (et side du DECIDER en fin de veto) enregistrés avant next_turn : end_veto archive le veto complet
+        if self.pool.remaining_count() == 1:
+            last_map = self.maps[0]
+            self.record_move(None, "decider", last_map)
+            self.pick_map(last_map, "DECIDER")
+            if thread and source:
+                message = f"**Map {last_map} choisie par DECIDER.**"
+                queue_thread_reply(registry, self.bot, thread, source, message, anonymous=True, plain=True)
+            if self.current_action + 1 >= len(self.schedule):
+                # Aucun tour ne reste pour le side du DECIDER : Attaque pour le dernier capitaine à avoir joué
+                self.record_move(None, "side", "Attaque")
+                self.pick_side("Attaque", f"*{user.display_name}* ({team_name})")
+                if thread and source:
+                    message = f"*Side Attaque choisi par {user.mention} ({team_name})*"
+                    queue_thread_reply(registry, self.bot, thread, source, message, anonymous=True, plain=True)
+
+        await self.next_turn(source)
+        if self.current_turn is not None:
+            await self.announce_turn(self.channel, interaction)
+        elif self.live_board:
+            # Veto terminé : les tableaux affichent la fin et perdent leurs boutons
+            await self.update_boards(interaction)
+        return True
+
+    async def turn_timed_out(self):
+        """Délai du tour écoulé : choix aléatoire à la place du capitaine, ou mise en pause."""
+        if self.paused or self.stopped:
+            return
+        registry = self.registry
+        step = self.current_action
+        source = await self.get_anchor()
+        if step != self.current_action or self.paused or self.stopped:
+            return
+        log_event("turn_timed_out", session_id=self.session_id, step=step, timeout_action=self.timeout_action)
+
+        if self.timeout_action == "pause":
+            self.pause()
+            thread = await registry.threads.find(self.bot, self.team_a_id)
+            if thread and source:
+                message = f"Temps écoulé : le veto est en pause. Reprise avec `?resume_mapveto {self.session_id}`."
+                queue_thread_reply(registry, self.bot, thread, source, message, anonymous=True, plain=True)
+            await self.refresh_boards()
+            return
 
-            # Clear residual attributes
-            dummy_message.attachments = []
-            dummy_message.components = []
-            dummy_message.embeds = []
-            dummy_message.stickers = []
+        action = self.current_action_type()
+        if action == "Side":
+            action_type, choice = "side", random.choice(["Attaque", "Défense"])
+        else:
+            action_type, choice = action.lower(), random.choice(self.maps)
+
+        captain = await registry.captains.get(self.bot, self.current_turn)
+        if captain is None:
+            team_name = self.team_a_name if self.current_turn == self.team_a_id else self.team_b_name
+            captain = CaptainProfile(self.current_turn, team_name, team_name, f"<@{self.current_turn}>", None)
+        elif self.message_id and not self.live_board:
+            # Retirer les boutons du DM du tour expiré (en mode tableau, la mise à jour du tableau s'en charge)
+            message_id = self.message_id
+            async def clear_buttons():
+                channel = captain.user.dm_channel or await captain.user.create_dm()
+                return await channel.get_partial_message(message_id).edit(view=None)
+            registry.outbox.submit(("dm", captain.id), clear_buttons)
+
+        started = time.perf_counter()
+        if await self.play_turn(step, action_type, choice, captain, source, reason=" (temps écoulé, choix aléatoire)"):
+            registry.metrics.observe("mapveto_turn_seconds", time.perf_counter() - started, source="timeout")
+
+    def archive(self):
+        """Ajoute le veto terminé à l'historique ; une erreur d'écriture ne bloque pas la fin du veto."""
+        team = self.registry.team_config.get_team(self.team_a_name) or {}
+        try:
+            self.registry.history.record(self, team.get("tournament"))
+        except sqlite3.Error as error:
+            log_event("history_write_failed", level=logging.WARNING, session_id=self.session_id, error=error)
 
-            # Utiliser la méthode reply du thread
-            await thread.reply(dummy_message, anonymous=True)
+    async def end_veto(self, source):
+        if self.stopped:
+            return
+        self.stopped = True
+        self.paused = False
+        self.registry.sessions.disarm(self)
+        self.journal()
+        log_event("veto_finished", session_id=self.session_id, template=self.name, maps=",".join(self.picked_maps_only) or None)
+        self.archive()
+
+        # Créer l'embed de résumé
+        message = self.create_summary_message()
+
+        thread = await self.registry.threads.find(self.bot, self.team_a_id)
+        if thread and source:
+            queue_thread_reply(self.registry, self.bot, thread, source, message, anonymous=True)
+
+async def start_veto(bot, registry, template_name, team_a, team_b, channel, anchor):
+    """Crée et enregistre le veto d'un template, puis annonce le premier tour.
+
+    `team_a` (qui commence) et `team_b` sont des couples (ID du capitaine, nom de l'équipe) ;
+    `anchor` est le message du ticket servant de base aux réponses dans le thread.
+    Lève InvalidTemplateError si le template est absent ou invalide.
+    """
+    veto_config = registry.veto_config
+    template = veto_config.vetos.get(template_name)
+    if template is None:
+        raise InvalidTemplateError(f"Aucun template de veto trouvé avec le nom '{template_name}'.")
+    schedule = veto_config.get_schedule(template_name)
+    if schedule is None:
+        raise InvalidTemplateError(f"Le template '{template_name}' est invalide, corrigez-le avant de lancer le veto.")
+
+    (team_a_id, team_a_name), (team_b_id, team_b_name) = team_a, team_b
+    veto = MapVeto(template_name, template["maps"], team_a_id, team_a_name, team_b_id, team_b_name, template["rules"], channel, bot, registry=registry, schedule=schedule,
+                   turn_timeout=template.get("turn_timeout"), timeout_action=template.get("timeout_action"))
+    veto.set_anchor(anchor)
+    registry.sessions.add(veto)
+    log_event("veto_started", session_id=veto.session_id, template=template_name, team_a=team_a_name, team_b=team_b_name, channel_id=channel.id if channel else None)
+    await veto.announce_turn(channel)
+    return veto
+
+class LaunchError(Exception):
+    """Ticket de veto non ouvert ; le message est destiné à l'administrateur."""
+
+async def open_veto_ticket(bot, registry, template_name, team_a_name, team_b_name, context):
+    """Ouvre le ticket Modmail des deux capitaines et y envoie le choix de l'équipe qui commence.
+
+    `context` est le contexte de commande transmis à `contact`. Retourne le thread et les
+    profils des deux capitaines ; lève LaunchError si le ticket ne peut pas être ouvert.
+    """
+    team_config = registry.team_config
+    team_a = team_config.get_team(team_a_name)
+    team_b = team_config.get_team(team_b_name)
+    if not team_a or not team_b:
+        raise LaunchError("Une ou les deux équipes n'existent pas.")
+    team_a_id = int(team_a["captain_discord_id"])
+    team_b_id = int(team_b["captain_discord_id"])
+
+    if not team_a_id or not team_b_id:
+        raise LaunchError("Un ou les deux capitaines ne sont pas trouvés sur le serveur.")
+
+    modmail_cog = bot.get_cog("Modmail")
+    if modmail_cog is None:
+        raise LaunchError("Le cog Modmail n'est pas chargé.")
+
+    # Résoudre les deux capitaines et vérifier leurs threads existants en parallèle
+    timings = StageTimer()
+    captain_a, captain_b, existing_thread_a, existing_thread_b = await asyncio.gather(
+        registry.captains.get(bot, team_a_id),
+        registry.captains.get(bot, team_b_id),
+        registry.threads.find(bot, team_a_id),
+        registry.threads.find(bot, team_b_id),
+    )
+    timings.mark("captains")
+
+    if not captain_a or not captain_b:
+        raise LaunchError("Un ou les deux capitaines ne sont pas trouvés sur le serveur.")
+    team_a_user, team_b_user = captain_a.user, captain_b.user
+
+    # Vérifier si des threads existent déjà pour les utilisateurs
+    errors = []
+    if existing_thread_a:
+        errors.append(f"Un thread pour **{team_a_user.display_name}** existe déjà.")
+    if existing_thread_b:
+        errors.append(f"Un thread pour **{team_b_user.display_name}** existe déjà.")
+
+    if errors:
+        raise LaunchError("\n".join(errors))
+
+    # Se mettre en attente du signal `thread_ready` avant de créer le thread
+    waiter = registry.threads.expect(team_a_id)
+    try:
+        # Créer le thread
+        await modmail_cog.contact(
+            context,
+            [team_a_user, team_b_user],
+            category=None,  # Vous pouvez spécifier une catégorie si besoin
+            manual_trigger=False
+        )
+        timings.mark("contact")
+
+        # Attendre que le thread soit prêt (événement Modmail, sinon recherche avec backoff)
+        thread = await registry.threads.wait_ready(bot, team_a_id)
+        timings.mark("thread_ready")
+    finally:
+        # `contact` en échec : aucun thread ne sera signalé, l'attente ne doit pas rester enregistrée
+        registry.threads.discard(team_a_id, waiter)
+
+    if not thread or not thread.channel:
+        raise LaunchError("Erreur lors de la création du thread.")
+
+    # Lier le ticket aux deux capitaines : les boutons ne refont plus la recherche
+    registry.threads.bind(thread, team_a_id, team_b_id)
+
+    ticket_channel = thread.channel  # Obtenir le canal du thread créé
+
+    # Envoyer l'embed avec la liste déroulante et le bouton dans le thread
+    embed = discord.Embed(
+        title="Sélection de l'équipe qui commence le MapVeto",
+        description=(
+            "\n__Sélectionner dans la liste ci-dessous l'équipe commencera le MapVeto :__\n\n"
+            "*Si vous devez relancer le MapVeto et que la liste ci-dessous n'est plus fonctionnelle, vous pouvez lancer le MapVeto avec la commande :*\n"
+            f"- `?start_mapveto {template_name} {team_a_id} {team_a_name} {team_b_id} {team_b_name}`\n*(Si l'équipe **{team_a_name}** doit démarrer le veto)*\n"
+            f"- `?start_mapveto {template_name} {team_b_id} {team_b_name} {team_a_id} {team_a_name}`\n*(Si l'équipe **{team_b_name}** doit démarrer le veto)*\n"
+        ),
+        color=discord.Color.blue()
+    )
+
+    select = SelectTeamForMapVeto(team_a_name, team_b_name, template_name, bot, registry)
+    view = View(timeout = None)
+    view.add_item(CoinFlipMessage(team_a_name, team_b_name, team_a_id, team_b_id, bot, registry))
+    view.add_item(CoinFlipButton(team_a_name, team_b_name, team_a_id, team_b_id, bot, registry))
+    view.add_item(VetoRdyMessage(team_a_name, team_b_name, team_a_id, team_b_id, bot, registry))
+    view.add_item(select)
+    view.add_item(CloseMapVetoButton(team_a_id, team_b_id, thread, bot, registry))
+    await ticket_channel.send(embed=embed, view=view)
+    timings.mark("ticket_message")
+
+    metrics = registry.metrics
+    metrics.observe("mapveto_launch_seconds", timings.total)
+    for stage, duration in timings.stages.items():
+        metrics.observe("mapveto_launch_stage_seconds", duration, stage=stage)
+    log_event("veto_launched", template=template_name, team_a=team_a_name, team_b=team_b_name, channel_id=ticket_channel.id,
+              **{f"{stage}_ms": round(duration * 1000, 1) for stage, duration in timings.stages.items()}, total_ms=round(timings.total * 1000, 1))
+    return thread, (captain_a, captain_b)
 
 class VetoManager:
-    def __init__(self, bot, filename="message_id.json"):
-        self.filename = os.path.join(os.path.dirname(__file__), '..', filename)
+    def __init__(self, bot, registry):
         self.bot = bot
-        self.setup_message_id = None
-        self.load_veto_setup_message_id()
-
-    def save_veto_setup_message_id(self, message_id):
-        data = {}
-        # Load existing data
-        if os.path.exists(self.filename):
-            with open(self.filename, 'r') as f:
-                data = json.load(f)
-        
-        # Update setup_message_id while preserving existing keys
-        data['setup_veto_message_id'] = message_id
-        
-        with open(self.filename, 'w') as f:
-            json.dump(data, f, indent=4)
-
-    def load_veto_setup_message_id(self):
-        if os.path.exists(self.filename):
-            with open(self.filename, 'r') as f:
-                data = json.load(f)
-                self.setup_message_id = data.get('setup_veto_message_id')
-
-    def refresh_veto_setup_message_id(self):
-        """Refresh the message id from the file."""
-        self.message_id = self.load_veto_setup_message_id()
+        self.registry = registry
+        # Embed et vue du panneau construits une fois, réutilisés à chaque clic
+        self.setup_embed = self.create_veto_setup_embed()
+        self.setup_view = self.create_veto_setup_view()
 
     async def update_veto_setup_message(self, channel):
-        self.refresh_veto_setup_message_id()
-        if self.setup_message_id:
+        message_id = self.registry.panels.message_id(channel.guild.id, VETO_PANEL)
+        if message_id:
             try:
-                message = await channel.fetch_message(self.setup_message_id)
-                await message.edit(embed=self.create_veto_setup_embed(), view=self.create_veto_setup_view())
+                # Édition directe du message connu : pas de fetch ni de lecture sur disque
+                await channel.get_partial_message(message_id).edit(embed=self.setup_embed, view=self.setup_view)
             except discord.NotFound:
                 await self.send_veto_setup_message(channel)
         else:
@@ -276,72 +728,58 @@ class VetoManager:
 
     def create_veto_setup_view(self):
         view = discord.ui.View(timeout=None)
-        view.add_item(MapVetoButton())
+        view.add_item(MapVetoButton(self.registry))
         return view
 
     async def send_veto_setup_message(self, channel):
-        message = await channel.send(embed=self.create_veto_setup_embed(), view=self.create_veto_setup_view())
-        self.setup_message_id = message.id
-        self.save_veto_setup_message_id(message.id)
+        message = await channel.send(embed=self.setup_embed, view=self.setup_view)
+        self.registry.panels.set(channel.guild.id, VETO_PANEL, channel.id, message.id)
 
 class MapVetoButton(Button):
-    def __init__(self):
+    def __init__(self, registry):
         super().__init__(label="Lancer un MapVeto", style=discord.ButtonStyle.primary)
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
-        vetos = veto_config.vetos
+        vetos = self.registry.veto_config.vetos
         if not vetos:
             await interaction.response.send_message("Le MapVeto ne peut pas être lancé car aucun template de veto n'a été créé.", ephemeral=True)
             return
 
-        select = TemplateSelect(interaction.client)
-        view = View()
-        view.add_item(select)
-        await interaction.response.send_message("Choisissez un template de veto:", view=view, ephemeral=True) 
+        view = TemplateSelect(interaction.client, self.registry)
+        await view.send(interaction)
 
-class TemplateSelect(Select):
-    def __init__(self, bot):
+class TemplateSelect(PagedSelect):
+    def __init__(self, bot, registry):
         self.bot = bot
-        self.vetos = veto_config.load_vetos()
-        options = [
-            discord.SelectOption(
-                label=template, 
-                description=f"Règles: {self.vetos[template]['rules']}",
-                value=template
-            )
-            for template in self.vetos.keys()
-        ]
-        super().__init__(placeholder="Choisir un template de veto...", min_values=1, max_values=1, options=options)
+        self.registry = registry
+        super().__init__(lambda: registry.veto_config.names, placeholder="Choisir un template de veto...", prompt="Choisissez un template de veto:")
 
-    async def callback(self, interaction: discord.Interaction):
-        template_name = self.values[0]
-        tournaments = tournament_config.tournaments
+    def describe(self, name):
+        veto = self.registry.veto_config.get_veto(name)
+        return f"Règles: {veto['rules']}" if veto else None
+
+    async def on_select(self, interaction: discord.Interaction, values):
+        template_name = values[0]
+        tournaments = self.registry.tournament_config.tournaments
 
         if not tournaments:
             await interaction.response.send_message("Le MapVeto ne peut pas être lancé car aucun tournoi n'a trouvé.", ephemeral=True)
             return
         
-        select = TournamentSelect(template_name, self.bot)
-        view = View()
-        view.add_item(select)
-        await interaction.response.send_message(f"Template choisi: {template_name}", view=view, ephemeral=True)
+        view = TournamentSelect(template_name, self.bot, self.registry)
+        await view.send(interaction)
 
-class TournamentSelect(Select):
-    def __init__(self, template_name, bot):
+class TournamentSelect(PagedSelect):
+    def __init__(self, template_name, bot, registry):
         self.template_name = template_name
         self.bot = bot
-        self.tournaments = tournament_config.load_tournaments()
+        self.registry = registry
+        super().__init__(lambda: registry.tournament_config.names, placeholder="Choisir un tournoi...", prompt=f"Template choisi: {template_name}")
 
-        options = [
-            discord.SelectOption(label=name, value=name)
-            for name in self.tournaments
-        ]
-
-        super().__init__(placeholder="Choisir un tournoi...", min_values=1, max_values=1, options=options)
-
-    async def callback(self, interaction: discord.Interaction):
-        tournament_name = self.values[0]
-        teams = team_config.get_teams_by_tournament(tournament_name)
+    async def on_select(self, interaction: discord.Interaction, values):
+        tournament_name = values[0]
+        teams = self.registry.team_config.get_teams_by_tournament(tournament_name)
 
         if not teams:
             await interaction.response.send_message(
@@ -350,133 +788,56 @@ class TournamentSelect(Select):
             )
             return
         
-        select = TeamSelect(tournament_name, self.template_name, self.bot)
-        view = View()
-        view.add_item(select)
-        await interaction.response.send_message(f"Tournament choisi: {tournament_name}", view=view, ephemeral=True)
+        view = TeamSelect(tournament_name, self.template_name, self.bot, self.registry)
+        await view.send(interaction)
 
-class TeamSelect(Select):
-    def __init__(self, tournament_name, template_name, bot):
+class TeamSelect(PagedSelect):
+    def __init__(self, tournament_name, template_name, bot, registry):
         self.template_name = template_name
         self.tournament_name = tournament_name
         self.bot = bot
-        self.teams = team_config.refresh_teams()
-
-        # Filtrer les équipes pour le tournoi spécifié
-        teams = team_config.get_teams_by_tournament(tournament_name)
-
-        # Préparer les options avec les descriptions des capitaines
-        options = []
-        for team in teams:
-            captain_id = int(teams[team]["captain_discord_id"])
-            captain_user = self.bot.get_user(captain_id)
-            if captain_user:
-                description = f"Capitaine : {captain_user.name}"
-            else:
-                description = "Capitaine non trouvé"
-            options.append(discord.SelectOption(label=team, description=description, value=team))
-
-        super().__init__(placeholder="Choisir deux équipes...", min_values=2, max_values=2, options=options)
-
-    async def callback(self, interaction: discord.Interaction):
-            await interaction.response.defer(ephemeral=True)       
-            team_a_name, team_b_name = self.values
-            team_a_id = int(teams[team_a_name]["captain_discord_id"])
-            team_b_id = int(teams[team_b_name]["captain_discord_id"])
-
-            if not team_a_id or not team_b_id:
-                await interaction.followup.send("Un ou les deux capitaines ne sont pas trouvés sur le serveur.", ephemeral=True)
-                return
-
-            # Récupérer les objets utilisateur à partir des IDs
-            team_a_user = await self.bot.fetch_user(team_a_id)
-            team_b_user = await self.bot.fetch_user(team_b_id)
-
-            if not team_a_user or not team_b_user:
-                await interaction.followup.send("Un ou les deux capitaines ne sont pas trouvés sur le serveur.", ephemeral=True)
-                return
-
-            # Vérifier si des threads existent déjà pour les utilisateurs
-            errors = []
-            modmail_cog = self.bot.get_cog("Modmail")
-            if modmail_cog is None:
-                await interaction.followup.send("Le cog Modmail n'est pas chargé.", ephemeral=True)
-                return
-
-            existing_thread_a = await self.bot.threads.find(recipient=team_a_user)
-            existing_thread_b = await self.bot.threads.find(recipient=team_b_user)
-
-            if existing_thread_a:
-                errors.append(f"Un thread pour **{team_a_user.display_name}** existe déjà.")
-            if existing_thread_b:
-                errors.append(f"Un thread pour **{team_b_user.display_name}** existe déjà.")
-
-            if errors:
-                await interaction.followup.send("\n".join(errors), ephemeral=True)
-                return
-
-            # Crée le ticket avec les capitaines d'équipe
-            category = None  # Vous pouvez spécifier une catégorie si besoin
-            users = [team_a_user, team_b_user]
-
-            # Créez un contexte factice pour appeler la commande `contact`
-            fake_context = await self.bot.get_context(interaction.message)
-
-            # Créer le thread
-            await modmail_cog.contact(
-                fake_context,  # passez le contexte de commande factice
-                users,
-                category=category,
-                manual_trigger=False
-            )
-
-            # Pause explicite pour attendre la création complète du thread
-            await asyncio.sleep(2)
-
-            # Trouver le thread pour s'assurer qu'il est prêt
-            thread = await self.bot.threads.find(recipient=team_a_user)
-
-            if not thread or not thread.channel:
-                await interaction.followup.send("Erreur lors de la création du thread.", ephemeral=True)
-                return
-
-            ticket_channel = thread.channel  # Obtenir le canal du thread créé
-
-            # Envoyer l'embed avec la liste déroulante et le bouton dans le thread
-            embed = discord.Embed(
-                title="Sélection de l'équipe qui commence le MapVeto",
-                description=(
-                    "\n__Sélectionner dans la liste ci-dessous l'équipe commencera le MapVeto :__\n\n"
-                    "*Si vous devez relancer le MapVeto et que la liste ci-dessous n'est plus fonctionnelle, vous pouvez lancer le MapVeto avec la commande :*\n"
-                    f"- `?start_mapveto {self.template_name} {team_a_id} {team_a_name} {team_b_id} {team_b_name}`\n*(Si l'équipe **{team_a_name}** doit démarrer le veto)*\n"
-                    f"- `?start_mapveto {self.template_name} {team_b_id} {team_b_name} {team_a_id} {team_a_name}`\n*(Si l'équipe **{team_b_name}** doit démarrer le veto)*\n"
-                ),
-                color=discord.Color.blue()
-            )
+        self.registry = registry
+
+        # Équipes du tournoi spécifié, relues à chaque page (l'index est reconstruit par un import) ;
+        # les deux choix peuvent venir de pages différentes
+        super().__init__(lambda: registry.team_config.team_names(tournament_name), placeholder="Choisir deux équipes...", prompt=f"Tournament choisi: {tournament_name}", max_values=2)
+
+    def describe(self, name):
+        # Description du capitaine calculée pour la page affichée uniquement
+        team = self.registry.team_config.get_team(name)
+        if team is None:
+            # Équipe supprimée ou renommée pendant que la liste est ouverte
+            return None
+        captain = self.registry.captains.peek(self.bot, int(team["captain_discord_id"]))
+        if captain:
+            return f"Capitaine : {captain.name}"
+        return "Capitaine non trouvé"
+
+    async def on_select(self, interaction: discord.Interaction, values):
+        await interaction.response.defer(ephemeral=True)
+        team_a_name, team_b_name = values
+
+        # Créez un contexte factice pour appeler la commande `contact`
+        fake_context = await self.bot.get_context(interaction.message)
+        try:
+            thread, (captain_a, captain_b) = await open_veto_ticket(self.bot, self.registry, self.template_name, team_a_name, team_b_name, fake_context)
+        except LaunchError as error:
+            await interaction.followup.send(str(error), ephemeral=True)
+            return
 
-            select = SelectTeamForMapVeto(team_a_name, team_b_name, self.template_name, self.bot)
-            view = View(timeout = None)
-            view.add_item(CoinFlipMessage(team_a_name, team_b_name, team_a_id, team_b_id, self.bot))
-            view.add_item(CoinFlipButton(team_a_name, team_b_name, team_a_id, team_b_id, self.bot))
-            view.add_item(VetoRdyMessage(team_a_name, team_b_name, team_a_id, team_b_id, self.bot))
-            view.add_item(select)
-            view.add_item(CloseMapVetoButton(team_a_id, team_b_id, thread, self.bot))
-            await ticket_channel.send(embed=embed, view=view)
-
-            await interaction.followup.send(
-                f"Le ticket a été créé avec succès pour le MapVeto du match : **{team_a_name}**(Capitaine : {team_a_user.display_name}) VS **{team_b_name}**(Capitaine : {team_b_user.display_name}).\n\n"
-                f"Accédez au thread ici : <#{ticket_channel.id}>",
-                ephemeral=True
-            )
+        await interaction.followup.send(
+            f"Le ticket a été créé avec succès pour le MapVeto du match : **{team_a_name}**(Capitaine : {captain_a.display_name}) VS **{team_b_name}**(Capitaine : {captain_b.display_name}).\n\n"
+            f"Accédez au thread ici : <#{thread.channel.id}>",
+            ephemeral=True
+        )
 
 class SelectTeamForMapVeto(Select):
-    def __init__(self, team_a_name, team_b_name, template_name, bot):
+    def __init__(self, team_a_name, team_b_name, template_name, bot, registry):
         self.template_name = template_name
         self.team_a_name = team_a_name
         self.team_b_name = team_b_name
         self.bot = bot
-
-        self.teams = team_config.load_teams()
+        self.registry = registry
 
         options = [
             discord.SelectOption(label=team_a_name, description=f"{team_a_name} commence", value=team_a_name),
@@ -487,177 +848,122 @@ class SelectTeamForMapVeto(Select):
 
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
-        teams = team_config.load_teams()
+        team_config = self.registry.team_config
         starting_team = self.values[0]
         other_team = self.team_b_name if starting_team == self.team_a_name else self.team_a_name
 
         # Obtenir les IDs des capitaines des équipes
-        starting_team_id = int(teams[starting_team]["captain_discord_id"])
-        other_team_id = int(teams[other_team]["captain_discord_id"])
+        starting_team_id = int(team_config.get_team(starting_team)["captain_discord_id"])
+        other_team_id = int(team_config.get_team(other_team)["captain_discord_id"])
 
-        maps = veto_config.vetos[self.template_name]["maps"]
-        rules = veto_config.vetos[self.template_name]["rules"]
-        ticket_channel = interaction.channel
-
-        veto = MapVeto(self.template_name, maps, starting_team_id, starting_team, other_team_id, other_team, rules, ticket_channel, self.bot)
-        vetos[self.template_name] = veto
-
-        await veto.send_ticket_message(ticket_channel)
+        try:
+            await start_veto(self.bot, self.registry, self.template_name, (starting_team_id, starting_team), (other_team_id, other_team), interaction.channel, interaction.message)
+        except InvalidTemplateError as error:
+            await interaction.followup.send(str(error), ephemeral=True)
 
 class CoinFlipButton(Button):
-    def __init__(self, team_a_name, team_b_name, team_a_id, team_b_id, bot):
+    def __init__(self, team_a_name, team_b_name, team_a_id, team_b_id, bot, registry):
         super().__init__(label="Lancer le coinflip", style=discord.ButtonStyle.green, custom_id="coinflip")
         self.team_a_name = team_a_name
         self.team_b_name = team_b_name
         self.team_a_id = team_a_id
         self.team_b_id = team_b_id
         self.bot = bot
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
 
         result = random.choice([self.team_a_name, self.team_b_name])
         
-        team_a_user = self.bot.get_user(self.team_a_id)
-        team_b_user = self.bot.get_user(self.team_b_id)
+        team_a_user = self.registry.captains.peek(self.bot, self.team_a_id)
+        team_b_user = self.registry.captains.peek(self.bot, self.team_b_id)
 
         if team_a_user and team_b_user:
             # Find the existing thread for one of the team captains
-            thread = await self.bot.threads.find(recipient=team_a_user)
+            thread = await self.registry.threads.find(self.bot, self.team_a_id)
 
             if thread:
-                # Prepare messages for both team captains
                 msg_content = f"L'équipe **{result}** remporte le CoinFlip !"
-
-                # Create dummy messages to use for replies
-                dummy_message = DummyMessage(interaction.message)
-                dummy_message.author = self.bot.modmail_guild.me  # Assuming the bot user is used as author
-                dummy_message.content = msg_content
-
-                # Clear residual attributes
-                dummy_message.attachments = []
-                dummy_message.components = []
-                dummy_message.embeds = []
-                dummy_message.stickers = []
-
-                # Use the thread's reply method to send the messages
-                await thread.reply(dummy_message, anonymous=True, plain=True)
+                queue_thread_reply(self.registry, self.bot, thread, interaction.message, msg_content, anonymous=True, plain=True)
         else:
             await interaction.followup.send("Un ou les deux capitaines ne sont pas trouvés pour envoyer le résultat.", ephemeral=True)
 
 class CoinFlipMessage(Button):
-    def __init__(self, team_a_name, team_b_name, team_a_id, team_b_id, bot):
+    def __init__(self, team_a_name, team_b_name, team_a_id, team_b_id, bot, registry):
         super().__init__(label="Prêt pour le CoinFlip?", style=discord.ButtonStyle.grey, custom_id="rdy_coinflip")
         self.team_a_name = team_a_name
         self.team_b_name = team_b_name
         self.team_a_id = team_a_id
         self.team_b_id = team_b_id
         self.bot = bot
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
         
-        team_a_user = self.bot.get_user(self.team_a_id)
-        team_b_user = self.bot.get_user(self.team_b_id)
+        team_a_user = self.registry.captains.peek(self.bot, self.team_a_id)
+        team_b_user = self.registry.captains.peek(self.bot, self.team_b_id)
         
         if team_a_user and team_b_user:
             # Find the existing thread for one of the team captains
-            thread = await self.bot.threads.find(recipient=team_a_user)
+            thread = await self.registry.threads.find(self.bot, self.team_a_id)
 
             if thread:
-                # Prepare messages for both team captains
                 msg_content = f"{self.team_a_name} et {self.team_b_name}, êtes-vous prêt pour lancer le CoinFlip ?"
-
-                # Create dummy messages to use for replies
-                dummy_message = DummyMessage(interaction.message)
-                dummy_message.author = self.bot.modmail_guild.me  # Assuming the bot user is used as author
-                dummy_message.content = msg_content
-
-                # Clear residual attributes
-                dummy_message.attachments = []
-                dummy_message.components = []
-                dummy_message.embeds = []
-                dummy_message.stickers = []
-
-                # Use the thread's reply method to send the messages
-                await thread.reply(dummy_message, anonymous=True, plain=True)
+                queue_thread_reply(self.registry, self.bot, thread, interaction.message, msg_content, anonymous=True, plain=True)
         else:
-            await interaction.response.send_message("Un ou les deux capitaines ne sont pas trouvés.", ephemeral=True)
+            await interaction.followup.send("Un ou les deux capitaines ne sont pas trouvés.", ephemeral=True)
 
 class VetoRdyMessage(Button):
-    def __init__(self, team_a_name, team_b_name, team_a_id, team_b_id, bot):
+    def __init__(self, team_a_name, team_b_name, team_a_id, team_b_id, bot, registry):
         super().__init__(label="Prêt pour le MapVeto?", style=discord.ButtonStyle.grey, custom_id="rdy_mapveto")
         self.team_a_name = team_a_name
         self.team_b_name = team_b_name
         self.team_a_id = team_a_id
         self.team_b_id = team_b_id
         self.bot = bot
+        self.registry = registry
 
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
 
         # Retrieve users based on IDs
-        team_a_user = self.bot.get_user(self.team_a_id)
-        team_b_user = self.bot.get_user(self.team_b_id)
+        team_a_user = self.registry.captains.peek(self.bot, self.team_a_id)
+        team_b_user = self.registry.captains.peek(self.bot, self.team_b_id)
 
         if team_a_user and team_b_user:
             # Find the existing thread for one of the team captains
-            thread = await self.bot.threads.find(recipient=team_a_user)
+            thread = await self.registry.threads.find(self.bot, self.team_a_id)
 
             if thread:
-                # Prepare messages for both team captains
                 msg_content = f"{self.team_a_name} et {self.team_b_name}, êtes-vous prêt pour lancer le MapVeto ?"
-
-                # Create dummy messages to use for replies
-                dummy_message = DummyMessage(interaction.message)
-                dummy_message.author = self.bot.modmail_guild.me  # Assuming the bot user is used as author
-                dummy_message.content = msg_content
-
-                # Clear residual attributes
-                dummy_message.attachments = []
-                dummy_message.components = []
-                dummy_message.embeds = []
-                dummy_message.stickers = []
-
-                # Use the thread's reply method to send the messages
-                await thread.reply(dummy_message, anonymous=True, plain=True)
+                queue_thread_reply(self.registry, self.bot, thread, interaction.message, msg_content, anonymous=True, plain=True)
         else:
-            await interaction.response.send_message("Un ou les deux capitaines ne sont pas trouvés.", ephemeral=True)
+            await interaction.followup.send("Un ou les deux capitaines ne sont pas trouvés.", ephemeral=True)
 
 class CloseMapVetoButton(Button):
-    def __init__(self, team_a_id, team_b_id, thread, bot):
+    def __init__(self, team_a_id, team_b_id, thread, bot, registry):
         super().__init__(label="Fermer le Map Veto", style=discord.ButtonStyle.danger, custom_id="close_mapveto")
         self.team_a_id = team_a_id
         self.team_b_id = team_b_id
         self.thread = thread
         self.bot = bot
+        self.registry = registry
         
     async def callback(self, interaction: discord.Interaction):
         modmail_cog = self.bot.get_cog('Modmail')
-        team_a_user = self.bot.get_user(self.team_a_id)
-        team_b_user = self.bot.get_user(self.team_b_id)
+        team_a_user = self.registry.captains.peek(self.bot, self.team_a_id)
+        team_b_user = self.registry.captains.peek(self.bot, self.team_b_id)
 
         if team_a_user and team_b_user:
             # Find the existing thread for one of the team captains
-            thread = await self.bot.threads.find(recipient=team_a_user)
+            thread = await self.registry.threads.find(self.bot, self.team_a_id)
 
             if thread:
-                # Prepare messages for both team captains
                 msg_content = f"Le MapVeto est fini. Bonne chance pour votre match!\n\nCe ticket va être fermé. Si vous avez des questions, merci de nous contacter en passant par #teddy."
-
-                # Create dummy messages to use for replies
-                dummy_message = DummyMessage(interaction.message)
-                dummy_message.author = self.bot.modmail_guild.me  # Assuming the bot user is used as author
-                dummy_message.content = msg_content
-
-                # Clear residual attributes
-                dummy_message.attachments = []
-                dummy_message.components = []
-                dummy_message.embeds = []
-                dummy_message.stickers = []
-
-                # Use the thread's reply method to send the messages
-                await thread.reply(dummy_message, anonymous=True, plain=True)
+                # Le message doit être parti avant la fermeture du thread
+                await queue_thread_reply(self.registry, self.bot, thread, interaction.message, msg_content, anonymous=True, plain=True)
         else:
             await interaction.response.send_message("Un ou les deux capitaines ne sont pas trouvés.", ephemeral=True)
 
@@ -676,27 +982,39 @@ class CloseMapVetoButton(Button):
         dummy_context = DummyContext(bot=self.bot, author=interaction.user, channel=self.thread, thread=self.thread)
         await modmail_cog.close(dummy_context, option="silent")
 
-class MapButton(discord.ui.Button):
-    def __init__(self, bot, label, veto_name, action_type, channel, veto):
-        super().__init__(label=label, style=discord.ButtonStyle.primary, custom_id=f"{veto_name}_{label}_{action_type}")
-        self.veto_name = veto_name
-        self.action_type = action_type
-        self.channel = channel
-        self.veto = veto  # Add the veto object reference
-        self.current_action = 0
-        self.paused = False
-        self.stopped = False
-        self.bot = bot
+class MapButton(discord.ui.DynamicItem[discord.ui.Button], template=MAP_BUTTON_TEMPLATE):
+    """Bouton de choix d'un tour, sans état : `mapveto:<session>:<étape>:<index>`.
+
+    Le veto est retrouvé dans les sessions à chaque clic ; les boutons restent donc
+    utilisables après un redémarrage sans réenregistrer de vue.
+    """
+
+    def __init__(self, session_id, step, index, label=None, disabled=False):
+        super().__init__(
+            discord.ui.Button(
+                label=label,
+                style=discord.ButtonStyle.primary,
+                disabled=disabled,
+                custom_id=f"mapveto:{session_id}:{step}:{index}",
+            )
+        )
+        self.session_id = session_id
+        self.step = step
+        self.index = index
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item, match):
+        return cls(match["session_id"], int(match["step"]), int(match["index"]))
 
     async def callback(self, interaction: discord.Interaction):
-        veto = self.veto  # Use the passed veto object
-        team_a_user = self.bot.get_user(veto.team_a_id)
-        thread = await self.bot.threads.find(recipient=team_a_user)
+        started = time.perf_counter()
+        cog = interaction.client.get_cog("MapVetoCog")
+        veto = cog.registry.sessions.get(self.session_id) if cog else None
         if not veto:
             await interaction.response.send_message("Veto non trouvé.", ephemeral=True)
             return
 
-        if self.paused or self.stopped:
+        if veto.paused or veto.stopped:
             await interaction.response.send_message("Le veto est actuellement en pause ou a été arrêté.", ephemeral=True)
             return
 
@@ -704,50 +1022,39 @@ class MapButton(discord.ui.Button):
             await interaction.response.send_message("Ce n'est pas votre tour.", ephemeral=True)
             return
 
-        team_name = veto.team_a_name if interaction.user.id == veto.team_a_id else veto.team_b_name
-        if self.action_type == "ban":
-            veto.ban_map(self.label)
-            message = f"Map {self.label} bannie par {interaction.user.display_name}({team_name})."
-        elif self.action_type == "pick":
-            veto.pick_map(self.label, f"*{interaction.user.display_name}* ({team_name})")
-            message = f"**Map {self.label} choisie par {interaction.user.display_name}({team_name}).**"
-        elif self.action_type == "side":
-            veto.pick_side(self.label, f"*{interaction.user.display_name}* ({team_name})")
-            message = f"*Side {self.label} choisi par {interaction.user.display_name}({team_name}).*"
-
-        if thread:
-            # Use thread.reply to send messages to the thread
-            dummy_message = DummyMessage(interaction.message)
-            dummy_message.author = self.bot.modmail_guild.me
-            dummy_message.content = message
-
-            dummy_message.attachments = []
-            dummy_message.components = []
-            dummy_message.embeds = []
-            dummy_message.stickers = []
-
-            await thread.reply(dummy_message, anonymous=True, plain=True)
-
-        await veto.next_turn(interaction)
-        if veto.current_turn is not None:
-            if len(veto.maps) == 1:
-                last_map = veto.maps[0]
-                veto.pick_map(last_map, "DECIDER")
-                message = f"**Map {last_map} choisie par DECIDER.**"
-                dummy_message.content = message
-                await thread.reply(dummy_message, anonymous=True, plain=True)
+        # Bouton d'un tour déjà joué (par exemple à l'expiration du délai)
+        step = self.step
+        action = veto.current_action_type()
+        if step != veto.current_action or action is None:
+            await interaction.response.send_message("Ce tour est terminé.", ephemeral=True)
+            return
+        action_type = action.lower()
+        choices = SIDES if action == "Side" else veto.listmaps
+        if self.index >= len(choices):
+            await interaction.response.send_message("Choix invalide.", ephemeral=True)
+            return
+        choice = choices[self.index]
+        # Bouton périmé (tableau non rafraîchi, DM en retard) : la map a déjà été bannie ou choisie
+        if action != "Side" and not veto.pool.is_available(choice):
+            await interaction.response.send_message(f"La map **{choice}** n'est plus disponible.", ephemeral=True)
+            return
 
-            await veto.send_ticket_message(self.channel)  # Correct method call
-        else:
-            last_side_chooser = f"{interaction.user.mention} ({team_name})"
-            message = f"*Side Attaque choisi par {last_side_chooser}*"
-            dummy_message.content = message
-            await thread.reply(dummy_message, anonymous=True, plain=True)
+        # Les messages du thread partent via la file d'envoi ; en mode tableau, la réponse à
+        # l'interaction édite directement le tableau du capitaine
+        if not veto.live_board:
+            await interaction.response.defer()
+        registry = veto.registry
+        played = await veto.play_turn(step, action_type, choice, interaction.user, interaction.message, interaction=interaction)
+        if not interaction.response.is_done():
+            await interaction.response.defer()
+        if played:
+            registry.metrics.observe("mapveto_turn_seconds", time.perf_counter() - started, source="button")
+        if not played or veto.live_board:
+            return
 
         # Disable the button and update the message
-        view = discord.ui.View()
-        for item in interaction.message.components[0].children:
+        view = discord.ui.View.from_message(interaction.message, timeout=None)
+        for item in view.children:
             if isinstance(item, discord.ui.Button):
                 item.disabled = True
-                view.add_item(item)
-        await interaction.message.edit(view=view)
+        registry.outbox.submit(("dm", interaction.user.id), lambda: interaction.message.edit(view=view))
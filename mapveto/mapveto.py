@@ -2,78 +2,38 @@ import asyncio
 import discord  # type: ignore
 from discord.ext import commands  # type: ignore
 from discord.ui import View, Button  # type: ignore
-import json
-import os
+import logging
+import time
 
 from core import checks
 from core.models import PermissionLevel  # type: ignore
 
-from .core.templateveto import MapVetoConfig, TemplateManager
-from .core.tournament import TournamentManager, TournamentConfig
-from .core.teams import TeamManager, TeamConfig
-from .core.veto import MapVeto, VetoManager
+from .core.templateveto import TemplateManager
+from .core.tournament import TournamentManager
+from .core.teams import TeamManager
+from .core.veto import LaunchError, MapButton, MapVeto, VetoManager, start_veto
+from .core.schedule import InvalidTemplateError
+from .core.panels import SETUP_PANEL
+from .core.metrics import METRICS_FILE, format_histogram, log_event
+from .core.registry import MapVetoRegistry
+from .core.teamimport import COLUMNS, TeamImportError, export_teams_file, import_teams_file
+from .core.launch import Pairing, check_pairings, launch_batch, parse_pairings
+from .core.brackets import FORMATS as BRACKET_FORMATS, LIVE, READY, BracketError, format_match, match_key, round_label
 from core import checks
 
-
-# Charger les configurations
-veto_config = MapVetoConfig()
-template_message_config = TemplateManager()
-vetos = veto_config.load_vetos()
-
-tournament_config = TournamentConfig()
-tournament_message_config = TournamentManager()
-tournaments = tournament_config.load_tournaments()
-
-team_config = TeamConfig()
-teams = team_config.load_teams()
-
 class SetupButtonConfig:
-    def __init__(self, bot, filename="message_id.json"):
+    def __init__(self, bot, registry, setup_view):
         self.bot = bot  # Store the bot instance
-        self.filename = os.path.join(os.path.dirname(__file__), '.', filename)
-        self.setup_channel_id = self.load_setup_button_message_id()
-        self.setup_button_message_id = self.load_setup_button_message_id()
-
-    # Charger l'ID du message depuis le fichier, s'il existe
-    def load_setup_button_message_id(self):
-        if os.path.exists(self.filename):
-            with open(self.filename, "r") as f:
-                data = json.load(f)
-                self.setup_button_message_id = data.get('setup_button_message_id')
-                self.setup_channel_id = data.get('setup_button_channel_id')
-        else:
-            self.setup_button_message_id = None
-            self.setup_channel_id = None
-
-    # Sauvegarder l'ID du message dans un fichier
-    def save_setup_button_message_id(self, message_id, channel_id):
-        data = {}
-        # Load existing data
-        if os.path.exists(self.filename):
-            with open(self.filename, 'r') as f:
-                data = json.load(f)
-        
-        # Update setup_message_id while preserving existing keys
-        data['setup_button_message_id'] = message_id
-        
-        with open(self.filename, "w") as f:
-            json.dump({
-                'setup_button_message_id': message_id,
-                'setup_button_channel_id': channel_id
-            }, f, indent=4)
-
-    def refresh_setup_button_message_id(self):
-        """Refresh the setup button message id from the file."""
-        print(self.setup_button_message_id)
-        print(self.setup_channel_id)
-        self.load_setup_button_message_id()
+        self.registry = registry
+        self.setup_embed = self.create_setup_button_embed()
+        self.setup_view = setup_view
 
     async def update_setup_button_message(self, channel):
-        print(self.setup_button_message_id)
-        if self.setup_button_message_id:
+        message_id = self.registry.panels.message_id(channel.guild.id, SETUP_PANEL)
+        if message_id:
             try:
-                message = await channel.fetch_message(self.setup_button_message_id)
-                await message.edit(embed=self.create_setup_button_embed(), view=self.create_setup_button_view())
+                message = channel.get_partial_message(message_id)
+                await message.edit(embed=self.setup_embed, view=self.setup_view)
             except discord.NotFound:
                 await self.send_setup_button_message(channel)
         else:
@@ -86,51 +46,41 @@ class SetupButtonConfig:
             color=discord.Color.blue()
         )
 
-    def create_setup_button_view(self):
-        return SetupView(self.bot)
-
     async def send_setup_button_message(self, channel):
-        embed = self.create_setup_button_embed()
-        view = self.create_setup_button_view()
-        message = await channel.send(embed=embed, view=view)
-        self.setup_message_id = message.id
-        self.setup_channel_id = channel.id
-        self.save_setup_button_message_id(message.id, channel.id)
+        message = await channel.send(embed=self.setup_embed, view=self.setup_view)
+        self.registry.panels.set(channel.guild.id, SETUP_PANEL, channel.id, message.id)
 
 class SetupView(View):
-    def __init__(self, bot):
+    """Panneau principal ; réutilise les managers du cog et leurs panneaux déjà construits."""
+
+    def __init__(self, bot, registry, template_veto, tournament, teams, veto_start_manager):
         super().__init__(timeout=None)
         self.bot = bot
-        self.template_veto = TemplateManager()
-        self.tournament = TournamentManager()
-        self.teams = TeamManager(bot)
-        self.veto_start_manager = VetoManager(bot)
+        self.registry = registry
+        self.template_veto = template_veto
+        self.tournament = tournament
+        self.teams = teams
+        self.veto_start_manager = veto_start_manager
 
     @discord.ui.button(label="Gestion des templates d'événements", custom_id="mapveto_setup", style=discord.ButtonStyle.grey)
     async def mapveto_setup_button(self, interaction: discord.Interaction, button: Button):
-        template_message_config.refresh_setup_message_id()
-        await self.template_veto.update_setup_message(interaction.channel)
         await interaction.response.defer()
+        await self.template_veto.update_setup_message(interaction.channel)
 
     @discord.ui.button(label="Gestion des tournois", custom_id="tournament_setup", style=discord.ButtonStyle.green)
     async def tournament_setup_button(self, interaction: discord.Interaction, button: Button):
-        tournament_message_config.refresh_setup_message_id()
-        await self.tournament.update_setup_message(interaction.channel)
         await interaction.response.defer()
+        await self.tournament.update_setup_message(interaction.channel)
 
     @discord.ui.button(label="Gestion des teams", custom_id="team_setup", style=discord.ButtonStyle.red)
     async def team_setup_button(self, interaction: discord.Interaction, button: Button):
-        team_message_config = TeamManager(self.bot)  # Use self.bot to initialize
-        team_message_config.refresh_setup_message_id()
-        await self.teams.update_setup_message(interaction.channel)
         await interaction.response.defer()
+        await self.teams.update_setup_message(interaction.channel)
     
     @discord.ui.button(label="Lancer un MapVeto", custom_id="veto_start_button", style=discord.ButtonStyle.primary)
     async def veto_start_button(self, interaction: discord.Interaction, button: Button):
-        veto_start_manager = VetoManager(self.bot)  # Use self.bot to initialize
-        veto_start_manager.refresh_veto_setup_message_id()
-        await self.veto_start_manager.update_veto_setup_message(interaction.channel)
         await interaction.response.defer()
+        await self.veto_start_manager.update_veto_setup_message(interaction.channel)
 
     async def refresh(self, channel_id, message_id):
         channel = self.bot.get_channel(channel_id)
@@ -140,17 +90,53 @@ class SetupView(View):
             message = await channel.fetch_message(message_id)
             await message.edit(view=self)
         except discord.NotFound:
-            print("Message not found.")
+            log_event("panel_missing", channel_id=channel_id, message_id=message_id)
 
 class MapVetoCog(commands.Cog):
     def __init__(self, bot: commands.bot):
         self.bot = bot
-        self.template_veto = TemplateManager()
-        self.tournament = TournamentManager()
-        self.teams = TeamManager(bot)
-        self.veto_start_manager = VetoManager(bot)
-        self.setupbutton_config = SetupButtonConfig(bot)  # Pass the bot instance
+        self.registry = MapVetoRegistry()
+        self.template_veto = TemplateManager(self.registry)
+        self.tournament = TournamentManager(self.registry)
+        self.teams = TeamManager(bot, self.registry)
+        self.veto_start_manager = VetoManager(bot, self.registry)
+        # Vue du panneau principal construite une fois avec les managers ci-dessus
+        self.setup_view = SetupView(bot, self.registry, self.template_veto, self.tournament, self.teams, self.veto_start_manager)
+        self.setupbutton_config = SetupButtonConfig(bot, self.registry, self.setup_view)  # Pass the bot instance
         self.current_veto = None
+        self.vetos_restored = False
+
+    async def cog_load(self):
+        # Rechargement du cog sur un bot déjà connecté : on_ready ne sera plus émis
+        if self.bot.is_ready():
+            self.start_sessions()
+
+    def start_sessions(self):
+        """Une seule fois par chargement du cog : cache des capitaines, vetos en cours, export des métriques."""
+        if self.vetos_restored:
+            return
+        self.vetos_restored = True
+        warmed = self.registry.warm_captains(self.bot)
+        log_event("captains_warmed", count=warmed)
+        self.restore_vetos()
+        self.registry.metrics.start_export()
+
+    async def cog_unload(self):
+        self.bot.remove_dynamic_items(MapButton)
+        # Envoyer les messages et écrire les modifications en attente avant le déchargement du cog
+        await self.registry.outbox.drain(timeout=10)
+        self.registry.flush()
+        self.write_metrics()
+        self.registry.close()
+
+    def write_metrics(self):
+        """Réécrit le fichier Prometheus ; retourne l'erreur éventuelle."""
+        try:
+            self.registry.metrics.write(METRICS_FILE)
+        except OSError as error:
+            log_event("metrics_write_failed", path=METRICS_FILE, error=error)
+            return error
+        return None
 
     def set_veto_params(self, name, maps, team_a_id, team_a_name, team_b_id, team_b_name, rules, channel):
         self.current_veto = MapVeto(name, maps, team_a_id, team_a_name, team_b_id, team_b_name, rules, channel, self.bot)
@@ -159,99 +145,400 @@ class MapVetoCog(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def mapveto_setup(self, ctx):
         """Crée ou met à jour le message avec les boutons pour gérer les templates de veto."""
-        veto_config.load_vetos()
         await self.template_veto.update_setup_message(ctx.channel)
 
     @commands.command(name='tournament_setup')
     @commands.has_permissions(administrator=True)
     async def tournament_setup(self, ctx):
-        tournament_config.load_tournaments()
         await self.tournament.update_setup_message(ctx.channel)
 
     @commands.command(name='team_setup')
     @commands.has_permissions(administrator=True)
     async def team_setup(self, ctx):
-        team_config.load_teams()
         await self.teams.update_setup_message(ctx.channel)
 
     @commands.command()
     @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
     async def start_mapveto(self, ctx, name: str, team_a_id: int, team_a_name: str, team_b_id: int, team_b_name: str):
         """Démarre un veto et envoie des messages en DM aux équipes spécifiées."""
-        if name not in veto_config.vetos:
-            await ctx.send(f"Aucun template de veto trouvé avec le nom '{name}'.")
+        try:
+            veto = await start_veto(self.bot, self.registry, name, (team_a_id, team_a_name), (team_b_id, team_b_name), ctx.channel, ctx.message)
+        except InvalidTemplateError as error:
+            await ctx.send(str(error))
             return
-
-        maps = veto_config.vetos[name]["maps"]
-        rules = veto_config.vetos[name]["rules"]
-
-        veto = MapVeto(name, maps, team_a_id, team_a_name, team_b_id, team_b_name, rules, ctx.channel, self.bot)
-        vetos[name] = veto
-
-        await veto.send_ticket_message(ctx.channel)
+        await ctx.send(f"Veto '{veto.session_id}' lancé avec le template '{name}'.")
 
     @commands.command()
     @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
-    async def pause_mapveto(self, ctx, name: str):
-        """Met en pause le veto spécifié."""
-        if name not in vetos:
-            await ctx.send(f"Aucun veto en cours avec le nom '{name}'.")
+    async def pause_mapveto(self, ctx, target: str = None):
+        """Met en pause le veto indiqué (ID de session ou salon du ticket, par défaut le salon courant)."""
+        veto = self.registry.sessions.resolve(target, ctx.channel)
+        if veto is None:
+            await ctx.send(f"Aucun veto en cours pour '{target or ctx.channel.mention}'.")
             return
 
-        veto = vetos[name]
         veto.pause()
-        await ctx.send(f"Le veto '{name}' a été mis en pause.")
+        await veto.refresh_boards()
+        await ctx.send(f"Le veto '{veto.session_id}' ({veto.name}) a été mis en pause.")
 
     @commands.command()
     @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
-    async def resume_mapveto(self, ctx, name: str):
-        """Reprend le veto spécifié."""
-        if name not in vetos:
-            await ctx.send(f"Aucun veto en cours avec le nom '{name}'.")
+    async def resume_mapveto(self, ctx, target: str = None):
+        """Reprend le veto indiqué (ID de session ou salon du ticket, par défaut le salon courant)."""
+        veto = self.registry.sessions.resolve(target, ctx.channel)
+        if veto is None:
+            await ctx.send(f"Aucun veto en cours pour '{target or ctx.channel.mention}'.")
             return
 
-        veto = vetos[name]
         veto.resume()
-        await ctx.send(f"Le veto '{name}' a repris.")
+        await veto.refresh_boards()
+        await ctx.send(f"Le veto '{veto.session_id}' ({veto.name}) a repris.")
 
     @commands.command()
     @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
-    async def stop_mapveto(self, ctx, name: str):
-        """Arrête complètement le veto spécifié mais ne supprime pas le template."""
-        if name not in vetos:
-            await ctx.send(f"Aucun veto en cours avec le nom '{name}'.")
+    async def stop_mapveto(self, ctx, target: str = None):
+        """Arrête complètement le veto indiqué mais ne supprime pas le template."""
+        veto = self.registry.sessions.resolve(target, ctx.channel)
+        if veto is None:
+            await ctx.send(f"Aucun veto en cours pour '{target or ctx.channel.mention}'.")
             return
 
-        veto = vetos[name]
         veto.stop()
+        await veto.refresh_boards()
 
-        await ctx.send(f"Le veto '{name}' a été arrêté.")
+        await ctx.send(f"Le veto '{veto.session_id}' ({veto.name}) a été arrêté.")
 
     @commands.command(name='mapveto_button')
     @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
     async def mapveto_button(self, ctx):
         """Affiche un embed avec un bouton pour lancer un map veto."""
-        self.veto_start_manager.load_veto_setup_message_id()
         await self.veto_start_manager.update_veto_setup_message(ctx.channel)
 
     @commands.command(name='setup_buttons')
     @commands.has_permissions(administrator=True)
     async def setup_buttons(self, ctx):
-        self.setupbutton_config.refresh_setup_button_message_id()
         await self.setupbutton_config.update_setup_button_message(ctx.channel)
 
+    @commands.command(name='import_teams')
+    @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
+    async def import_teams(self, ctx, tournament: str = None):
+        """Importe des équipes depuis un fichier CSV ou JSON joint au message.
+
+        Colonnes : name, tournament, captain_discord_id ; `tournament` est facultatif si le tournoi
+        est passé en argument. Le fichier est validé en entier : tout est importé, ou rien.
+        """
+        if not ctx.message.attachments:
+            await ctx.send(f"Joignez un fichier .csv ou .json (colonnes : {', '.join(COLUMNS)}).")
+            return
+        attachment = ctx.message.attachments[0]
+        if tournament and tournament not in self.registry.tournament_config.tournaments:
+            await ctx.send(f"Le tournoi **{tournament}** n'existe pas.")
+            return
+
+        data = await attachment.read()
+        try:
+            async with ctx.typing():
+                report = await import_teams_file(self.bot, self.registry, attachment.filename, data, tournament)
+        except TeamImportError as error:
+            await ctx.send(str(error))
+            return
+        await ctx.send(report.summary())
+
+    @commands.command(name='export_teams')
+    @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
+    async def export_teams(self, ctx, tournament: str = None, fmt: str = "csv"):
+        """Exporte les équipes (d'un tournoi, ou toutes avec `*`) en CSV ou en JSON."""
+        if tournament == "*":
+            tournament = None
+        if tournament and tournament not in self.registry.tournament_config.tournaments:
+            await ctx.send(f"Le tournoi **{tournament}** n'existe pas.")
+            return
+        try:
+            output = export_teams_file(self.registry.team_config, fmt.lower(), tournament)
+        except TeamImportError as error:
+            await ctx.send(str(error))
+            return
+        filename = f"teams-{tournament or 'all'}.{fmt.lower()}".replace(" ", "_")
+        await ctx.send(file=discord.File(output, filename=filename))
+
+    async def send_lines(self, ctx, lines, limit=1900):
+        """Envoie les lignes en autant de messages que nécessaire (limite de 2000 caractères)."""
+        chunk = []
+        size = 0
+        for line in lines:
+            if chunk and size + len(line) + 1 > limit:
+                await ctx.send("\n".join(chunk))
+                chunk, size = [], 0
+            chunk.append(line)
+            size += len(line) + 1
+        if chunk:
+            await ctx.send("\n".join(chunk))
+
+    @commands.command(name='bracket_create')
+    @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
+    async def bracket_create(self, ctx, tournament: str, fmt: str = "single", rounds: int = None):
+        """Génère le tableau d'un tournoi : single, double, swiss ou roundrobin.
+
+        Les têtes de série suivent l'ordre alphabétique des équipes. `rounds` limite le
+        nombre de rondes des formats suisse et toutes rondes.
+        """
+        registry = self.registry
+        if tournament not in registry.tournament_config.tournaments:
+            await ctx.send(f"Le tournoi **{tournament}** n'existe pas.")
+            return
+        teams = list(registry.team_config.get_teams_by_tournament(tournament))
+        try:
+            ready = registry.brackets.create_bracket(tournament, teams, fmt.lower(), rounds)
+        except BracketError as error:
+            await ctx.send(str(error))
+            return
+        info = registry.brackets.info(tournament)
+        log_event("bracket_created", tournament=tournament, format=info["format"], teams=len(teams), matches=len(registry.brackets.matches(tournament)))
+        await ctx.send(
+            f"Tableau **{BRACKET_FORMATS[info['format']]}** créé pour **{tournament}** : {len(teams)} équipes, "
+            f"{info['rounds']} ronde(s), {len(ready)} match(s) prêt(s) à lancer."
+        )
+
+    @commands.command(name='bracket')
+    @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
+    async def bracket(self, ctx, tournament: str, round: str = None):
+        """Affiche l'avancement du tableau, ou les matchs d'une ronde (W1, L2, GF, S3...)."""
+        brackets = self.registry.brackets
+        info = brackets.info(tournament)
+        if info is None:
+            await ctx.send(f"Le tournoi **{tournament}** n'a pas de tableau.")
+            return
+
+        if round is not None:
+            matches = brackets.matches(tournament, label=round.upper())
+            if not matches:
+                await ctx.send(f"Aucun match dans la ronde **{round}**.")
+                return
+            lines = [f"__**{tournament} — ronde {round.upper()}**__"]
+            lines += [format_match(match) for match in sorted(matches, key=lambda match: match_key(match["id"]))]
+            await self.send_lines(ctx, lines)
+            return
+
+        # Résumé par ronde : nombre de matchs par statut
+        rounds = {}
+        for match in sorted(brackets.matches(tournament), key=lambda match: match_key(match["id"])):
+            counts = rounds.setdefault(round_label(match["id"]), {})
+            counts[match["status"]] = counts.get(match["status"], 0) + 1
+        lines = [f"__**{tournament} — {BRACKET_FORMATS[info['format']]}**__"]
+        for label, counts in rounds.items():
+            total = sum(counts.values())
+            lines.append(
+                f"**{label}** : {counts.get('done', 0)}/{total} terminé(s), {counts.get(READY, 0)} prêt(s), {counts.get(LIVE, 0)} en cours"
+            )
+        champion = brackets.champion(tournament)
+        if champion:
+            lines.append(f"Vainqueur : **{champion}**")
+        if "seeds" in info:
+            lines.append("")
+            lines.append(f"Classement après {info['round']}/{info['rounds']} ronde(s) :")
+            lines += [f"{rank}. {team} ({wins}-{losses})" for rank, (team, wins, losses) in enumerate(brackets.standings(tournament), start=1)]
+        await self.send_lines(ctx, lines)
+
+    @commands.command(name='bracket_result')
+    @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
+    async def bracket_result(self, ctx, tournament: str, match_id: str, winner: str):
+        """Enregistre le vainqueur d'un match ; les matchs suivants deviennent prêts."""
+        try:
+            ready = self.registry.brackets.report_result(tournament, match_id.upper(), winner)
+        except BracketError as error:
+            await ctx.send(str(error))
+            return
+        log_event("bracket_result", tournament=tournament, match=match_id.upper(), winner=winner, ready=len(ready))
+        lines = [f"Résultat enregistré : **{winner}** remporte {match_id.upper()}."]
+        lines += [f"Prêt : {format_match(match)}" for match in ready]
+        champion = self.registry.brackets.champion(tournament)
+        if champion:
+            lines.append(f"🏆 **{champion}** remporte le tournoi **{tournament}** !")
+        await self.send_lines(ctx, lines)
+
+    @commands.command(name='bracket_launch')
+    @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
+    async def bracket_launch(self, ctx, tournament: str, template: str, round: str = None):
+        """Ouvre les tickets de veto des matchs prêts (d'une ronde, ou de tout le tableau)."""
+        registry = self.registry
+        brackets = registry.brackets
+        if brackets.info(tournament) is None:
+            await ctx.send(f"Le tournoi **{tournament}** n'a pas de tableau.")
+            return
+        if registry.veto_config.get_veto(template) is None:
+            await ctx.send(f"Le template **{template}** n'existe pas.")
+            return
+        matches = sorted(brackets.matches(tournament, status=READY, label=round.upper() if round else None), key=lambda match: match_key(match["id"]))
+        if not matches:
+            await ctx.send("Aucun match prêt à lancer.")
+            return
+
+        by_id = {match["id"]: match for match in matches}
+        pairings = [Pairing(match["id"], match["team_a"], match["team_b"]) for match in matches]
+        await self.run_launch_batch(ctx, tournament, template, pairings, on_launched=lambda pairing: brackets.mark_live(by_id[pairing.label]))
+
+    @commands.command(name='launch_vetos')
+    @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
+    async def launch_vetos(self, ctx, tournament: str, template: str, *, pairings: str):
+        """Ouvre en parallèle les tickets de veto d'une liste de rencontres.
+
+        Une rencontre par ligne (ou séparées par `;`) : `Equipe A vs Equipe B`.
+        """
+        if tournament not in self.registry.tournament_config.tournaments:
+            await ctx.send(f"Le tournoi **{tournament}** n'existe pas.")
+            return
+        if self.registry.veto_config.get_veto(template) is None:
+            await ctx.send(f"Le template **{template}** n'existe pas.")
+            return
+        try:
+            pairings = parse_pairings(pairings)
+        except LaunchError as error:
+            await ctx.send(str(error))
+            return
+        await self.run_launch_batch(ctx, tournament, template, pairings)
+
+    async def run_launch_batch(self, ctx, tournament, template, pairings, on_launched=None):
+        """Vérifie les rencontres puis ouvre les tickets ; un message de progression est mis à jour pendant le lot."""
+        errors = check_pairings(self.registry, tournament, pairings)
+        if errors:
+            await self.send_lines(ctx, ["Lancement annulé, aucun ticket ouvert :"] + errors)
+            return
+
+        status = await ctx.send(f"Ouverture des tickets : 0/{len(pairings)}...")
+
+        async def progress(report):
+            try:
+                await status.edit(content=report.progress())
+            except discord.HTTPException:
+                pass
+
+        report = await launch_batch(self.bot, self.registry, template, pairings, ctx, on_launched=on_launched, progress=progress)
+        lines = report.summary()
+        await status.edit(content=lines[0])
+        await self.send_lines(ctx, lines[1:])
+
+    @commands.command(name='bracket_delete')
+    @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
+    async def bracket_delete(self, ctx, tournament: str):
+        """Supprime le tableau d'un tournoi et tous ses matchs (les équipes sont conservées)."""
+        deleted = self.registry.brackets.delete_bracket(tournament)
+        if not deleted:
+            await ctx.send(f"Le tournoi **{tournament}** n'a pas de tableau.")
+            return
+        log_event("bracket_deleted", tournament=tournament, matches=deleted)
+        await ctx.send(f"Tableau de **{tournament}** supprimé ({deleted} match(s)).")
+
+    @commands.command(name='veto_history')
+    @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
+    async def veto_history(self, ctx, team: str, tournament: str = None, limit: int = 10):
+        """Derniers vetos terminés d'une équipe : adversaire, maps jouées et temps de réflexion."""
+        history = self.registry.history
+        vetos = history.vetos_for_team(team, tournament, limit=min(limit, 50))
+        if not vetos:
+            await ctx.send(f"Aucun veto archivé pour **{team}**.")
+            return
+        lines = [f"__**Vetos de {team}**__"]
+        for veto in vetos:
+            opponent = veto["team_b"] if veto["team_a"] == team else veto["team_a"]
+            moves = history.actions(veto["id"])
+            maps = [move["map"] for move in moves if move["action"] in ("pick", "decider")]
+            thinks = [move["think"] for move in moves if move["think"] is not None]
+            think = f", réflexion moyenne {sum(thinks) / len(thinks):.0f} s" if thinks else ""
+            where = f" ({veto['tournament']})" if tournament is None and veto["tournament"] else ""
+            lines.append(
+                f"<t:{int(veto['finished_at'])}:d> **{veto['template']}** contre {opponent}{where} : "
+                f"{', '.join(maps) or 'aucune map'}{think}"
+            )
+        await self.send_lines(ctx, lines)
+
+    @commands.command(name='map_stats')
+    @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
+    async def map_stats(self, ctx, tournament: str = None, map_name: str = None):
+        """Taux de ban et de pick de chaque map, sur un tournoi ou tout l'historique (`*`)."""
+        if tournament == "*":
+            tournament = None
+        stats = self.registry.history.map_stats(tournament, map_name)
+        if not stats:
+            await ctx.send("Aucun veto archivé pour ces critères.")
+            return
+        lines = [f"__**Maps — {tournament or 'tous les tournois'}**__ ({self.registry.history.count(tournament)} veto(s))"]
+        for entry in stats:
+            think = f", réflexion moyenne {entry['think']:.0f} s" if entry["think"] is not None else ""
+            lines.append(
+                f"**{entry['map']}** : bannie {entry['ban_rate']:.0%}, jouée {entry['pick_rate']:.0%} "
+                f"(dont {entry['deciders']} decider) sur {entry['offered']} veto(s){think}"
+            )
+        await self.send_lines(ctx, lines)
+
+    @commands.command(name='mapveto_stats')
+    @checks.has_permissions(PermissionLevel.ADMINISTRATOR)
+    async def mapveto_stats(self, ctx):
+        """Affiche les métriques du plugin et réécrit le fichier Prometheus."""
+        registry = self.registry
+        metrics = registry.metrics
+        paused = sum(1 for veto in registry.sessions if veto.paused)
+        lines = [
+            "__**Statistiques MapVeto**__",
+            f"Vetos en cours : {len(registry.sessions)} (dont {paused} en pause), délais armés : {len(registry.sessions.timers)}, délais expirés : {registry.sessions.timers.expired}",
+            f"File d'envoi : {registry.outbox.sent} envoyé(s), {registry.outbox.pending} en attente, {registry.outbox.retries} rate limit(s), {registry.outbox.failures} échec(s)",
+            f"Cache des threads : {registry.threads.hit_rate:.0%} de succès ({registry.threads.misses} recherche(s) Modmail)",
+            f"Cache des capitaines : {registry.captains.hit_rate:.0%} de succès ({registry.captains.fetches} appel(s) fetch_user)",
+            "",
+        ]
+        for source in ("button", "timeout"):
+            lines.append(format_histogram(f"Tour ({source})", metrics.histogram("mapveto_turn_seconds", source=source)))
+        lines.append(format_histogram("Lancement", metrics.histogram("mapveto_launch_seconds")))
+        for name, label in (("mapveto_storage_write_seconds", "Écriture du stockage"), ("mapveto_storage_flush_seconds", "Flush du stockage")):
+            for _, histogram in metrics.histograms_named(name):
+                lines.append(format_histogram(label, histogram))
+
+        error = self.write_metrics()
+        lines.append("")
+        lines.append(f"Fichier Prometheus non écrit : {error}" if error else f"Fichier Prometheus : `{METRICS_FILE}`")
+        await ctx.send("\n".join(lines))
+
     @commands.Cog.listener()
     async def on_ready(self):
         """Rafraîchit automatiquement le message de configuration lors du démarrage du bot."""
         await self.bot.wait_until_ready()
-        if self.setupbutton_config.setup_channel_id and self.setupbutton_config.setup_button_message_id:
-            setup_view = SetupView(self.bot)
-            # Register the view with the bot
-            self.bot.add_view(setup_view)
-            await setup_view.refresh(self.setupbutton_config.setup_channel_id, self.setupbutton_config.setup_button_message_id)
-        print("Bot is ready, views are registered.")
+        # La vue est déjà enregistrée auprès du bot dans setup() ; un panneau principal par serveur
+        for panel in self.registry.panels.entries(SETUP_PANEL):
+            if panel["channel_id"]:
+                await self.setup_view.refresh(panel["channel_id"], panel["message_id"])
+        self.start_sessions()
+        log_event("ready", sessions=len(self.registry.sessions))
+
+    @commands.Cog.listener()
+    async def on_thread_ready(self, thread, *args, **kwargs):
+        """Signale aux lancements de veto en attente que le ticket est prêt."""
+        self.registry.threads.mark_ready(thread)
+
+    @commands.Cog.listener()
+    async def on_thread_close(self, thread, *args, **kwargs):
+        """Oublie le thread fermé pour que le prochain veto refasse la recherche."""
+        self.registry.threads.invalidate(thread)
+
+    def restore_vetos(self):
+        """Recharge les vetos en cours ; leurs boutons sont servis par l'élément dynamique MapButton."""
+        started = time.perf_counter()
+        restored = failed = 0
+        for session_id, data in self.registry.sessions.saved_sessions().items():
+            # Un enregistrement illisible ne doit pas empêcher la reprise des autres vetos
+            try:
+                veto = MapVeto.from_dict(session_id, data, self.bot, registry=self.registry)
+                self.registry.sessions.add(veto)
+            except Exception as error:
+                failed += 1
+                log_event("veto_restore_failed", level=logging.ERROR, session_id=session_id, error=repr(error))
+                continue
+            restored += 1
+        elapsed = time.perf_counter() - started
+        log_event("vetos_restored", count=restored, failed=failed or None, elapsed_ms=round(elapsed * 1000, 1))
 
 async def setup(bot: commands.Bot) -> None:
-    await bot.add_cog(MapVetoCog(bot))
+    cog = MapVetoCog(bot)
+    await bot.add_cog(cog)
     # Register the view globally at the startup
-    bot.add_view(SetupView(bot))
+    bot.add_view(cog.setup_view)
+    # Un seul gestionnaire pour les boutons de tous les vetos, y compris ceux restaurés
+    bot.add_dynamic_items(MapButton)
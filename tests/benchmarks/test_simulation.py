@@ -0,0 +1,48 @@
+"""Benchmarks de la simulation hors ligne, à lancer avant un soir de tournoi :
+
+    MODMAIL_DIR=/chemin/vers/Modmail pytest tests/benchmarks --benchmark-only
+
+Chaque mesure crée son propre registre (SQLite dans un dossier temporaire) ; les valeurs
+détaillées (tours/s, p95, Kio par veto) sont dans `extra_info` du rapport pytest-benchmark.
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("discord")
+pytest.importorskip("core.models", reason="modules de Modmail introuvables (MODMAIL_DIR)")
+
+from simulation import BENCHMARK_SIZES, DEFAULT_RULES, bench_batch, bench_launch, bench_memory, bench_turns  # noqa: E402
+
+# Budget mémoire par veto actif (session, tableaux envoyés, entrée du minuteur)
+MAX_BYTES_PER_SESSION = 64 * 1024
+
+
+def run_once(benchmark, bench, *args, **kwargs):
+    """Une seule exécution mesurée par benchmark : une simulation de 1000 vetos n'est pas répétée."""
+    result = benchmark.pedantic(lambda: asyncio.run(bench(*args, **kwargs)), rounds=1, iterations=1)
+    benchmark.extra_info.update(result)
+    return result
+
+
+@pytest.mark.parametrize("sessions", BENCHMARK_SIZES)
+def test_turns_per_second(benchmark, sessions):
+    result = run_once(benchmark, bench_turns, sessions)
+    assert result["turns"] == sessions * len(DEFAULT_RULES)
+
+
+def test_launch_latency(benchmark):
+    result = run_once(benchmark, bench_launch, 100)
+    assert result["launches"] == 100
+
+
+def test_batch_launch(benchmark):
+    result = run_once(benchmark, bench_batch, 32)
+    assert result["batch_seconds"] < result["serial_seconds"]
+
+
+@pytest.mark.parametrize("sessions", BENCHMARK_SIZES)
+def test_memory_per_session(benchmark, sessions):
+    result = run_once(benchmark, bench_memory, sessions)
+    assert result["bytes_per_session"] < MAX_BYTES_PER_SESSION
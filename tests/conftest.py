@@ -0,0 +1,13 @@
+import os
+import sys
+
+# Le plugin s'importe comme le paquet `mapveto` depuis la racine du dépôt ; il dépend de discord.py
+# et des modules de Modmail (core.models, cogs.modmail) : MODMAIL_DIR pointe vers une installation de Modmail.
+# Le dossier tests/ lui-même est ajouté pour `simulation` (faux Discord partagé par les tests et les benchmarks).
+TESTS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TESTS)
+MODMAIL_DIR = os.environ.get("MODMAIL_DIR")
+
+for path in (MODMAIL_DIR, ROOT, TESTS):
+    if path and path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,470 @@
+"""Couche Discord / Modmail factice et simulation de vetos, partagées par les tests et les benchmarks.
+
+Rien ici n'est chargé par le plugin : seule la suite de tests l'importe.
+"""
+import asyncio
+import itertools
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from types import SimpleNamespace
+
+import discord # type: ignore
+
+from mapveto.core.history import VetoHistory
+from mapveto.core.launch import MAX_CONCURRENT_LAUNCHES, Pairing, launch_batch
+from mapveto.core.registry import MapVetoRegistry
+from mapveto.core.storage import DEFAULT_FLUSH_INTERVAL, open_storage
+from mapveto.core.veto import SIDES, MapButton, MapVeto, TeamSelect, start_veto
+
+# Template et tournoi utilisés par défaut par la simulation
+TEMPLATE = "simulation"
+TOURNAMENT = "simulation"
+DEFAULT_MAPS = ["Ascent", "Bind", "Haven", "Icebox", "Lotus", "Split", "Sunset"]
+DEFAULT_RULES = ["Ban", "Ban", "Pick", "Side", "Pick", "Side", "Ban", "Ban", "Side"]
+# Nombres de vetos simultanés mesurés par tests/benchmarks
+BENCHMARK_SIZES = (1, 100, 1000)
+# Latence simulée de chaque appel Discord / Modmail pour la mesure des lancements en lot (secondes)
+BATCH_LATENCY = 0.05
+
+
+class SimulationError(Exception):
+    pass
+
+
+# --- Couche Discord / Modmail factice -------------------------------------------------
+# Chaque appel qui partirait vers l'API Discord est compté dans `bot.api_calls` et peut
+# être ralenti d'une latence fixe pour se rapprocher des conditions réelles.
+
+class FakeMessage:
+    def __init__(self, channel, message_id, content=None, embed=None, view=None):
+        self.channel = channel
+        self.id = message_id
+        self.content = content
+        self.embeds = [embed] if embed else []
+        self.view = view
+        self.components = []
+        self.attachments = []
+
+    async def edit(self, content=None, embed=None, view=None):
+        await self.channel.bot.api_call("edit")
+        if content is not None:
+            self.content = content
+        if embed is not None:
+            self.embeds = [embed]
+        self.view = view
+        return self
+
+
+class FakeChannel:
+    def __init__(self, bot, channel_id):
+        self.bot = bot
+        self.id = channel_id
+        self.messages = {}
+        self.last_message = None
+
+    async def send(self, content=None, embed=None, view=None, **kwargs):
+        await self.bot.api_call("send")
+        message = FakeMessage(self, self.bot.next_id(), content, embed, view)
+        self.messages[message.id] = message
+        self.last_message = message
+        return message
+
+    def get_partial_message(self, message_id):
+        return self.messages.get(message_id) or FakeMessage(self, message_id)
+
+    async def fetch_message(self, message_id):
+        await self.bot.api_call("fetch_message")
+        return self.get_partial_message(message_id)
+
+
+class FakeUser:
+    def __init__(self, bot, user_id, name):
+        self.bot = bot
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{user_id}>"
+        self.dm_channel = None
+
+    async def create_dm(self):
+        if self.dm_channel is None:
+            self.dm_channel = FakeChannel(self.bot, self.bot.next_id())
+        return self.dm_channel
+
+    async def send(self, content=None, embed=None, view=None):
+        channel = await self.create_dm()
+        return await channel.send(content, embed=embed, view=view)
+
+
+class FakeThread:
+    """Thread Modmail : `reply` enregistre les messages au lieu de les publier."""
+
+    def __init__(self, bot, recipients):
+        self.bot = bot
+        self.recipients = recipients
+        self.recipient = recipients[0]
+        self.channel = FakeChannel(bot, bot.next_id())
+        self.replies = []
+
+    async def reply(self, message, anonymous=False, plain=False):
+        await self.bot.api_call("reply")
+        self.replies.append(message.content)
+
+
+class FakeThreadManager:
+    """Remplace `bot.threads` de Modmail (recherche d'un thread par destinataire)."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.threads = {}
+
+    async def find(self, recipient_id=None):
+        await self.bot.api_call("find")
+        return self.threads.get(recipient_id)
+
+
+class FakeModmail:
+    """Remplace le cog Modmail : `contact` ouvre un thread et émet `thread_ready`."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def contact(self, ctx, users, category=None, manual_trigger=False):
+        await self.bot.api_call("contact")
+        thread = FakeThread(self.bot, list(users))
+        for user in users:
+            self.bot.threads.threads[user.id] = thread
+        # Modmail émet l'événement après la création du salon, hors de la commande
+        asyncio.get_running_loop().call_soon(self.bot.registry.threads.mark_ready, thread)
+
+    async def close(self, ctx, option=None):
+        for user in ctx.thread.recipients:
+            self.bot.threads.threads.pop(user.id, None)
+        self.bot.registry.threads.invalidate(ctx.thread)
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.done = False
+        self.content = None
+        self.ephemeral = False
+
+    def is_done(self):
+        return self.done
+
+    async def defer(self, ephemeral=False, thinking=False):
+        self.done = True
+
+    async def send_message(self, content=None, embed=None, view=None, ephemeral=False):
+        self.done = True
+        self.content = content
+        self.ephemeral = ephemeral
+
+    async def edit_message(self, content=None, embed=None, view=None):
+        self.done = True
+        message = self.interaction.message
+        if content is not None:
+            message.content = content
+        message.view = view
+
+
+class FakeFollowup:
+    def __init__(self, bot):
+        self.bot = bot
+        self.messages = []
+
+    async def send(self, content=None, embed=None, view=None, ephemeral=False):
+        await self.bot.api_call("followup")
+        self.messages.append(content)
+
+
+class FakeInteraction:
+    def __init__(self, bot, user, message):
+        self.client = bot
+        self.user = user
+        self.message = message
+        self.channel = message.channel
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(bot)
+
+
+class FakeBot:
+    """Bot Modmail réduit à ce qu'utilise le plugin, sans connexion à Discord."""
+
+    def __init__(self, registry, latency=0.0):
+        self.registry = registry
+        self.latency = latency
+        self.api_calls = Counter()
+        self._ids = itertools.count(10 ** 17)
+        self.users = {}
+        self.channels = {}
+        self.threads = FakeThreadManager(self)
+        self.modmail_guild = SimpleNamespace(me=self.add_user("Modmail"))
+        self.cogs = {
+            "Modmail": FakeModmail(self),
+            "MapVetoCog": SimpleNamespace(registry=registry),
+        }
+
+    def next_id(self):
+        return next(self._ids)
+
+    async def api_call(self, kind):
+        self.api_calls[kind] += 1
+        await asyncio.sleep(self.latency)
+
+    def add_user(self, name):
+        user = FakeUser(self, self.next_id(), name)
+        self.users[user.id] = user
+        return user
+
+    def add_channel(self):
+        channel = FakeChannel(self, self.next_id())
+        self.channels[channel.id] = channel
+        return channel
+
+    def get_user(self, user_id):
+        return self.users.get(user_id)
+
+    async def fetch_user(self, user_id):
+        await self.api_call("fetch_user")
+        if user_id not in self.users:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown User")
+        return self.users[user_id]
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_cog(self, name):
+        return self.cogs.get(name)
+
+    async def get_context(self, message):
+        return SimpleNamespace(message=message, channel=message.channel, bot=self)
+
+
+# --- Capitaines ------------------------------------------------------------------------
+# Une stratégie reçoit le veto et l'action en cours ("Ban", "Pick" ou "Side") et retourne
+# l'index du bouton à cliquer.
+
+def random_captain(rng=None):
+    """Clique au hasard sur une map encore disponible ou sur un side."""
+    rng = rng or random.Random()
+
+    def choose(veto, action):
+        if action == "Side":
+            return rng.randrange(len(SIDES))
+        return rng.choice([index for index, name in enumerate(veto.listmaps) if veto.pool.is_available(name)])
+    return choose
+
+
+def scripted_captain(choices):
+    """Joue dans l'ordre les maps / sides donnés par leur nom."""
+    script = iter(choices)
+
+    def choose(veto, action):
+        choice = next(script)
+        return (SIDES if action == "Side" else veto.listmaps).index(choice)
+    return choose
+
+
+# --- Moteur ----------------------------------------------------------------------------
+
+class VetoSimulation:
+    """Joue les vetos d'un template avec des capitaines scriptés ou aléatoires, hors ligne.
+
+    Le registre est réel (stockage SQLite dans un dossier temporaire, file d'envoi, minuteur,
+    caches) ; seuls Discord et Modmail sont remplacés par la couche factice ci-dessus.
+    Les clics passent par `MapButton.callback` et les lancements par `TeamSelect`, comme en production.
+    """
+
+    def __init__(self, maps=DEFAULT_MAPS, rules=DEFAULT_RULES, turn_timeout=None, timeout_action=None, latency=0.0, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.directory = tempfile.mkdtemp(prefix="mapveto-sim-")
+        storage = open_storage("sqlite", self.directory, flush_interval=flush_interval)
+        self.registry = MapVetoRegistry(storage, legacy_panels=None, history=VetoHistory(self.directory))
+        self.bot = FakeBot(self.registry, latency)
+        self.admin = self.bot.add_user("Admin")
+        self.panel_channel = self.bot.add_channel()
+        self.registry.veto_config.create_veto(TEMPLATE, list(maps), list(rules), turn_timeout, timeout_action)
+        self.registry.tournament_config.create_tournament(TOURNAMENT)
+        self._matches = itertools.count(1)
+
+    def add_match(self):
+        """Crée deux équipes et leurs capitaines ; retourne les noms des deux équipes."""
+        number = next(self._matches)
+        teams = []
+        for side in ("A", "B"):
+            name = f"Equipe {number}{side}"
+            captain = self.bot.add_user(f"Capitaine {number}{side}")
+            self.registry.team_config.create_team(name, TOURNAMENT, str(captain.id))
+            teams.append(name)
+        return teams
+
+    def captain_id(self, team_name):
+        return int(self.registry.team_config.get_team(team_name)["captain_discord_id"])
+
+    async def launch(self, team_a, team_b):
+        """Ouvre le ticket du match par TeamSelect, comme le panneau « Lancer un MapVeto »."""
+        panel_message = await self.panel_channel.send("Lancer un MapVeto")
+        select = TeamSelect(TOURNAMENT, TEMPLATE, self.bot, self.registry)
+        interaction = FakeInteraction(self.bot, self.admin, panel_message)
+        await select.select(interaction, [team_a, team_b])
+        thread = self.registry.threads.get(self.captain_id(team_a))
+        if thread is None:
+            raise SimulationError(f"Ticket non créé : {interaction.followup.messages}")
+        return thread
+
+    async def start(self, team_a, team_b, thread=None):
+        """Démarre le veto (team_a commence) dans le ticket, ou dans un salon factice sans ticket."""
+        channel = thread.channel if thread else self.bot.add_channel()
+        anchor = channel.last_message or await channel.send("Ticket")
+        return await start_veto(self.bot, self.registry, TEMPLATE, (self.captain_id(team_a), team_a), (self.captain_id(team_b), team_b), channel, anchor)
+
+    async def play(self, veto, captains, turns=None):
+        """Clique les boutons jusqu'à la fin du veto (ou pendant `turns` tours) ; `captains` associe un ID
+        de capitaine à sa stratégie.
+
+        Retourne le nombre de tours joués par les capitaines.
+        """
+        limit, turns = turns, 0
+        while not veto.stopped and not veto.paused and veto.current_action_type() is not None and turns != limit:
+            user = self.bot.users[veto.current_turn]
+            step, action = veto.current_action, veto.current_action_type()
+            interaction = await self.click(veto, captains[user.id](veto, action), step, user)
+            if veto.current_action == step and not veto.stopped:
+                raise SimulationError(f"Tour {step} du veto {veto.session_id} refusé : {interaction.response.content}")
+            turns += 1
+        # Derniers tableaux et réponses du ticket de ce veto
+        for key in [("dm", captain_id) for captain_id in veto.participants] + [veto.channel.id]:
+            await self.registry.outbox.drain(key=key)
+        return turns
+
+    async def click(self, veto, index, step=None, user=None):
+        """Un clic sur le bouton `index` de l'étape `step` (par défaut le tour en cours) ; retourne l'interaction."""
+        user = user or self.bot.users[veto.current_turn]
+        # Le tableau (ou le DM) du capitaine doit être envoyé avant qu'il puisse cliquer
+        await self.registry.outbox.drain(key=("dm", user.id))
+        channel = await user.create_dm()
+        interaction = FakeInteraction(self.bot, user, channel.get_partial_message(veto.boards.get(user.id) or veto.message_id))
+        await MapButton(veto.session_id, veto.current_action if step is None else step, index).callback(interaction)
+        return interaction
+
+    def random_captains(self, veto, rng=None):
+        rng = rng or random.Random()
+        return {veto.team_a_id: random_captain(rng), veto.team_b_id: random_captain(rng)}
+
+    async def restart(self):
+        """Simule un redémarrage du bot : nouveau registre sur le même stockage, vetos repris comme au chargement du cog.
+
+        Retourne les vetos restaurés par ID de session.
+        """
+        await self.registry.outbox.drain()
+        old = self.registry
+        old.metrics.close()
+        old.sessions.timers.close()
+        old.outbox.close()
+        old.history.close()
+        self.registry = MapVetoRegistry(old.storage, legacy_panels=None, history=VetoHistory(self.directory))
+        self.bot.registry = self.registry
+        self.bot.cogs["MapVetoCog"].registry = self.registry
+        for session_id, data in self.registry.sessions.saved_sessions().items():
+            self.registry.sessions.add(MapVeto.from_dict(session_id, data, self.bot, registry=self.registry))
+        return dict(self.registry.sessions.sessions)
+
+    async def close(self):
+        await self.registry.outbox.drain()
+        self.registry.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+# --- Mesures ---------------------------------------------------------------------------
+
+async def bench_turns(sessions=1, seed=0, **options):
+    """Tours joués par seconde avec `sessions` vetos menés en parallèle."""
+    simulation = VetoSimulation(**options)
+    try:
+        vetos = [await simulation.start(*simulation.add_match()) for _ in range(sessions)]
+        rng = random.Random(seed)
+        started = time.perf_counter()
+        turns = sum(await asyncio.gather(*(simulation.play(veto, simulation.random_captains(veto, rng)) for veto in vetos)))
+        elapsed = time.perf_counter() - started
+        return {
+            "sessions": sessions,
+            "turns": turns,
+            "seconds": elapsed,
+            "turns_per_second": turns / elapsed if elapsed else 0.0,
+            "api_calls": sum(simulation.bot.api_calls.values()),
+        }
+    finally:
+        await simulation.close()
+
+
+async def bench_launch(launches=100, **options):
+    """Latence d'ouverture d'un ticket par TeamSelect (de la sélection au message du ticket)."""
+    simulation = VetoSimulation(**options)
+    try:
+        latencies = []
+        for _ in range(launches):
+            team_a, team_b = simulation.add_match()
+            started = time.perf_counter()
+            await simulation.launch(team_a, team_b)
+            latencies.append(time.perf_counter() - started)
+        latencies.sort()
+        return {
+            "launches": launches,
+            "p50_ms": statistics.median(latencies) * 1000,
+            "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+            "max_ms": latencies[-1] * 1000,
+        }
+    finally:
+        await simulation.close()
+
+
+async def bench_batch(matches=32, concurrency=MAX_CONCURRENT_LAUNCHES, **options):
+    """Durée d'ouverture d'une ronde de `matches` tickets, un par un puis par le lancement en lot.
+
+    Les appels simulés prennent BATCH_LATENCY secondes : sans latence, les deux modes se valent.
+    """
+    options.setdefault("latency", BATCH_LATENCY)
+    results = {"matches": matches, "concurrency": concurrency, "latency_ms": options["latency"] * 1000}
+    for mode, limit in (("serial", 1), ("batch", concurrency)):
+        simulation = VetoSimulation(**options)
+        try:
+            pairings = [Pairing(str(number), *simulation.add_match()) for number in range(1, matches + 1)]
+            context = await simulation.bot.get_context(await simulation.panel_channel.send("?launch_vetos"))
+            report = await launch_batch(simulation.bot, simulation.registry, TEMPLATE, pairings, context, concurrency=limit)
+            if report.failed:
+                raise SimulationError(f"Lancement en lot incomplet : {report.failed[0]}")
+            results[f"{mode}_seconds"] = report.elapsed
+        finally:
+            await simulation.close()
+    return results
+
+
+async def bench_memory(sessions=100, **options):
+    """Mémoire allouée par veto actif (session, tableaux envoyés, entrée du minuteur)."""
+    simulation = VetoSimulation(**options)
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        matches = [simulation.add_match() for _ in range(sessions)]
+        await simulation.registry.outbox.drain()
+        baseline = tracemalloc.get_traced_memory()[0]
+        for team_a, team_b in matches:
+            await simulation.start(team_a, team_b)
+        await simulation.registry.outbox.drain()
+        allocated = tracemalloc.get_traced_memory()[0] - baseline
+        return {
+            "sessions": sessions,
+            "bytes_per_session": allocated / sessions,
+            "total_kib": allocated / 1024,
+        }
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+        await simulation.close()
@@ -0,0 +1,277 @@
+import itertools
+
+import pytest
+
+pytest.importorskip("discord")
+pytest.importorskip("core.models", reason="modules de Modmail introuvables (MODMAIL_DIR)")
+
+from mapveto.core.brackets import DONE, LIVE, PENDING, READY, BracketConfig, BracketError, round_label, seed_order  # noqa: E402
+from mapveto.core.storage import SQLiteStorage  # noqa: E402
+from mapveto.core.tournament import TournamentConfig  # noqa: E402
+
+TOURNAMENT = "Coupe"
+
+
+def team_names(count):
+    return [f"Seed {seed}" for seed in range(1, count + 1)]
+
+
+def seed(team):
+    return int(team.rsplit(" ", 1)[1])
+
+
+def favourite(match):
+    """La meilleure tête de série gagne toujours."""
+    return min(match["team_a"], match["team_b"], key=seed)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SQLiteStorage(str(tmp_path))
+    yield storage
+    storage.close()
+
+
+@pytest.fixture
+def brackets(storage):
+    tournaments = TournamentConfig(storage)
+    tournaments.create_tournament(TOURNAMENT)
+    return BracketConfig(storage, tournaments)
+
+
+def play_out(brackets, winner=favourite, tournament=TOURNAMENT):
+    """Joue les matchs prêts jusqu'à la fin du tableau ; retourne les matchs joués dans l'ordre."""
+    played = []
+    while True:
+        ready = brackets.matches(tournament, READY) + brackets.matches(tournament, LIVE)
+        if not ready:
+            return played
+        for match in ready:
+            brackets.report_result(tournament, match["id"], winner(match))
+            played.append(match)
+
+
+def losses(played):
+    count = {}
+    for match in played:
+        count[match["loser"]] = count.get(match["loser"], 0) + 1
+    return count
+
+
+def test_seed_order_pairs_top_seeds_last():
+    assert seed_order(2) == [1, 2]
+    assert seed_order(4) == [1, 4, 2, 3]
+    assert seed_order(8) == [1, 8, 4, 5, 2, 7, 3, 6]
+
+
+# --- Élimination directe ----------------------------------------------------------------
+
+def test_single_elimination_gives_byes_to_top_seeds(brackets):
+    ready = brackets.create_bracket(TOURNAMENT, team_names(5), "single")
+    # 1, 2 et 3 sont exempts : 2 et 3 se retrouvent déjà en demi-finale
+    assert sorted((match["id"], match["team_a"], match["team_b"]) for match in ready) == [
+        ("W1-2", "Seed 4", "Seed 5"),
+        ("W2-2", "Seed 2", "Seed 3"),
+    ]
+    byes = [match for match in brackets.matches(TOURNAMENT, DONE, "W1") if match["loser"] is None]
+    assert sorted(match["winner"] for match in byes) == ["Seed 1", "Seed 2", "Seed 3"]
+    assert brackets.get_match(TOURNAMENT, "W2-1")["status"] == PENDING
+
+    played = play_out(brackets)
+    assert len(played) == 4
+    assert brackets.champion(TOURNAMENT) == "Seed 1"
+    assert brackets.info(TOURNAMENT) == {"format": "single", "teams": 5, "rounds": 3}
+
+
+@pytest.mark.parametrize("count", [2, 4, 7, 8, 16])
+def test_single_elimination_plays_one_match_per_eliminated_team(brackets, count):
+    brackets.create_bracket(TOURNAMENT, team_names(count), "single")
+    played = play_out(brackets)
+    assert len(played) == count - 1
+    assert losses(played) == {team: 1 for team in team_names(count)[1:]}
+    assert brackets.champion(TOURNAMENT) == "Seed 1"
+
+
+# --- Double élimination -----------------------------------------------------------------
+
+def test_double_elimination_routes_winners_and_losers(brackets):
+    brackets.create_bracket(TOURNAMENT, team_names(4), "double")
+    routes = {match["id"]: (match["win_to"], match["lose_to"]) for match in brackets.matches(TOURNAMENT)}
+    assert routes == {
+        "W1-1": (["W2-1", "team_a"], ["L1-1", "team_a"]),
+        "W1-2": (["W2-1", "team_b"], ["L1-1", "team_b"]),
+        "W2-1": (["GF", "team_a"], ["L2-1", "team_b"]),
+        "L1-1": (["L2-1", "team_a"], None),
+        "L2-1": (["GF", "team_b"], None),
+        "GF": (None, None),
+    }
+
+    brackets.report_result(TOURNAMENT, "W1-1", "Seed 4")
+    assert brackets.get_match(TOURNAMENT, "W2-1")["team_a"] == "Seed 4"
+    assert brackets.get_match(TOURNAMENT, "L1-1")["team_a"] == "Seed 1"
+    assert brackets.get_match(TOURNAMENT, "L1-1")["status"] == PENDING
+    ready = brackets.report_result(TOURNAMENT, "W1-2", "Seed 2")
+    assert sorted(match["id"] for match in ready) == ["L1-1", "W2-1"]
+    assert (brackets.get_match(TOURNAMENT, "L1-1")["team_a"], brackets.get_match(TOURNAMENT, "L1-1")["team_b"]) == ("Seed 1", "Seed 3")
+
+
+@pytest.mark.parametrize("count", [3, 4, 5, 8])
+def test_double_elimination_played_to_completion(brackets, count):
+    brackets.create_bracket(TOURNAMENT, team_names(count), "double")
+    played = play_out(brackets)
+    # Sans match retour en finale : chaque équipe sauf le champion perd deux fois
+    assert len(played) == 2 * count - 2
+    assert losses(played) == {team: 2 for team in team_names(count)[1:]}
+    assert played[-1]["id"] == "GF"
+    assert brackets.champion(TOURNAMENT) == "Seed 1"
+    assert brackets.matches(TOURNAMENT, PENDING) == []
+
+
+@pytest.mark.parametrize("count", [4, 8])
+def test_double_elimination_champion_can_come_from_the_losers_bracket(brackets, count):
+    final = f"W{count.bit_length() - 1}-1"
+
+    def upset_in_winners_final(match):
+        if match["id"] == final:
+            return max(match["team_a"], match["team_b"], key=seed)
+        return favourite(match)
+
+    brackets.create_bracket(TOURNAMENT, team_names(count), "double")
+    played = play_out(brackets, upset_in_winners_final)
+    grand_final = brackets.get_match(TOURNAMENT, "GF")
+    assert (grand_final["team_a"], grand_final["team_b"]) == ("Seed 2", "Seed 1")
+    assert brackets.champion(TOURNAMENT) == "Seed 1"
+    assert losses(played)["Seed 1"] == 1
+    assert len(played) == 2 * count - 2
+
+
+def test_champion_is_unknown_until_the_final(brackets):
+    brackets.create_bracket(TOURNAMENT, team_names(4), "double")
+    for match_id in ("W1-1", "W1-2", "W2-1", "L1-1", "L2-1"):
+        brackets.report_result(TOURNAMENT, match_id, favourite(brackets.get_match(TOURNAMENT, match_id)))
+    assert brackets.champion(TOURNAMENT) is None
+    assert brackets.get_match(TOURNAMENT, "GF")["status"] == READY
+
+
+# --- Rondes -----------------------------------------------------------------------------
+
+@pytest.mark.parametrize("count", [4, 5, 6])
+def test_round_robin_meets_every_opponent_once(brackets, count):
+    ready = brackets.create_bracket(TOURNAMENT, team_names(count), "roundrobin")
+    assert {round_label(match["id"]) for match in ready} == {"R1"}
+    played = play_out(brackets)
+    pairs = [frozenset((match["team_a"], match["team_b"])) for match in played]
+    assert sorted(pairs, key=sorted) == sorted(map(frozenset, itertools.combinations(team_names(count), 2)), key=sorted)
+    # L'exempt d'une ronde impaire ne gagne rien
+    assert all(match["loser"] is not None for match in brackets.matches(TOURNAMENT, DONE))
+    assert brackets.info(TOURNAMENT)["round"] == count - 1 + count % 2
+    assert brackets.standings(TOURNAMENT)[0] == ("Seed 1", count - 1, 0)
+    assert brackets.champion(TOURNAMENT) is None
+
+
+def test_swiss_rounds_avoid_rematches(brackets):
+    brackets.create_bracket(TOURNAMENT, team_names(8), "swiss")
+    assert brackets.info(TOURNAMENT)["rounds"] == 3
+    played = play_out(brackets)
+    pairs = [frozenset((match["team_a"], match["team_b"])) for match in played]
+    assert len(played) == 12
+    assert len(set(pairs)) == len(pairs)
+    assert brackets.standings(TOURNAMENT)[0] == ("Seed 1", 3, 0)
+    assert sorted(wins for _, wins, _ in brackets.standings(TOURNAMENT)) == [0, 1, 1, 1, 2, 2, 2, 3]
+
+
+def test_swiss_bye_is_a_win_given_once(brackets):
+    brackets.create_bracket(TOURNAMENT, team_names(5), "swiss", rounds=4)
+    play_out(brackets)
+    byes = [match["winner"] for match in brackets.matches(TOURNAMENT, DONE) if match["loser"] is None]
+    assert len(byes) == 4
+    assert len(set(byes)) == 4
+    assert sum(wins for _, wins, _ in brackets.standings(TOURNAMENT)) == 4 * 3
+
+
+def test_next_round_is_created_only_when_the_round_is_over(brackets):
+    brackets.create_bracket(TOURNAMENT, team_names(4), "swiss")
+    first, second = brackets.matches(TOURNAMENT, READY)
+    assert brackets.report_result(TOURNAMENT, first["id"], first["team_a"]) == []
+    assert brackets.matches(TOURNAMENT, label="S2") == []
+    ready = brackets.report_result(TOURNAMENT, second["id"], second["team_a"])
+    assert sorted(match["id"] for match in ready) == ["S2-1", "S2-2"]
+    assert brackets.info(TOURNAMENT)["round"] == 2
+
+
+# --- Erreurs, persistance et maintenance ------------------------------------------------
+
+def test_create_bracket_errors(brackets):
+    with pytest.raises(BracketError, match="Format inconnu"):
+        brackets.create_bracket(TOURNAMENT, team_names(4), "ladder")
+    with pytest.raises(BracketError, match="au moins 3 équipes"):
+        brackets.create_bracket(TOURNAMENT, team_names(2), "double")
+    with pytest.raises(BracketError, match="au moins 2 équipes"):
+        brackets.create_bracket(TOURNAMENT, ["Seed 1", "Seed 1"], "single")
+    brackets.create_bracket(TOURNAMENT, team_names(4), "single")
+    with pytest.raises(BracketError, match="déjà un tableau"):
+        brackets.create_bracket(TOURNAMENT, team_names(4), "single")
+
+
+def test_report_result_errors(brackets):
+    brackets.create_bracket(TOURNAMENT, team_names(4), "single")
+    with pytest.raises(BracketError, match="Aucun match 'W9-1'"):
+        brackets.report_result(TOURNAMENT, "W9-1", "Seed 1")
+    with pytest.raises(BracketError, match="n'est pas en cours"):
+        brackets.report_result(TOURNAMENT, "W2-1", "Seed 1")
+    with pytest.raises(BracketError, match="ne joue pas le match W1-1"):
+        brackets.report_result(TOURNAMENT, "W1-1", "Seed 2")
+    brackets.report_result(TOURNAMENT, "W1-1", "Seed 1")
+    with pytest.raises(BracketError, match="statut : done"):
+        brackets.report_result(TOURNAMENT, "W1-1", "Seed 1")
+
+
+def test_live_match_accepts_a_result(brackets):
+    brackets.create_bracket(TOURNAMENT, team_names(2), "single")
+    match = brackets.get_match(TOURNAMENT, "W1-1")
+    brackets.mark_live(match)
+    assert brackets.matches(TOURNAMENT, READY) == []
+    assert brackets.matches(TOURNAMENT, LIVE) == [match]
+    brackets.report_result(TOURNAMENT, "W1-1", "Seed 2")
+    assert brackets.champion(TOURNAMENT) == "Seed 2"
+
+
+def test_bracket_is_reloaded_from_storage(storage, brackets):
+    brackets.create_bracket(TOURNAMENT, team_names(8), "double")
+    for match in brackets.matches(TOURNAMENT, READY):
+        brackets.report_result(TOURNAMENT, match["id"], favourite(match))
+
+    reloaded = BracketConfig(storage, TournamentConfig(storage))
+    assert sorted(reloaded.matches(TOURNAMENT), key=lambda match: match["id"]) == sorted(brackets.matches(TOURNAMENT), key=lambda match: match["id"])
+    assert sorted(match["id"] for match in reloaded.matches(TOURNAMENT, READY)) == ["L1-1", "L1-2", "W2-1", "W2-2"]
+    play_out(reloaded)
+    assert reloaded.champion(TOURNAMENT) == "Seed 1"
+
+
+def test_rename_team_updates_matches_and_seeds(storage, brackets):
+    brackets.create_bracket(TOURNAMENT, team_names(4), "swiss")
+    brackets.report_result(TOURNAMENT, "S1-1", "Seed 1")
+    brackets.rename_team(TOURNAMENT, "Seed 1", "Seed 1 bis")
+    match = brackets.get_match(TOURNAMENT, "S1-1")
+    assert (match["team_a"], match["winner"]) == ("Seed 1 bis", "Seed 1 bis")
+    assert brackets.info(TOURNAMENT)["seeds"][0] == "Seed 1 bis"
+
+    reloaded = BracketConfig(storage, TournamentConfig(storage))
+    assert reloaded.get_match(TOURNAMENT, "S1-1")["winner"] == "Seed 1 bis"
+    assert reloaded.info(TOURNAMENT)["seeds"][0] == "Seed 1 bis"
+
+
+def test_rename_and_delete_tournament(storage, brackets):
+    brackets.create_bracket(TOURNAMENT, team_names(4), "single")
+    # Même ordre que la modale de renommage : l'entrée du tournoi, puis ses matchs
+    brackets.tournament_config.update_tournament(TOURNAMENT, "Ligue")
+    brackets.rename_tournament(TOURNAMENT, "Ligue")
+    assert brackets.matches(TOURNAMENT) == []
+    assert len(brackets.matches("Ligue", READY)) == 2
+    assert brackets.info("Ligue")["format"] == "single"
+    assert len(BracketConfig(storage, TournamentConfig(storage)).matches("Ligue")) == 3
+
+    assert brackets.delete_bracket("Ligue") == 3
+    assert brackets.matches("Ligue") == []
+    assert storage.load("matches") == {}
+    assert brackets.info("Ligue") is None
@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("core.models", reason="modules de Modmail introuvables (MODMAIL_DIR)")
+
+from mapveto.core.history import VetoHistory  # noqa: E402
+
+MAPS = ["Ascent", "Bind", "Haven", "Lotus"]
+
+
+def move(action, map_name, team, think=None, side=None, timed_out=False):
+    return {"step": None if action == "decider" else 0, "action": action, "map": map_name, "side": side,
+            "team": team, "user_id": None if team is None else 100 + team, "at": 1000.0, "think": think, "timed_out": timed_out}
+
+
+def finished_veto(session_id, moves, maps=MAPS, team_a="Alpha", team_b="Beta"):
+    """Ce que VetoHistory.record lit d'un MapVeto terminé."""
+    return SimpleNamespace(session_id=session_id, name="BO1", team_a_name=team_a, team_b_name=team_b,
+                           team_a_id=1, team_b_id=2, started_at=900.0, moves=moves, listmaps=maps)
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = VetoHistory(str(tmp_path))
+    yield history
+    history.close()
+
+
+@pytest.fixture
+def archived(history):
+    # Coupe : Ascent bannie, Bind choisie (avec son side), Haven DECIDER, Lotus jamais jouée
+    history.record(finished_veto("coupe", [
+        move("ban", "Ascent", 0, think=2.0),
+        move("pick", "Bind", 1, think=4.0),
+        move("side", "Bind", 0, think=1.0, side="Attaque"),
+        move("decider", "Haven", None),
+    ]), tournament="Coupe", finished_at=2000.0)
+    # Ligue : Ascent et Bind bannies, Lotus DECIDER, Haven jamais jouée
+    history.record(finished_veto("ligue", [
+        move("ban", "Ascent", 1, think=6.0, timed_out=True),
+        move("ban", "Bind", 0, think=2.0),
+        move("decider", "Lotus", None),
+    ], team_b="Gamma"), tournament="Ligue", finished_at=3000.0)
+    return history
+
+
+def stats_by_map(stats):
+    return {entry["map"]: entry for entry in stats}
+
+
+def test_map_stats_counts_every_outcome(archived):
+    stats = archived.map_stats()
+    assert [entry["map"] for entry in stats] == ["Ascent", "Bind", "Haven", "Lotus"]
+    by_map = stats_by_map(stats)
+    assert by_map["Ascent"] == {"map": "Ascent", "offered": 2, "bans": 2, "picks": 0, "deciders": 0, "think": 4.0, "ban_rate": 1.0, "pick_rate": 0.0}
+    assert by_map["Bind"] == {"map": "Bind", "offered": 2, "bans": 1, "picks": 1, "deciders": 0, "think": 3.0, "ban_rate": 0.5, "pick_rate": 0.5}
+    # Le DECIDER compte dans le taux de pick, et le side joué sur Bind n'est pas un pick de plus
+    assert (by_map["Haven"]["deciders"], by_map["Haven"]["pick_rate"]) == (1, 0.5)
+    assert by_map["Lotus"]["think"] is None
+
+
+def test_map_left_in_the_pool_counts_zero(history):
+    history.record(finished_veto("unplayed", [move("ban", "Ascent", 0)], maps=["Ascent", "Bind", "Haven"]))
+    by_map = stats_by_map(history.map_stats())
+    # Outcome NULL : 0 et non None, sinon les taux lèveraient une TypeError
+    assert by_map["Haven"] == {"map": "Haven", "offered": 1, "bans": 0, "picks": 0, "deciders": 0, "think": None, "ban_rate": 0.0, "pick_rate": 0.0}
+
+
+def test_map_stats_filters(archived):
+    ligue = stats_by_map(archived.map_stats(tournament="Ligue"))
+    assert {name: entry["offered"] for name, entry in ligue.items()} == {name: 1 for name in MAPS}
+    assert (ligue["Bind"]["bans"], ligue["Lotus"]["deciders"], ligue["Haven"]["pick_rate"]) == (1, 1, 0.0)
+
+    assert [(entry["map"], entry["bans"]) for entry in archived.map_stats(map_name="Ascent")] == [("Ascent", 2)]
+    assert [entry["offered"] for entry in archived.map_stats(tournament="Coupe", map_name="Bind")] == [1]
+    assert archived.map_stats(tournament="Inconnu") == []
+
+
+def test_record_is_idempotent(archived):
+    assert archived.record(finished_veto("coupe", [move("ban", "Lotus", 0)]), tournament="Coupe") is None
+    assert archived.count() == 2
+    assert archived.map_stats(map_name="Lotus")[0]["bans"] == 0
+
+
+def test_failed_record_leaves_no_trace(history):
+    broken = finished_veto("broken", [move("ban", "Ascent", 0), {"map": "Bind"}])
+    with pytest.raises(KeyError):
+        history.record(broken)
+    assert history.count() == 0
+    assert history.map_stats() == []
+    # La session peut être archivée une fois corrigée
+    broken.moves.pop()
+    assert history.record(broken) is not None
+
+
+def test_team_lookup_and_actions(archived):
+    assert [veto["session_id"] for veto in archived.vetos_for_team("Alpha")] == ["ligue", "coupe"]
+    assert [veto["session_id"] for veto in archived.vetos_for_team("Alpha", limit=1)] == ["ligue"]
+    assert [veto["session_id"] for veto in archived.vetos_for_team("Alpha", tournament="Coupe")] == ["coupe"]
+    assert archived.vetos_for_team("Gamma")[0]["team_b"] == "Gamma"
+    assert (archived.count("Coupe"), archived.count("Inconnu")) == (1, 0)
+
+    veto_id = archived.vetos_for_team("Gamma")[0]["id"]
+    actions = archived.actions(veto_id)
+    assert [(action["seq"], action["action"], action["map"]) for action in actions] == [(0, "ban", "Ascent"), (1, "ban", "Bind"), (2, "decider", "Lotus")]
+    assert [action["timed_out"] for action in actions] == [1, 0, 0]
@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("discord")
+pytest.importorskip("core.models", reason="modules de Modmail introuvables (MODMAIL_DIR)")
+
+from mapveto.core.launch import Pairing, check_pairings, launch_batch, parse_pairings  # noqa: E402
+from mapveto.core.veto import LaunchError  # noqa: E402
+from simulation import TEMPLATE, TOURNAMENT, VetoSimulation  # noqa: E402
+
+
+def run(scenario, **options):
+    async def main():
+        simulation = VetoSimulation(**options)
+        try:
+            return await scenario(simulation)
+        finally:
+            await simulation.close()
+    return asyncio.run(main())
+
+
+async def batch(simulation, pairings, **options):
+    context = await simulation.bot.get_context(await simulation.panel_channel.send("?launch_vetos"))
+    return await launch_batch(simulation.bot, simulation.registry, TEMPLATE, pairings, context, **options)
+
+
+# --- Saisie des rencontres ----------------------------------------------------------------
+
+@pytest.mark.parametrize("text, expected", [
+    ("Alpha vs Beta", [("1", "Alpha", "Beta")]),
+    ("Alpha VS. Beta ; Gamma contre Delta", [("1", "Alpha", "Beta"), ("2", "Gamma", "Delta")]),
+    ("`Les Alpha vs Les Beta`\n\n  Gamma Vs Delta  ", [("1", "Les Alpha", "Les Beta"), ("3", "Gamma", "Delta")]),
+])
+def test_parse_pairings(text, expected):
+    assert parse_pairings(text) == [Pairing(*pairing) for pairing in expected]
+
+
+@pytest.mark.parametrize("text, message", [
+    ("Alpha - Beta", "Rencontre 1 illisible : `Alpha - Beta`"),
+    ("Alpha vs Beta\nGamma vs Delta vs Epsilon", "Rencontre 2 illisible"),
+    ("Alpha vs ", "Rencontre 1 illisible"),
+    (" \n ; ", "Aucune rencontre à lancer."),
+])
+def test_parse_pairings_errors(text, message):
+    with pytest.raises(LaunchError) as error:
+        parse_pairings(text)
+    assert str(error.value).startswith(message)
+
+
+def test_check_pairings_reports_every_blocking_error():
+    async def scenario(simulation):
+        registry = simulation.registry
+        team_a, team_b = simulation.add_match()
+        team_c, team_d = simulation.add_match()
+        registry.tournament_config.create_tournament("Ligue")
+        registry.team_config.create_team("Intruse", "Ligue", str(simulation.bot.add_user("Intrus").id))
+        # Même capitaine que team_a sous un autre nom
+        registry.team_config.create_team("Alias", TOURNAMENT, str(simulation.captain_id(team_a)))
+        valid = [Pairing("1", team_a, team_b), Pairing("2", team_c, team_d)]
+        invalid = [
+            Pairing("1", team_a, team_b),
+            Pairing("2", team_a, team_c),
+            Pairing("3", "Fantôme", "Intruse"),
+            Pairing("4", "Alias", team_d),
+        ]
+        return check_pairings(registry, TOURNAMENT, valid), check_pairings(registry, TOURNAMENT, invalid), team_a
+
+    valid, errors, team_a = run(scenario)
+    assert valid == []
+    assert errors == [
+        f"`2` : **{team_a}** joue déjà la rencontre `1`.",
+        "`3` : l'équipe **Fantôme** n'existe pas.",
+        f"`3` : l'équipe **Intruse** n'est pas inscrite au tournoi **{TOURNAMENT}**.",
+        f"`4` : **Alias** a le même capitaine que **{team_a}** (`1`).",
+    ]
+
+
+# --- Lancement en lot ---------------------------------------------------------------------
+
+def test_failed_launches_do_not_stop_the_batch():
+    async def scenario(simulation):
+        pairings = [Pairing(str(number), *simulation.add_match()) for number in range(1, 5)]
+        pairings[1] = Pairing("2", "Fantôme", pairings[1].team_b)
+        broken = simulation.bot.users[simulation.captain_id(pairings[2].team_a)]
+        modmail = simulation.bot.cogs["Modmail"]
+        contact = modmail.contact
+
+        async def flaky_contact(ctx, users, **kwargs):
+            if broken in users:
+                raise RuntimeError("salon non créé")
+            return await contact(ctx, users, **kwargs)
+
+        modmail.contact = flaky_contact
+        launched = []
+        report = await batch(simulation, pairings, on_launched=launched.append)
+        tickets = {pairing.label for pairing in pairings if simulation.registry.threads.get(simulation.captain_id(pairing.team_b))}
+        return pairings, report, launched, tickets
+
+    pairings, report, launched, tickets = run(scenario)
+    assert sorted(report.launched) == sorted(launched) == [pairings[0], pairings[3]]
+    assert sorted(report.failed) == [
+        (pairings[1], "Une ou les deux équipes n'existent pas."),
+        (pairings[2], "erreur inattendue (RuntimeError)"),
+    ]
+    assert tickets == {"1", "4"}
+    summary = report.summary()
+    assert summary[0].startswith("2/4 ticket(s) de veto ouvert(s)")
+    assert f"`2` Fantôme VS {pairings[1].team_b} non lancé : Une ou les deux équipes n'existent pas." in summary
+
+
+def test_batch_respects_concurrency_and_reports_progress():
+    async def scenario(simulation):
+        pairings = [Pairing(str(number), *simulation.add_match()) for number in range(1, 7)]
+        modmail = simulation.bot.cogs["Modmail"]
+        contact = modmail.contact
+        running = [0, 0]
+
+        async def counted_contact(ctx, users, **kwargs):
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+            try:
+                return await contact(ctx, users, **kwargs)
+            finally:
+                running[0] -= 1
+
+        modmail.contact = counted_contact
+        seen = []
+
+        async def progress(report):
+            seen.append(report.progress())
+
+        report = await batch(simulation, pairings, concurrency=2, progress=progress, progress_interval=0.005)
+        return report, running[1], seen
+
+    report, peak, seen = run(scenario, latency=0.01)
+    assert len(report.launched) == 6
+    assert report.failed == []
+    assert peak == 2
+    assert seen
+    assert seen[0].startswith("Ouverture des tickets : ")
+    assert report.progress() == "Ouverture des tickets : 6/6 (0 échec(s))..."
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from mapveto.core.mappool import MapPool
+
+MAPS = ["Ascent", "Bind", "Haven", "Icebox", "Lotus"]
+
+
+def test_new_pool_has_every_map():
+    pool = MapPool(MAPS)
+    assert pool.remaining() == MAPS
+    assert pool.remaining_count() == 5
+    assert pool.banned_maps == [] and pool.picked_maps == []
+
+
+@pytest.mark.parametrize("actions, remaining, banned, picked", [
+    ([("ban", "Bind")], ["Ascent", "Haven", "Icebox", "Lotus"], ["Bind"], []),
+    ([("pick", "Lotus"), ("ban", "Ascent")], ["Bind", "Haven", "Icebox"], ["Ascent"], ["Lotus"]),
+    # Bans et picks rendus dans l'ordre des actions, pas dans celui du template
+    ([("ban", "Icebox"), ("pick", "Haven"), ("ban", "Ascent"), ("pick", "Bind")], ["Lotus"], ["Icebox", "Ascent"], ["Haven", "Bind"]),
+])
+def test_actions(actions, remaining, banned, picked):
+    pool = MapPool(MAPS)
+    for action, name in actions:
+        assert getattr(pool, action)(name) is True
+    assert pool.remaining() == remaining
+    assert pool.remaining_count() == len(remaining)
+    assert pool.banned_maps == banned
+    assert pool.picked_maps == picked
+
+
+@pytest.mark.parametrize("first, second, name", [
+    ("ban", "ban", "Bind"),
+    ("ban", "pick", "Bind"),
+    ("pick", "ban", "Haven"),
+    ("pick", "pick", "Haven"),
+])
+def test_map_is_used_only_once(first, second, name):
+    pool = MapPool(MAPS)
+    assert getattr(pool, first)(name) is True
+    assert getattr(pool, second)(name) is False
+    assert not pool.is_available(name)
+    assert len(pool.snapshot()) == 1
+
+
+def test_unknown_map_is_refused():
+    pool = MapPool(MAPS)
+    assert not pool.is_available("Dust2")
+    assert pool.ban("Dust2") is False
+    assert pool.pick("Dust2") is False
+    assert pool.remaining_count() == 5
+
+
+def test_snapshot_restore_round_trip():
+    pool = MapPool(MAPS)
+    for action, name in [("ban", "Ascent"), ("pick", "Icebox"), ("ban", "Lotus"), ("pick", "Bind")]:
+        getattr(pool, action)(name)
+    # L'instantané passe par le journal JSON des vetos en cours
+    snapshot = json.loads(json.dumps(pool.snapshot()))
+    assert snapshot == [0, -4, 4, -2]
+
+    restored = MapPool.restore(MAPS, snapshot)
+    assert (restored.banned_mask, restored.picked_mask) == (pool.banned_mask, pool.picked_mask)
+    assert restored.remaining() == ["Haven"]
+    assert restored.banned_maps == ["Ascent", "Lotus"]
+    assert restored.picked_maps == ["Icebox", "Bind"]
+    assert restored.snapshot() == snapshot
+
+
+def test_snapshot_is_a_copy():
+    pool = MapPool(MAPS)
+    snapshot = pool.snapshot()
+    pool.ban("Ascent")
+    assert snapshot == []
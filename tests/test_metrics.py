@@ -0,0 +1,121 @@
+import logging
+
+import pytest
+
+pytest.importorskip("core.models", reason="modules de Modmail introuvables (MODMAIL_DIR)")
+
+from mapveto.core.metrics import Histogram, Metrics, format_histogram, log_event  # noqa: E402
+
+
+def test_render_counters_gauges_and_help():
+    metrics = Metrics()
+    metrics.inc("mapveto_turns_total", source="click")
+    metrics.inc("mapveto_turns_total", 2, source="click")
+    metrics.inc("mapveto_turns_total", source="timeout")
+    metrics.inc("mapveto_vetos_total")
+    metrics.describe("mapveto_turns_total", "Tours joués")
+    metrics.register("mapveto_outbox_pending", "gauge", lambda: 3, "Envois en attente")
+    metrics.register("mapveto_cache_hits_total", "counter", lambda: {
+        (("cache", "threads"),): 5,
+        (("cache", "captains"),): 7,
+    })
+
+    assert metrics.render() == (
+        "# HELP mapveto_turns_total Tours joués\n"
+        "# TYPE mapveto_turns_total counter\n"
+        'mapveto_turns_total{source="click"} 3\n'
+        'mapveto_turns_total{source="timeout"} 1\n'
+        "# TYPE mapveto_vetos_total counter\n"
+        "mapveto_vetos_total 1\n"
+        "# TYPE mapveto_cache_hits_total counter\n"
+        'mapveto_cache_hits_total{cache="threads"} 5\n'
+        'mapveto_cache_hits_total{cache="captains"} 7\n'
+        "# HELP mapveto_outbox_pending Envois en attente\n"
+        "# TYPE mapveto_outbox_pending gauge\n"
+        "mapveto_outbox_pending 3\n"
+    )
+    assert metrics.counter_total("mapveto_turns_total") == 4
+
+
+def test_collectors_are_read_at_each_render():
+    metrics = Metrics()
+    pending = [0]
+    metrics.register("mapveto_outbox_pending", "gauge", lambda: pending[0])
+    assert "mapveto_outbox_pending 0\n" in metrics.render()
+    pending[0] = 4
+    assert "mapveto_outbox_pending 4\n" in metrics.render()
+
+
+def test_render_histogram_buckets_are_cumulative():
+    metrics = Metrics()
+    for value in (0.002, 0.004, 0.3, 12.0):
+        metrics.observe("mapveto_turn_seconds", value, mode="board")
+    shared = Histogram(buckets=(0.1, 1.0))
+    shared.observe(0.5)
+    metrics.add_histogram("mapveto_storage_write_seconds", shared, backend="sqlite")
+    text = metrics.render()
+
+    assert "# TYPE mapveto_turn_seconds histogram\n" in text
+    assert 'mapveto_turn_seconds_bucket{mode="board",le="0.001"} 0\n' in text
+    assert 'mapveto_turn_seconds_bucket{mode="board",le="0.005"} 2\n' in text
+    assert 'mapveto_turn_seconds_bucket{mode="board",le="0.5"} 3\n' in text
+    assert 'mapveto_turn_seconds_bucket{mode="board",le="10.0"} 3\n' in text
+    assert 'mapveto_turn_seconds_bucket{mode="board",le="+Inf"} 4\n' in text
+    assert 'mapveto_turn_seconds_count{mode="board"} 4\n' in text
+    assert 'mapveto_turn_seconds_sum{mode="board"} 12.306\n' in text
+    # Histogramme d'un composant : ses propres bornes, relu à chaque export
+    shared.observe(2.0)
+    text = metrics.render()
+    assert (
+        'mapveto_storage_write_seconds_bucket{backend="sqlite",le="0.1"} 0\n'
+        'mapveto_storage_write_seconds_bucket{backend="sqlite",le="1.0"} 1\n'
+        'mapveto_storage_write_seconds_bucket{backend="sqlite",le="+Inf"} 2\n'
+    ) in text
+
+
+def test_histogram_quantile_and_summary():
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    assert histogram.quantile(0.95) == 0.0
+    assert format_histogram("Tour", histogram) == "Tour : aucune mesure"
+    for value in [0.005] * 18 + [0.05, 0.4]:
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 0.01
+    assert histogram.quantile(0.95) == 0.1
+    # La dernière tranche est bornée par le maximum observé
+    assert histogram.quantile(1.0) == 0.4
+    assert format_histogram("Tour", histogram) == "Tour : 20 mesure(s), moyenne 27.0 ms, p95 ≤ 100.0 ms, max 400.0 ms"
+
+
+def test_write_replaces_the_file(tmp_path):
+    metrics = Metrics()
+    metrics.inc("mapveto_vetos_total")
+    path = tmp_path / "mapveto.prom"
+    path.write_text("ancien contenu\n")
+    metrics.write(str(path))
+    assert path.read_text() == metrics.render()
+    assert not (tmp_path / "mapveto.prom.tmp").exists()
+
+
+def test_log_event_quotes_values(caplog):
+    with caplog.at_level(logging.INFO, logger="mapveto"):
+        log_event("turn_played", session_id="abc123", choice="Map 2", note='dit "non"', skipped=None)
+    assert caplog.messages == ['event=turn_played session_id=abc123 choice="Map 2" note="dit \\"non\\""']
+
+
+def test_registry_exports_every_component(tmp_path):
+    pytest.importorskip("discord")
+    from mapveto.core.history import VetoHistory
+    from mapveto.core.registry import MapVetoRegistry
+    from mapveto.core.storage import SQLiteStorage
+
+    registry = MapVetoRegistry(SQLiteStorage(str(tmp_path)), legacy_panels=None, history=VetoHistory(str(tmp_path)))
+    try:
+        text = registry.metrics.render()
+    finally:
+        registry.close()
+    for name in ("mapveto_active_sessions", "mapveto_turn_timers", "mapveto_outbox_pending", "mapveto_history_vetos"):
+        assert f"# TYPE {name} gauge\n" in text
+    assert 'mapveto_active_sessions{state="running"} 0\n' in text
+    assert 'mapveto_discord_requests_total{kind="fetch_user"} 0\n' in text
+    assert "# HELP mapveto_storage_write_seconds Durée des écritures du backend (fichier JSON ou COMMIT SQLite)\n" in text
+    assert 'mapveto_storage_write_seconds_count{backend="sqlite"} 0\n' in text
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("core.models", reason="modules de Modmail introuvables (MODMAIL_DIR)")
+
+from mapveto.core.outbox import MessageQueue  # noqa: E402
+
+
+class FakeHTTPException(Exception):
+    """Ce que la file lit d'une erreur discord.py : `status` et, pour un 429, `retry_after`."""
+
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class FakeClient:
+    """Faux client Discord : journalise les envois et renvoie les erreurs programmées pour chaque message."""
+
+    def __init__(self, errors=None, delay=0.0):
+        self.errors = {content: list(raised) for content, raised in (errors or {}).items()}
+        self.delay = delay
+        self.calls = []
+        self.sent = []
+
+    async def send(self, key, content):
+        loop = asyncio.get_running_loop()
+        self.calls.append((key, content, loop.time()))
+        await asyncio.sleep(self.delay)
+        if self.errors.get(content):
+            raise self.errors[content].pop(0)
+        self.sent.append((key, content))
+        return content
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_same_key_keeps_submission_order():
+    async def scenario():
+        client = FakeClient(delay=0.001)
+        queue = MessageQueue(concurrency=3)
+        for index in range(20):
+            for key in ("salon", ("dm", 1), ("dm", 2)):
+                queue.submit(key, lambda key=key, index=index: client.send(key, index))
+        await queue.drain(timeout=5)
+        return client, queue
+
+    client, queue = run(scenario())
+    for key in ("salon", ("dm", 1), ("dm", 2)):
+        assert [content for sent_key, content in client.sent if sent_key == key] == list(range(20))
+    assert queue.sent == 60
+    assert queue.pending == 0
+
+
+def test_rate_limit_waits_retry_after_then_retries():
+    async def scenario():
+        client = FakeClient(errors={"a": [FakeHTTPException(429, retry_after=0.2)]})
+        queue = MessageQueue(concurrency=5, base_delay=10)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first = queue.submit("salon", lambda: client.send("salon", "a"))
+        await asyncio.sleep(0.05)
+        # Un autre salon soumis pendant la pause attend aussi la fin du rate limit
+        other = queue.submit(("dm", 1), lambda: client.send(("dm", 1), "b"))
+        results = await asyncio.gather(first, other)
+        return client, queue, started, results
+
+    client, queue, started, results = run(scenario())
+    assert results == ["a", "b"]
+    assert queue.retries == 1
+    assert queue.failures == 0
+    retry_at = [at for key, content, at in client.calls if content == "a"][1]
+    other_at = [at for key, content, at in client.calls if content == "b"][0]
+    # retry_after (0,2 s) est utilisé plutôt que le délai par défaut (10 s)
+    assert 0.2 <= retry_at - started < 1
+    assert other_at - started >= 0.2
+
+
+def test_rate_limit_gives_up_after_max_retries():
+    async def scenario():
+        client = FakeClient(errors={"a": [FakeHTTPException(429, retry_after=0.01) for _ in range(3)]})
+        queue = MessageQueue(max_retries=2)
+        future = queue.submit("salon", lambda: client.send("salon", "a"))
+        await queue.drain(timeout=5)
+        return client, queue, future
+
+    client, queue, future = run(scenario())
+    assert isinstance(future.exception(), FakeHTTPException)
+    assert len(client.calls) == 3
+    assert queue.retries == 2
+    assert queue.failures == 1
+
+
+def test_failure_does_not_block_the_key():
+    async def scenario():
+        client = FakeClient(errors={"a": [FakeHTTPException(403)]})
+        queue = MessageQueue()
+        # Envois « fire-and-forget » : personne ne lit le future en échec
+        queue.submit("salon", lambda: client.send("salon", "a"))
+        queue.submit("salon", lambda: client.send("salon", "b"))
+        await queue.drain(timeout=5)
+        return client, queue
+
+    client, queue = run(scenario())
+    assert client.sent == [("salon", "b")]
+    assert queue.retries == 0
+    assert queue.failures == 1
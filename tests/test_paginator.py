@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("discord")
+
+from discord.ui import Select  # noqa: E402 # type: ignore
+
+from mapveto.core.paginator import PagedSelect, SortedNames  # noqa: E402
+
+NAMES = ["beta", "Alpha", "Épervier", "alpine", "Gamma", "delta", "Alps"]
+
+
+def test_sorted_names_ignore_case():
+    names = SortedNames(NAMES)
+    assert list(names) == ["Alpha", "alpine", "Alps", "beta", "delta", "Gamma", "Épervier"]
+    names.add("Beta")
+    names.add("beta")  # déjà présent
+    names.discard("delta")
+    names.discard("inconnu")
+    assert list(names) == ["Alpha", "alpine", "Alps", "Beta", "beta", "Gamma", "Épervier"]
+    assert "Beta" in names and "BETA" not in names
+    assert names.slice(1, 3) == ["alpine", "Alps"]
+
+
+@pytest.mark.parametrize("prefix, expected", [
+    ("al", ["Alpha", "alpine", "Alps"]),
+    ("ALP", ["Alpha", "alpine", "Alps"]),
+    ("alph", ["Alpha"]),
+    ("alpine", ["alpine"]),
+    ("alpinez", []),
+    ("b", ["beta"]),
+    ("é", ["Épervier"]),
+    ("z", []),
+    ("", NAMES),
+])
+def test_prefix_range(prefix, expected):
+    names = SortedNames(NAMES)
+    start, stop = names.prefix_range(prefix)
+    assert names.slice(start, stop) == sorted(expected, key=lambda name: (name.casefold(), name))
+
+
+class FakeResponse:
+    def __init__(self):
+        self.edits = []
+
+    def is_done(self):
+        return bool(self.edits)
+
+    async def edit_message(self, content=None, view=None):
+        self.edits.append(content)
+
+
+class FakeInteraction:
+    def __init__(self):
+        self.response = FakeResponse()
+
+
+class RecordingSelect(PagedSelect):
+    def __init__(self, *args, **kwargs):
+        self.selected = None
+        super().__init__(*args, **kwargs)
+
+    async def on_select(self, interaction, values):
+        self.selected = values
+
+
+def options(view):
+    selects = [item for item in view.children if isinstance(item, Select)]
+    return [option.value for option in selects[0].options] if selects else []
+
+
+def test_choices_accumulate_across_pages():
+    teams = SortedNames(f"Equipe {number:02}" for number in range(60))
+
+    async def scenario():
+        view = RecordingSelect(teams, placeholder="Équipes", max_values=2, page_size=25)
+        assert view.page_count == 3
+        first_page = options(view)
+
+        interaction = FakeInteraction()
+        await view.select(interaction, ["Equipe 03"])
+        # Un seul choix sur deux : la vue est rafraîchie, pas encore de sélection
+        after_first = (view.selected, list(view.chosen), "Equipe 03" in options(view), interaction.response.edits[-1])
+
+        await view.next_page(FakeInteraction())
+        await view.next_page(FakeInteraction())
+        last_page = options(view)
+        await view.select(FakeInteraction(), ["Equipe 55"])
+        return first_page, after_first, last_page, view.selected
+
+    first_page, after_first, last_page, selected = asyncio.run(scenario())
+    assert first_page == [f"Equipe {number:02}" for number in range(25)]
+    assert after_first[:3] == (None, ["Equipe 03"], False)
+    assert "Sélection : Equipe 03 (1/2)" in after_first[3]
+    assert last_page == [f"Equipe {number:02}" for number in range(50, 60)]
+    assert selected == ["Equipe 03", "Equipe 55"]
+
+
+def test_search_and_reset():
+    async def scenario():
+        view = RecordingSelect(SortedNames(NAMES), placeholder="Équipes", page_size=2)
+        await view.search(FakeInteraction(), "al")
+        searched = (options(view), view.page_count)
+        await view.reset(FakeInteraction())
+        return searched, view.prefix, view.page_count
+
+    searched, prefix, page_count = asyncio.run(scenario())
+    assert searched == (["Alpha", "alpine"], 2)
+    assert prefix is None
+    assert page_count == 4
+
+
+def test_names_are_read_at_render_time():
+    index = {"names": SortedNames(["Alpha", "Beta"])}
+
+    async def scenario():
+        view = RecordingSelect(lambda: index["names"], placeholder="Équipes")
+        # La configuration reconstruit son index (import, rechargement) pendant que la vue est ouverte
+        index["names"] = SortedNames(["Alpha", "Beta", "Gamma"])
+        await view.refresh(FakeInteraction())
+        return options(view)
+
+    assert asyncio.run(scenario()) == ["Alpha", "Beta", "Gamma"]
+
+
+def test_abstract_on_select():
+    class Incomplete(PagedSelect):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete(SortedNames(NAMES), placeholder="Équipes")
+
+
+def test_team_select_survives_deleted_team_and_rebuilt_index():
+    pytest.importorskip("core.models", reason="modules de Modmail introuvables (MODMAIL_DIR)")
+    from mapveto.core.veto import TeamSelect
+    from simulation import TEMPLATE, TOURNAMENT, VetoSimulation
+
+    async def scenario():
+        simulation = VetoSimulation()
+        try:
+            team_a, team_b = simulation.add_match()
+            team_config = simulation.registry.team_config
+            view = TeamSelect(TOURNAMENT, TEMPLATE, simulation.bot, simulation.registry)
+            team_config.delete_team(team_a)
+            deleted = view.describe(team_a)
+            # create_teams reconstruit les index : la vue ouverte doit voir la nouvelle équipe
+            team_config.create_teams({"Equipe importée": {"tournament": TOURNAMENT, "captain_discord_id": str(simulation.admin.id)}})
+            await view.refresh(FakeInteraction())
+            return deleted, options(view), team_b
+        finally:
+            await simulation.close()
+
+    deleted, listed, team_b = asyncio.run(scenario())
+    assert deleted is None
+    assert listed == [team_b, "Equipe importée"]
@@ -0,0 +1,92 @@
+import pytest
+
+from mapveto.core.schedule import CONTINUE, MAX_MAPS, InvalidTemplateError, Step, compile_schedule, parse_turn_timer
+
+MAPS = ["Ascent", "Bind", "Haven", "Icebox", "Lotus", "Split", "Sunset"]
+
+
+def baseline_turns(rules):
+    """Ordre des tours tel que MapVeto.next_turn le calculait avant la compilation des règles.
+
+    Après chaque action la main change ; une suite de Continue la rend à l'équipe qui vient de jouer.
+    """
+    turns, team, action = [], 0, 0
+    while action < len(rules):
+        turns.append((rules[action], team))
+        team, action = 1 - team, action + 1
+        while action < len(rules) and rules[action] == CONTINUE:
+            action += 1
+            if action < len(rules) and rules[action] != CONTINUE:
+                team = 1 - team
+    return turns
+
+
+@pytest.mark.parametrize("rules", [
+    ["Ban", "Ban", "Pick", "Side", "Pick", "Side", "Ban", "Ban", "Side"],
+    ["Ban"] * 6,
+    ["Ban", "Continue", "Ban", "Pick", "Continue", "Pick", "Side"],
+    ["Ban", "Continue", "Continue", "Ban", "Ban", "Pick", "Side"],
+    ["Pick", "Side", "Continue", "Pick", "Side", "Ban", "Ban", "Ban", "Continue"],
+    ["Ban", "Continue"],
+])
+def test_compiled_order_matches_baseline(rules):
+    schedule = compile_schedule(MAPS, rules)
+    assert [(step.action, step.team) for step in schedule] == baseline_turns(rules)
+    assert [step.index for step in schedule] == list(range(len(schedule)))
+
+
+def test_steps_are_named():
+    assert compile_schedule(MAPS, ["Ban", "Continue", "Pick"]) == (Step(0, "Ban", 0), Step(1, "Pick", 0))
+
+
+@pytest.mark.parametrize("maps, rules, message", [
+    ([], ["Ban"], "au moins une map"),
+    ([f"Map {i}" for i in range(MAX_MAPS + 1)], ["Ban"], f"plus de {MAX_MAPS} maps"),
+    (["Ascent", "Bind", "Ascent"], ["Ban"], "plusieurs fois la même map"),
+    (MAPS, [], "au moins une règle"),
+    (MAPS, ["Ban", "Veto", "ban"], "Règle\\(s\\) inconnue\\(s\\) : Veto, ban"),
+    (MAPS, ["Continue", "Ban"], "commencer par 'Continue'"),
+    (MAPS, ["Ban"] * 7, "Trop de Ban/Pick pour 7 maps"),
+    (["Ascent", "Bind"], ["Pick", "Ban"], "Trop de Ban/Pick pour 2 maps"),
+    (MAPS, ["Side", "Ban"], "Side n°1 n'a aucune map"),
+    (MAPS, ["Ban", "Continue", "Side"], "Side n°3 n'a aucune map"),
+    (["Ascent"], ["Side"], "Side n°1 n'a aucune map"),
+])
+def test_invalid_templates_are_rejected(maps, rules, message):
+    with pytest.raises(InvalidTemplateError, match=message):
+        compile_schedule(maps, rules)
+
+
+@pytest.mark.parametrize("maps, rules", [
+    # Side sur la dernière map choisie
+    (MAPS, ["Pick", "Side"]),
+    # Side sur le DECIDER, désigné après le ban qui ne laisse qu'une map
+    (["Ascent", "Bind", "Haven"], ["Ban", "Ban", "Side"]),
+    (["Ascent", "Bind"], ["Ban", "Side"]),
+])
+def test_side_with_a_settled_map_is_accepted(maps, rules):
+    assert compile_schedule(maps, rules)[-1].action == "Side"
+
+
+@pytest.mark.parametrize("turn_timeout, timeout_action, expected", [
+    ("", "", (None, None)),
+    (None, None, (None, None)),
+    ("   ", "pause", (None, None)),
+    ("60", "", (60, "random")),
+    (" 90 ", " PAUSE ", (90, "pause")),
+    ("30", "random", (30, "random")),
+])
+def test_parse_turn_timer(turn_timeout, timeout_action, expected):
+    assert parse_turn_timer(turn_timeout, timeout_action) == expected
+
+
+@pytest.mark.parametrize("turn_timeout, timeout_action, message", [
+    ("abc", "", "nombre entier"),
+    ("1.5", "", "nombre entier"),
+    ("0", "", "positif"),
+    ("-10", "", "positif"),
+    ("60", "skip", "Action au délai inconnue : skip"),
+])
+def test_parse_turn_timer_rejects(turn_timeout, timeout_action, message):
+    with pytest.raises(InvalidTemplateError, match=message):
+        parse_turn_timer(turn_timeout, timeout_action)
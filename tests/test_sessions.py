@@ -0,0 +1,147 @@
+import asyncio
+import copy
+import time
+
+import pytest
+
+pytest.importorskip("discord")
+pytest.importorskip("core.models", reason="modules de Modmail introuvables (MODMAIL_DIR)")
+
+from mapveto.core.veto import MapVeto  # noqa: E402
+from simulation import DEFAULT_RULES, VetoSimulation, scripted_captain  # noqa: E402
+
+# Règles par défaut, en alternance A/B : Ban Ban Pick Side Pick Side Ban Ban Side (Sunset reste en DECIDER)
+SCRIPT_A = ["Ascent", "Haven", "Icebox", "Lotus", "Défense"]
+SCRIPT_B = ["Bind", "Attaque", "Défense", "Split"]
+
+
+def captains(veto):
+    return {veto.team_a_id: scripted_captain(SCRIPT_A), veto.team_b_id: scripted_captain(SCRIPT_B)}
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_half_played_veto_restores_after_restart():
+    async def scenario():
+        simulation = VetoSimulation(turn_timeout=120, timeout_action="random")
+        try:
+            veto = await simulation.start(*simulation.add_match())
+            strategies = captains(veto)
+            assert await simulation.play(veto, strategies, turns=4) == 4
+            before = copy.deepcopy(veto.to_dict())
+
+            restored = await simulation.restart()
+            assert list(restored) == [veto.session_id]
+            resumed = restored[veto.session_id]
+            loop = asyncio.get_running_loop()
+            remaining = simulation.registry.sessions.timers.deadline(resumed.session_id) - loop.time()
+
+            state = copy.deepcopy({
+                "current_action": resumed.current_action,
+                "current_turn": resumed.current_turn,
+                "pool": resumed.pool.snapshot(),
+                "banned": resumed.banned_maps,
+                "picked": resumed.picked_maps_only,
+                "moves": resumed.moves,
+                "to_dict": resumed.to_dict(),
+            })
+            # La reprise se poursuit jusqu'au bout avec les capitaines restants
+            turns = await simulation.play(resumed, strategies)
+            archived = simulation.registry.history.vetos_for_team(veto.team_a_name)
+            saved = simulation.registry.sessions.saved_sessions()
+            return veto, before, state, remaining, turns, archived, saved
+        finally:
+            await simulation.close()
+
+    veto, before, state, remaining, turns, archived, saved = run(scenario())
+    assert state["to_dict"] == before
+    assert state["current_action"] == 4
+    assert state["current_turn"] == before["current_turn"] == veto.team_a_id
+    assert state["pool"] == before["pool"]
+    assert state["banned"] == ["Ascent", "Bind"]
+    assert state["picked"] == ["Haven"]
+    assert [move["action"] for move in state["moves"]] == ["ban", "ban", "pick", "side"]
+    # Le minuteur repart avec le temps qu'il restait au tour, pas avec un délai complet
+    assert abs(remaining - (before["turn_deadline"] - time.time())) < 1
+    assert 0 < remaining <= 120
+    assert turns == len(DEFAULT_RULES) - 4
+    assert len(archived) == 1
+    assert saved == {}
+
+
+def test_paused_veto_restores_without_timer():
+    async def scenario():
+        simulation = VetoSimulation(turn_timeout=120, timeout_action="pause")
+        try:
+            veto = await simulation.start(*simulation.add_match())
+            veto.paused = True
+            simulation.registry.sessions.disarm(veto)
+            veto.journal()
+            restored = (await simulation.restart())[veto.session_id]
+            return restored, simulation.registry.sessions.timers.deadline(veto.session_id)
+        finally:
+            await simulation.close()
+
+    restored, deadline = run(scenario())
+    assert restored.paused
+    assert deadline is None
+
+
+def test_resolve_by_session_channel_and_captain_then_remove():
+    async def scenario():
+        simulation = VetoSimulation()
+        try:
+            sessions = simulation.registry.sessions
+            veto = await simulation.start(*simulation.add_match())
+            other = await simulation.start(*simulation.add_match())
+            channel = veto.channel
+            found = {
+                "session": sessions.resolve(veto.session_id),
+                "mention": sessions.resolve(f"<#{channel.id}>"),
+                "id": sessions.resolve(str(channel.id)),
+                "current": sessions.resolve(channel=channel),
+                "captain_a": sessions.get_by_captain(veto.team_a_id),
+                "captain_b": sessions.get_by_captain(veto.team_b_id),
+                "unknown": sessions.resolve("inconnu"),
+                "nothing": sessions.resolve(),
+            }
+            sessions.remove(veto)
+            sessions.remove(veto)  # déjà retiré : sans effet
+            gone = {
+                "session": sessions.resolve(veto.session_id),
+                "channel": sessions.resolve(channel=channel),
+                "captain": sessions.get_by_captain(veto.team_a_id),
+            }
+            return veto, other, found, gone, sessions.resolve(other.session_id), set(sessions.saved_sessions()), len(sessions)
+        finally:
+            await simulation.close()
+
+    veto, other, found, gone, still, saved, count = run(scenario())
+    assert all(found[key] is veto for key in ("session", "mention", "id", "current", "captain_a", "captain_b"))
+    assert found["unknown"] is None and found["nothing"] is None
+    assert gone == {"session": None, "channel": None, "captain": None}
+    assert still is other
+    assert saved == {other.session_id}
+    assert count == 1
+
+
+def test_remove_keeps_indexes_of_a_newer_session():
+    async def scenario():
+        simulation = VetoSimulation()
+        try:
+            sessions = simulation.registry.sessions
+            first = await simulation.start(*simulation.add_match())
+            # Nouveau veto des mêmes capitaines dans le même salon (relance après un arrêt)
+            second = MapVeto(first.name, first.listmaps, first.team_a_id, first.team_a_name, first.team_b_id, first.team_b_name,
+                             first.rules, first.channel, simulation.bot, registry=simulation.registry)
+            sessions.add(second)
+            sessions.remove(first)
+            return second, sessions.resolve(channel=first.channel), sessions.get_by_captain(first.team_a_id), sessions.get_by_captain(first.team_b_id)
+        finally:
+            await simulation.close()
+
+    second, by_channel, captain_a, captain_b = run(scenario())
+    assert by_channel is second
+    assert captain_a is second and captain_b is second
@@ -0,0 +1,230 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+pytest.importorskip("core.models", reason="modules de Modmail introuvables (MODMAIL_DIR)")
+
+from mapveto.core import storage as storage_module  # noqa: E402
+from mapveto.core.storage import JSON_FILES, JSONStorage, SQLiteStorage, WriteBehindStorage, migrate_json_to_sqlite  # noqa: E402
+
+TEAMS = {
+    "Alpha": {"tournament": "Coupe", "captain_discord_id": "1"},
+    "Beta": {"tournament": "Coupe", "captain_discord_id": "2"},
+    "Gamma": {"tournament": "Ligue", "captain_discord_id": 1},
+}
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, tmp_path):
+    storage = JSONStorage(str(tmp_path)) if request.param == "json" else SQLiteStorage(str(tmp_path))
+    yield storage
+    storage.close()
+
+
+def reopen(storage, tmp_path):
+    storage.close()
+    return type(storage)(str(tmp_path))
+
+
+def test_round_trip_survives_reopen(backend, tmp_path):
+    backend.apply("teams", upserts=TEAMS)
+    backend.upsert("templates", "BO1", {"maps": ["Ascent", "Bind"], "rules": ["Ban"]})
+    backend.delete("teams", "Beta")
+
+    reopened = reopen(backend, tmp_path)
+    try:
+        assert reopened.load("teams") == {name: TEAMS[name] for name in ("Alpha", "Gamma")}
+        assert reopened.load("templates") == {"BO1": {"maps": ["Ascent", "Bind"], "rules": ["Ban"]}}
+        assert reopened.load("vetos") == {}
+    finally:
+        reopened.close()
+
+
+def test_query_filters_on_indexed_columns(backend):
+    backend.apply("teams", upserts=TEAMS)
+    assert set(backend.query("teams", tournament="Coupe")) == {"Alpha", "Beta"}
+    # Les valeurs sont comparées en texte : un ID entier et un ID chaîne se valent
+    assert set(backend.query("teams", captain_discord_id=1)) == {"Alpha", "Gamma"}
+    assert set(backend.query("teams", tournament="Coupe", captain_discord_id="2")) == {"Beta"}
+
+
+def test_replace_drops_missing_rows(backend):
+    backend.apply("teams", upserts=TEAMS)
+    backend.replace("teams", {"Delta": {"tournament": "Coupe", "captain_discord_id": "4"}})
+    assert list(backend.load("teams")) == ["Delta"]
+
+
+def test_sqlite_rejects_unindexed_filter(tmp_path):
+    storage = SQLiteStorage(str(tmp_path))
+    try:
+        with pytest.raises(ValueError):
+            storage.query("teams", name="Alpha")
+    finally:
+        storage.close()
+
+
+def test_sqlite_transaction_rolls_back(tmp_path):
+    storage = SQLiteStorage(str(tmp_path))
+    try:
+        storage.apply("teams", upserts={"Alpha": TEAMS["Alpha"]})
+        with pytest.raises(RuntimeError):
+            with storage.transaction():
+                storage.apply("teams", upserts={"Beta": TEAMS["Beta"]})
+                storage.delete("teams", "Alpha")
+                raise RuntimeError("échec au milieu de la transaction")
+        assert storage.load("teams") == {"Alpha": TEAMS["Alpha"]}
+    finally:
+        storage.close()
+
+
+def test_json_write_is_atomic(tmp_path, monkeypatch):
+    storage = JSONStorage(str(tmp_path))
+    path = tmp_path / JSON_FILES["teams"]
+    synced = []
+    real_fsync = storage_module.os.fsync
+    monkeypatch.setattr(storage_module.os, "fsync", lambda fd: (synced.append(fd), real_fsync(fd)))
+
+    storage.apply("teams", upserts={"Alpha": TEAMS["Alpha"]})
+    assert json.loads(path.read_text()) == {"Alpha": TEAMS["Alpha"]}
+    assert synced
+    assert not (tmp_path / (JSON_FILES["teams"] + ".tmp")).exists()
+
+    # Une écriture interrompue (donnée non sérialisable) laisse le fichier précédent intact
+    with pytest.raises(TypeError):
+        storage.apply("teams", upserts={"Beta": {"captain": object()}})
+    assert json.loads(path.read_text()) == {"Alpha": TEAMS["Alpha"]}
+
+
+def test_json_transaction_writes_each_file_once(tmp_path, monkeypatch):
+    storage = JSONStorage(str(tmp_path))
+    written = []
+    real_write = storage._write
+    monkeypatch.setattr(storage, "_write", lambda table: (written.append(table), real_write(table)))
+    with storage.transaction():
+        for name, team in TEAMS.items():
+            storage.upsert("teams", name, team)
+        storage.upsert("tournaments", "Coupe", {})
+        assert written == []
+    assert sorted(written) == ["teams", "tournaments"]
+
+
+def test_migration_imports_legacy_files_once(tmp_path):
+    (tmp_path / JSON_FILES["teams"]).write_text(json.dumps(TEAMS))
+    (tmp_path / JSON_FILES["tournaments"]).write_text(json.dumps({"Coupe": {}, "Ligue": {}}))
+
+    storage = SQLiteStorage(str(tmp_path))
+    try:
+        assert migrate_json_to_sqlite(storage, str(tmp_path)) is True
+        assert storage.load("teams") == TEAMS
+        assert set(storage.load("tournaments")) == {"Coupe", "Ligue"}
+
+        # Les fichiers JSON ne sont plus relus : une suppression côté SQLite n'est pas annulée
+        storage.delete("teams", "Alpha")
+        assert migrate_json_to_sqlite(storage, str(tmp_path)) is False
+        assert "Alpha" not in storage.load("teams")
+    finally:
+        storage.close()
+
+
+# --- Write-behind -------------------------------------------------------------------------
+
+class FlakySQLite(SQLiteStorage):
+    """SQLite dont les `fail` prochaines écritures de la table "teams" échouent (base verrouillée)."""
+
+    def __init__(self, directory, fail=0):
+        super().__init__(directory)
+        self.fail = fail
+        self.transactions = 0
+
+    def transaction(self):
+        if self._depth == 0:
+            self.transactions += 1
+        return super().transaction()
+
+    def apply(self, table, upserts=None, deletes=()):
+        if table == "teams" and self.fail:
+            self.fail -= 1
+            raise sqlite3.OperationalError("database is locked")
+        super().apply(table, upserts=upserts, deletes=deletes)
+
+
+def test_write_behind_without_loop_writes_immediately(tmp_path):
+    backend = FlakySQLite(str(tmp_path))
+    storage = WriteBehindStorage(backend, interval=60)
+    storage.upsert("teams", "Alpha", TEAMS["Alpha"])
+    assert backend.load("teams") == {"Alpha": TEAMS["Alpha"]}
+    storage.close()
+
+
+def test_write_behind_coalesces_into_one_transaction(tmp_path):
+    backend = FlakySQLite(str(tmp_path))
+    storage = WriteBehindStorage(backend, interval=0.05)
+
+    async def scenario():
+        for name, team in TEAMS.items():
+            storage.upsert("teams", name, team)
+        storage.upsert("tournaments", "Coupe", {})
+        storage.delete("teams", "Beta")
+        # Lecture à travers le tampon avant le flush
+        assert backend.load("teams") == {}
+        assert set(storage.load("teams")) == {"Alpha", "Gamma"}
+        assert set(storage.query("teams", tournament="Coupe")) == {"Alpha"}
+        await asyncio.sleep(0.2)
+
+    asyncio.run(scenario())
+    assert backend.transactions == 1
+    assert set(backend.load("teams")) == {"Alpha", "Gamma"}
+    assert set(backend.load("tournaments")) == {"Coupe"}
+    storage.close()
+
+
+def test_failed_flush_requeues_without_losing_data(tmp_path):
+    backend = FlakySQLite(str(tmp_path))
+    backend.apply("teams", upserts={"Beta": TEAMS["Beta"], "Gamma": TEAMS["Gamma"]})
+    # Intervalle long : les écritures restent en tampon jusqu'aux flush explicites
+    storage = WriteBehindStorage(backend, interval=60)
+
+    async def scenario():
+        storage.upsert("tournaments", "Coupe", {"name": "Coupe"})
+        storage.upsert("teams", "Alpha", {"tournament": "Coupe", "captain_discord_id": "old"})
+        storage.delete("teams", "Beta")
+        storage.upsert("teams", "Gamma", {"tournament": "Ligue", "captain_discord_id": "old"})
+        backend.fail = 1
+        with pytest.raises(sqlite3.OperationalError):
+            storage.flush()
+        # Rien d'écrit à moitié : la transaction du backend a été annulée
+        assert set(backend.load("teams")) == {"Beta", "Gamma"}
+        assert backend.load("tournaments") == {}
+
+        # Écritures arrivées après l'échec : elles priment sur le lot remis en attente
+        storage.upsert("teams", "Alpha", TEAMS["Alpha"])
+        storage.upsert("teams", "Beta", TEAMS["Beta"])
+        storage.delete("teams", "Gamma")
+        assert set(storage.load("teams")) == {"Alpha", "Beta"}
+        storage.close()
+
+    asyncio.run(scenario())
+    reopened = SQLiteStorage(str(tmp_path))
+    try:
+        assert reopened.load("teams") == {"Alpha": TEAMS["Alpha"], "Beta": TEAMS["Beta"]}
+        assert reopened.load("tournaments") == {"Coupe": {"name": "Coupe"}}
+    finally:
+        reopened.close()
+
+
+def test_flush_loop_retries_after_failure(tmp_path):
+    backend = FlakySQLite(str(tmp_path), fail=1)
+    storage = WriteBehindStorage(backend, interval=0.05)
+
+    async def scenario():
+        storage.upsert("teams", "Alpha", TEAMS["Alpha"])
+        await asyncio.sleep(0.3)
+        # La tâche de flush a survécu à l'échec et a réécrit le lot
+        assert not storage._task.done()
+
+    asyncio.run(scenario())
+    assert backend.fail == 0
+    assert backend.load("teams") == {"Alpha": TEAMS["Alpha"]}
+    storage.close()
@@ -0,0 +1,156 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("discord")
+pytest.importorskip("core.models", reason="modules de Modmail introuvables (MODMAIL_DIR)")
+
+from mapveto.core.teamimport import MAX_REPORTED_ERRORS, ImportReport, TeamImportError, export_teams_file, import_teams_file  # noqa: E402
+from simulation import TOURNAMENT, VetoSimulation  # noqa: E402
+
+HEADER = "name,tournament,captain_discord_id"
+
+
+def run(scenario):
+    """Exécute `scenario(simulation)` avec deux capitaines connus du bot et une équipe existante."""
+    async def main():
+        simulation = VetoSimulation()
+        simulation.captains = [simulation.bot.add_user(f"Capitaine {n}").id for n in range(2)]
+        simulation.add_match()
+        try:
+            return await scenario(simulation)
+        finally:
+            await simulation.close()
+    return asyncio.run(main())
+
+
+def import_file(filename, template, default_tournament=None):
+    """Importe `template` (où {0} et {1} sont les IDs des capitaines) ; retourne le rapport et les tables avant / après."""
+    async def scenario(simulation):
+        registry = simulation.registry
+        before = (dict(registry.team_config.teams), registry.storage.load("teams"))
+        text = template
+        for index, captain_id in enumerate(simulation.captains):
+            text = text.replace(f"{{{index}}}", str(captain_id))
+        data = text.encode("utf-8-sig")
+        report = await import_teams_file(simulation.bot, registry, filename, data, default_tournament)
+        registry.flush()
+        return simulation, report, before, (dict(registry.team_config.teams), registry.storage.load("teams"))
+    return run(scenario)
+
+
+def test_valid_csv_creates_every_team():
+    simulation, report, before, after = import_file("teams.csv", "\n".join([
+        HEADER,
+        f"Gamma,{TOURNAMENT},{{0}}",
+        "Delta,,{1}",
+    ]), default_tournament=TOURNAMENT)
+    assert report.errors == []
+    assert report.rows == 2
+    assert report.created == ["Gamma", "Delta"]
+    assert after[1] == {
+        **before[1],
+        "Gamma": {"tournament": TOURNAMENT, "captain_discord_id": str(simulation.captains[0])},
+        "Delta": {"tournament": TOURNAMENT, "captain_discord_id": str(simulation.captains[1])},
+    }
+    assert after[0] == after[1]
+    assert report.summary().startswith("2 équipe(s) importée(s)")
+
+
+@pytest.mark.parametrize("bad_row, message", [
+    (f",{TOURNAMENT},{{1}}", "nom d'équipe manquant"),
+    (f"Gamma,{TOURNAMENT},{{1}}", "**Gamma** apparaît aussi ligne 2"),
+    (f"Equipe 1A,{TOURNAMENT},{{1}}", "l'équipe **Equipe 1A** existe déjà"),
+    ("Delta,,{1}", "tournoi manquant"),
+    ("Delta,Inconnu,{1}", "le tournoi **Inconnu** n'existe pas"),
+    (f"Delta,{TOURNAMENT},12345", "ID Discord du capitaine invalide : `12345`"),
+    (f"Delta,{TOURNAMENT},123456789012345678", "capitaine `123456789012345678` introuvable sur Discord"),
+])
+def test_one_bad_row_leaves_storage_unchanged(bad_row, message):
+    _, report, before, after = import_file("teams.csv", "\n".join([
+        HEADER,
+        f"Gamma,{TOURNAMENT},{{0}}",
+        bad_row,
+        f"Epsilon,{TOURNAMENT},{{1}}",
+    ]))
+    assert report.errors == [(3, message)]
+    assert report.created == []
+    assert after == before
+    assert report.summary().startswith("Import annulé : 1 erreur(s), aucune équipe créée.")
+
+
+def test_semicolon_csv_with_bom_is_accepted():
+    _, report, _, after = import_file("teams.csv", "\n".join([
+        "Name ; Tournament ; Captain_Discord_ID",
+        f"Gamma ; {TOURNAMENT} ; {{0}}",
+    ]))
+    assert report.errors == []
+    assert "Gamma" in after[0]
+
+
+def test_json_export_can_be_reimported():
+    async def scenario(simulation):
+        registry = simulation.registry
+        exported = export_teams_file(registry.team_config, "json", TOURNAMENT).read()
+        teams = json.loads(exported)
+        for name in teams:
+            registry.team_config.delete_team(name)
+        report = await import_teams_file(simulation.bot, registry, "export.json", exported)
+        return teams, report, dict(registry.team_config.teams)
+
+    teams, report, after = run(scenario)
+    assert len(teams) == 2
+    assert report.errors == []
+    assert after == teams
+
+
+def test_json_list_rows_are_numbered_from_one():
+    _, report, before, after = import_file("teams.json", json.dumps([
+        {"name": "Gamma", "tournament": TOURNAMENT, "captain_discord_id": "{0}"},
+        "pas une équipe",
+    ]))
+    assert report.errors == [(2, "nom d'équipe manquant")]
+    assert after == before
+
+
+def test_each_captain_is_fetched_once():
+    async def scenario(simulation):
+        registry = simulation.registry
+        unknown = 123456789012345678
+        rows = [HEADER] + [f"Equipe {n},{TOURNAMENT},{unknown}" for n in range(5)]
+        report = await import_teams_file(simulation.bot, registry, "teams.csv", "\n".join(rows).encode())
+        return report, simulation.bot.api_calls["fetch_user"]
+
+    report, fetches = run(scenario)
+    assert len(report.errors) == 5
+    assert fetches == 1
+
+
+@pytest.mark.parametrize("filename, data, message", [
+    ("teams.xlsx", b"", "Le fichier doit être un .csv ou un .json."),
+    ("teams.csv", "name;captain\n".encode(), "Colonne(s) manquante(s) : captain_discord_id"),
+    ("teams.json", b"{", "JSON invalide"),
+    ("teams.json", b'"Gamma"', "Le JSON doit être une liste d'équipes"),
+    ("teams.csv", "name,captain_discord_id\nÉquipe,1".encode("latin-1"), "Le fichier doit être encodé en UTF-8."),
+])
+def test_unreadable_files_are_rejected(filename, data, message):
+    async def scenario(simulation):
+        before = simulation.registry.storage.load("teams")
+        with pytest.raises(TeamImportError) as error:
+            await import_teams_file(simulation.bot, simulation.registry, filename, data)
+        return before, simulation.registry.storage.load("teams"), str(error.value)
+
+    before, after, text = run(scenario)
+    assert text.startswith(message)
+    assert after == before
+
+
+def test_summary_truncates_long_error_lists():
+    report = ImportReport()
+    for line in range(2, MAX_REPORTED_ERRORS + 5):
+        report.error(line, "nom d'équipe manquant")
+    lines = report.summary().split("\n")
+    assert lines[0] == f"Import annulé : {MAX_REPORTED_ERRORS + 3} erreur(s), aucune équipe créée."
+    assert len(lines) == MAX_REPORTED_ERRORS + 2
+    assert lines[-1] == "- ... et 3 autre(s)"
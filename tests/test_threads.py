@@ -0,0 +1,115 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from mapveto.core.threads import ThreadCache
+
+
+class FakeThreads:
+    """`bot.threads` de Modmail : le thread n'apparaît à la recherche qu'après `visible_after` appels."""
+
+    def __init__(self, thread=None, visible_after=0):
+        self.thread = thread
+        self.visible_after = visible_after
+        self.calls = 0
+
+    async def find(self, recipient_id=None):
+        self.calls += 1
+        return self.thread if self.thread and self.calls > self.visible_after else None
+
+
+def make_thread(*user_ids):
+    recipients = [SimpleNamespace(id=user_id) for user_id in user_ids]
+    return SimpleNamespace(recipients=recipients, recipient=recipients[0], channel=SimpleNamespace(id=42))
+
+
+def test_thread_ready_event_wakes_the_launch():
+    async def scenario():
+        cache = ThreadCache(poll_delay=10)
+        thread = make_thread(1, 2)
+        cache.expect(1)
+        asyncio.get_running_loop().call_later(0.01, cache.mark_ready, thread)
+        bot = SimpleNamespace(threads=FakeThreads())
+        return thread, await cache.wait_ready(bot, 1, timeout=1), cache, bot
+
+    thread, ready, cache, bot = asyncio.run(scenario())
+    assert ready is thread
+    assert bot.threads.calls == 0
+    assert cache.get(1) is thread and cache.get(2) is thread
+    assert cache._waiters == {}
+
+
+def test_missed_event_falls_back_to_polling():
+    async def scenario():
+        cache = ThreadCache(poll_delay=0.01, max_poll_delay=0.02)
+        thread = make_thread(1, 2)
+        bot = SimpleNamespace(threads=FakeThreads(thread, visible_after=2))
+        cache.expect(1)
+        return thread, await cache.wait_ready(bot, 1, timeout=1), cache, bot
+
+    thread, ready, cache, bot = asyncio.run(scenario())
+    assert ready is thread
+    assert bot.threads.calls == 3
+    assert cache._waiters == {}
+
+
+def test_timeout_drops_the_waiter():
+    async def scenario():
+        cache = ThreadCache(poll_delay=0.01)
+        cache.expect(1)
+        return await cache.wait_ready(SimpleNamespace(threads=FakeThreads()), 1, timeout=0.05), cache
+
+    ready, cache = asyncio.run(scenario())
+    assert ready is None
+    assert cache._waiters == {}
+
+
+def test_discard_only_drops_its_own_waiter():
+    async def scenario():
+        cache = ThreadCache()
+        old = cache.expect(1)
+        old.set_result(None)
+        new = cache.expect(1)  # l'attente terminée est remplacée
+        cache.discard(1, old)
+        kept = cache._waiters.get(1) is new
+        cache.discard(1, new)
+        return kept, cache
+
+    kept, cache = asyncio.run(scenario())
+    assert kept
+    assert cache._waiters == {}
+
+
+def test_failed_contact_does_not_leak_the_waiter():
+    pytest.importorskip("discord")
+    pytest.importorskip("core.models", reason="modules de Modmail introuvables (MODMAIL_DIR)")
+    from mapveto.core.veto import open_veto_ticket
+    from simulation import TEMPLATE, VetoSimulation
+
+    class ContactError(Exception):
+        pass
+
+    async def failing_contact(ctx, users, category=None, manual_trigger=False):
+        raise ContactError("salon non créé")
+
+    async def scenario():
+        simulation = VetoSimulation()
+        try:
+            team_a, team_b = simulation.add_match()
+            simulation.bot.cogs["Modmail"].contact = failing_contact
+            context = SimpleNamespace(bot=simulation.bot)
+            with pytest.raises(ContactError):
+                await open_veto_ticket(simulation.bot, simulation.registry, TEMPLATE, team_a, team_b, context)
+            waiters = dict(simulation.registry.threads._waiters)
+            # Le lancement suivant fonctionne normalement
+            del simulation.bot.cogs["Modmail"].contact
+            thread = await simulation.launch(team_a, team_b)
+            return waiters, thread, dict(simulation.registry.threads._waiters)
+        finally:
+            await simulation.close()
+
+    waiters, thread, after = asyncio.run(scenario())
+    assert waiters == {}
+    assert thread is not None
+    assert after == {}
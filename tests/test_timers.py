@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("core.models", reason="modules de Modmail introuvables (MODMAIL_DIR)")
+
+from mapveto.core.timers import TurnTimerWheel  # noqa: E402
+
+
+class Recorder:
+    """on_expire factice : note l'instant de chaque expiration puis simule `delay` secondes de requêtes Discord."""
+
+    def __init__(self, delay=0.0, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.started = {}
+        self.finished = {}
+
+    async def __call__(self, session_id, step):
+        loop = asyncio.get_running_loop()
+        self.started[session_id] = (step, loop.time())
+        await asyncio.sleep(self.delay)
+        if session_id in self.fail:
+            raise RuntimeError("expiration en échec")
+        self.finished[session_id] = (step, loop.time())
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_simultaneous_deadlines_do_not_wait_for_each_other():
+    async def scenario():
+        recorder = Recorder(delay=0.3)
+        wheel = TurnTimerWheel(recorder)
+        start = asyncio.get_running_loop().time()
+        wheel.schedule("a", 0.05, 1)
+        wheel.schedule("b", 0.05, 4)
+        await asyncio.sleep(0.2)
+        started = dict(recorder.started)
+        await asyncio.sleep(0.3)
+        wheel.close()
+        return start, started, recorder, wheel
+
+    start, started, recorder, wheel = run(scenario())
+    # Les deux expirations ont démarré avant la fin de la première (0,3 s)
+    assert set(started) == {"a", "b"}
+    assert all(at - start < 0.2 for _, at in started.values())
+    assert recorder.finished["a"][0] == 1 and recorder.finished["b"][0] == 4
+    assert wheel.expired == 2
+    assert len(wheel) == 0
+
+
+def test_failing_expiry_does_not_stop_the_wheel():
+    async def scenario():
+        recorder = Recorder(fail={"a"})
+        wheel = TurnTimerWheel(recorder)
+        wheel.schedule("a", 0.01, 0)
+        wheel.schedule("b", 0.05, 0)
+        await asyncio.sleep(0.15)
+        wheel.close()
+        return recorder
+
+    recorder = run(scenario())
+    assert "a" in recorder.started and "a" not in recorder.finished
+    assert "b" in recorder.finished
+
+
+def test_rescheduled_and_cancelled_deadlines():
+    async def scenario():
+        recorder = Recorder()
+        wheel = TurnTimerWheel(recorder)
+        wheel.schedule("a", 0.05, 1)
+        wheel.schedule("a", 0.1, 2)  # tour suivant : l'échéance précédente est ignorée
+        wheel.schedule("b", 0.05, 1)
+        wheel.cancel("b")
+        assert wheel.deadline("b") is None
+        await asyncio.sleep(0.2)
+        wheel.close()
+        return recorder
+
+    recorder = run(scenario())
+    assert recorder.started == {"a": (2, recorder.started["a"][1])}
+
+
+def test_earlier_deadline_wakes_the_wheel():
+    async def scenario():
+        recorder = Recorder()
+        wheel = TurnTimerWheel(recorder)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        wheel.schedule("tard", 10, 0)
+        await asyncio.sleep(0.01)
+        wheel.schedule("tôt", 0.05, 0)
+        await asyncio.sleep(0.15)
+        wheel.close()
+        return start, recorder
+
+    start, recorder = run(scenario())
+    assert list(recorder.started) == ["tôt"]
+    assert recorder.started["tôt"][1] - start < 0.15
@@ -0,0 +1,213 @@
+import asyncio
+import re
+
+import pytest
+
+pytest.importorskip("discord")
+pytest.importorskip("core.models", reason="modules de Modmail introuvables (MODMAIL_DIR)")
+
+from mapveto.core.veto import MAP_BUTTON_TEMPLATE, MapButton  # noqa: E402
+from simulation import DEFAULT_MAPS, DEFAULT_RULES, FakeInteraction, VetoSimulation  # noqa: E402
+
+
+def run(scenario, **options):
+    """Exécute `scenario(simulation)` dans une simulation neuve, fermée ensuite."""
+    async def main():
+        simulation = VetoSimulation(**options)
+        try:
+            return await scenario(simulation)
+        finally:
+            await simulation.close()
+    return asyncio.run(main())
+
+
+async def wait_for(condition, timeout=3.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        if loop.time() > deadline:
+            raise AssertionError("condition non atteinte")
+        await asyncio.sleep(0.01)
+
+
+# --- Tours : carte périmée et délai écoulé ------------------------------------------------
+
+def test_stale_map_button_is_rejected_without_advancing():
+    async def scenario(simulation):
+        veto = await simulation.start(*simulation.add_match())
+        await simulation.click(veto, DEFAULT_MAPS.index("Ascent"))
+        # Le capitaine B clique sur Ascent depuis un tableau pas encore rafraîchi
+        stale = await simulation.click(veto, DEFAULT_MAPS.index("Ascent"))
+        return veto, stale, await veto.play_turn(veto.current_action, "ban", "Ascent", stale.user, None)
+
+    veto, stale, played = run(scenario)
+    assert stale.response.content == "La map **Ascent** n'est plus disponible."
+    assert stale.response.ephemeral
+    assert played is False
+    assert veto.current_action == 1
+    assert veto.banned_maps == ["Ascent"]
+    assert len(veto.moves) == 1
+
+
+def test_timeouts_play_random_moves_until_the_end():
+    async def scenario(simulation):
+        veto = await simulation.start(*simulation.add_match())
+        await wait_for(lambda: veto.stopped)
+        return veto, simulation.registry.history.vetos_for_team(veto.team_a_name), simulation.registry.sessions.timers.expired
+
+    veto, archived, expired = run(scenario, turn_timeout=0.02, timeout_action="random")
+    played = [move for move in veto.moves if move["step"] is not None]
+    assert len(played) == expired == len(DEFAULT_RULES)
+    assert all(move["timed_out"] for move in played)
+    assert len(veto.pool.remaining()) == 0
+    assert len(archived) == 1
+
+
+def test_timeout_pauses_the_veto():
+    async def scenario(simulation):
+        veto = await simulation.start(*simulation.add_match())
+        await wait_for(lambda: veto.paused)
+        await asyncio.sleep(0.05)
+        return veto, simulation.registry.sessions.timers.deadline(veto.session_id)
+
+    veto, deadline = run(scenario, turn_timeout=0.02, timeout_action="pause")
+    assert veto.current_action == 0
+    assert veto.moves == []
+    assert deadline is None
+
+
+# --- Tableaux des capitaines : diff et renvoi après échec ---------------------------------
+
+def test_unchanged_board_is_not_resent():
+    async def scenario(simulation):
+        veto = await simulation.start(*simulation.add_match())
+        await simulation.registry.outbox.drain()
+        before = dict(simulation.bot.api_calls)
+        await veto.update_boards()
+        await veto.refresh_boards()
+        await simulation.registry.outbox.drain()
+        return before, dict(simulation.bot.api_calls)
+
+    before, after = run(scenario)
+    assert after == before
+
+
+def test_clicking_captain_board_is_edited_by_the_interaction():
+    async def scenario(simulation):
+        veto = await simulation.start(*simulation.add_match())
+        await simulation.registry.outbox.drain()
+        boards = dict(veto.boards)
+        before = dict(simulation.bot.api_calls)
+        interaction = await simulation.click(veto, DEFAULT_MAPS.index("Ascent"))
+        await simulation.registry.outbox.drain()
+        return veto, boards, interaction, before, dict(simulation.bot.api_calls)
+
+    veto, boards, interaction, before, after = run(scenario)
+    # Tableau du capitaine A par la réponse, tableau du capitaine B édité sur place : aucun nouveau message
+    assert "Ascent" in interaction.message.content
+    assert veto.boards == boards
+    assert after["send"] == before["send"]
+    assert after["edit"] == before.get("edit", 0) + 1
+
+
+def test_failed_board_send_is_resent_on_next_update():
+    async def scenario(simulation):
+        team_a, team_b = simulation.add_match()
+        user = simulation.bot.users[simulation.captain_id(team_b)]
+        send = user.send
+        failures = []
+
+        async def flaky_send(*args, **kwargs):
+            if not failures:
+                failures.append(args)
+                raise RuntimeError("DM perdu")
+            return await send(*args, **kwargs)
+
+        user.send = flaky_send
+        veto = await simulation.start(team_a, team_b)
+        await simulation.registry.outbox.drain()
+        lost = user.id not in veto.boards and user.id not in veto._board_signatures
+        await veto.update_boards()
+        await simulation.registry.outbox.drain()
+        return veto, user, failures, lost
+
+    veto, user, failures, lost = run(scenario)
+    assert len(failures) == 1
+    assert lost
+    assert user.id in veto.boards
+    assert user.dm_channel.messages[veto.boards[user.id]].content.startswith("__**MapVeto")
+
+
+def test_forget_board_keeps_a_newer_signature():
+    async def scenario(simulation):
+        veto = await simulation.start(*simulation.add_match())
+        await simulation.registry.outbox.drain()
+        captain_id = veto.team_b_id
+        newer = veto._board_signatures[captain_id]
+        # Un envoi plus ancien échoue après la mise en file du tableau courant
+        veto._forget_board(captain_id, ("ancien tableau", None))
+        kept = veto._board_signatures.get(captain_id)
+        veto._forget_board(captain_id, newer)
+        return newer, kept, captain_id in veto._board_signatures
+
+    newer, kept, remaining = run(scenario)
+    assert kept == newer
+    assert not remaining
+
+
+# --- Boutons dynamiques : custom_id et tours périmés --------------------------------------
+
+async def rebuild(button):
+    """Recrée le bouton comme discord.py à la réception d'un clic : à partir de son seul custom_id."""
+    match = re.fullmatch(MAP_BUTTON_TEMPLATE, button.item.custom_id)
+    assert match is not None, button.item.custom_id
+    return await MapButton.from_custom_id(None, button.item, match)
+
+
+def test_map_button_custom_id_round_trip():
+    async def scenario(simulation):
+        veto = await simulation.start(*simulation.add_match())
+        await simulation.click(veto, DEFAULT_MAPS.index("Bind"))
+        view = veto.create_turn_view()
+        return veto, view.children, [await rebuild(button) for button in view.children]
+
+    veto, buttons, rebuilt = run(scenario)
+    assert [button.item.custom_id for button in buttons] == [f"mapveto:{veto.session_id}:1:{index}" for index in range(len(DEFAULT_MAPS))]
+    assert [(button.session_id, button.step, button.index) for button in rebuilt] == [(veto.session_id, 1, index) for index in range(len(DEFAULT_MAPS))]
+    assert [button.item.disabled for button in buttons] == [name == "Bind" for name in DEFAULT_MAPS]
+
+
+def test_rebuilt_button_plays_on_a_restored_veto():
+    async def scenario(simulation):
+        veto = await simulation.start(*simulation.add_match())
+        button = await rebuild(veto.create_turn_view().children[DEFAULT_MAPS.index("Haven")])
+        restored = (await simulation.restart())[veto.session_id]
+        user = simulation.bot.users[restored.current_turn]
+        channel = await user.create_dm()
+        interaction = FakeInteraction(simulation.bot, user, channel.get_partial_message(restored.boards[user.id]))
+        await button.callback(interaction)
+        return restored
+
+    restored = run(scenario)
+    assert restored.banned_maps == ["Haven"]
+    assert restored.current_action == 1
+
+
+@pytest.mark.parametrize("step, index, player, message", [
+    (0, 0, "b", "Ce tour est terminé."),
+    (2, 0, "b", "Ce tour est terminé."),
+    (1, len(DEFAULT_MAPS), "b", "Choix invalide."),
+    (1, 0, "a", "Ce n'est pas votre tour."),
+])
+def test_map_button_rejections(step, index, player, message):
+    async def scenario(simulation):
+        veto = await simulation.start(*simulation.add_match())
+        await simulation.click(veto, DEFAULT_MAPS.index("Ascent"))
+        user = simulation.bot.users[veto.team_a_id if player == "a" else veto.team_b_id]
+        return veto, await simulation.click(veto, index, step, user)
+
+    veto, interaction = run(scenario)
+    assert interaction.response.content == message
+    assert interaction.response.ephemeral
+    assert veto.current_action == 1
+    assert veto.banned_maps == ["Ascent"]